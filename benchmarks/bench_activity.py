@@ -0,0 +1,98 @@
+"""Time activity analytics over a history index filled with synthetic commits.
+
+Commits are written straight into the index (no git history is generated), so a
+million of them takes well under a minute to set up.
+
+Usage: python benchmarks/bench_activity.py [--commits 1000000] [--authors 500]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import closing
+from datetime import datetime, timezone
+from pathlib import Path
+
+import git
+
+from git_viz.git_ops import _activity
+from git_viz.history_index import CACHE_DIR_ENV, HistoryIndex
+
+
+def synthetic_records(commits: int, authors: int, seed: int = 0):
+	rng = random.Random(seed)
+	start = int(datetime(2014, 1, 1, tzinfo=timezone.utc).timestamp())
+	span = 10 * 365 * 86400
+	for i in range(commits):
+		yield {
+			"hash": f"{i:040x}",
+			"parents": [],
+			"author": f"author-{int(rng.paretovariate(1.2)) % authors}",
+			"email": "",
+			"timestamp": start + rng.randrange(span),
+			"message": "",
+			"files": [
+				{"path": "f", "insertions": rng.randrange(50), "deletions": rng.randrange(20)}
+			],
+		}
+
+
+def legacy_weekly(timestamps_and_authors) -> dict:
+	"""The original loop: one datetime and two isocalendar() calls per commit."""
+	per_author: dict[str, int] = defaultdict(int)
+	weekly: dict[str, int] = defaultdict(int)
+	for ts, author in timestamps_and_authors:
+		per_author[author] += 1
+		dt = datetime.fromtimestamp(ts, tz=timezone.utc)
+		weekly[f"{dt.isocalendar()[0]}-W{dt.isocalendar()[1]:02d}"] += 1
+	return {"commits_per_author": dict(per_author), "commits_over_time": sorted(weekly.items())}
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument("--commits", type=int, default=1_000_000)
+	parser.add_argument("--authors", type=int, default=500)
+	parser.add_argument("--repeat", type=int, default=5)
+	parser.add_argument("--workdir", default=None)
+	args = parser.parse_args()
+
+	workdir = Path(args.workdir or tempfile.mkdtemp(prefix="git-viz-bench-"))
+	# Keep the synthetic index out of the real cache directory
+	os.environ.setdefault(CACHE_DIR_ENV, str(workdir / "cache"))
+	repo_dir = workdir / "activity"
+	repo_dir.mkdir(parents=True, exist_ok=True)
+	repo = git.Repo.init(repo_dir)
+	index = HistoryIndex(repo)
+
+	start = time.perf_counter()
+	with closing(index._connect()) as conn, conn:
+		index._ingest(conn, synthetic_records(args.commits, args.authors))
+	print(f"ingested {args.commits} commits in {time.perf_counter() - start:.1f}s")
+
+	with closing(index._connect()) as conn:
+		rows = conn.execute("SELECT committed, author FROM commits").fetchall()
+	start = time.perf_counter()
+	legacy_weekly(rows)
+	print(f"legacy weekly loop:         {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+	for bucket in ("day", "week", "month"):
+		best = float("inf")
+		for _ in range(args.repeat):
+			start = time.perf_counter()
+			result = _activity(index, bucket)
+			best = min(best, time.perf_counter() - start)
+		print(
+			f"rollup bucket={bucket:<6} best: {best * 1000:8.1f} ms  ({len(result['churn'])} buckets)"
+		)
+
+	since = int(datetime(2020, 1, 1, tzinfo=timezone.utc).timestamp())
+	start = time.perf_counter()
+	_activity(index, "week", since=since, until=since + 365 * 86400)
+	print(f"rollup one-year window:     {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,65 @@
+"""Compare the memory held by 100k commits as a list of dicts and as a CommitStore.
+
+Records are synthetic, shaped like the history index's output: a few hundred
+authors, a shared pool of paths and a handful of files per commit. Sizes are
+the traced allocations still alive once each representation is built.
+
+Usage: python benchmarks/bench_commit_store.py [--commits 100000] [--paths 5000]
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from git_viz.commit_store import CommitStore
+from git_viz.git_ops import _commit_dict, _commits_json
+from synth import synthetic_records
+
+
+def measure(build):
+	"""(result, bytes alive after building it, seconds taken)."""
+	gc.collect()
+	tracemalloc.start()
+	start = time.perf_counter()
+	result = build()
+	elapsed = time.perf_counter() - start
+	gc.collect()
+	size = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	return result, size, elapsed
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument("--commits", type=int, default=100_000)
+	parser.add_argument("--paths", type=int, default=5_000)
+	parser.add_argument("--authors", type=int, default=300)
+	args = parser.parse_args()
+
+	def records():
+		return synthetic_records(args.commits, args.paths, args.authors)
+
+	# Each representation starts from the same freshly generated (unshared) strings,
+	# the way they arrive from SQLite
+	dicts, dict_bytes, dict_time = measure(lambda: [_commit_dict(r) for r in records()])
+	dict_json = json.dumps(dicts, ensure_ascii=False, separators=(",", ":")).encode()
+	del dicts
+	store, store_bytes, store_time = measure(lambda: CommitStore(records()))
+	assert _commits_json(store) == dict_json
+
+	mib = 1024 * 1024
+	print(f"{args.commits} commits, {len(store.file_paths)} file changes, {len(store.paths)} paths")
+	print(f"list of dicts: {dict_bytes / mib:8.1f} MiB  built in {dict_time:5.2f}s")
+	print(f"CommitStore:   {store_bytes / mib:8.1f} MiB  built in {store_time:5.2f}s")
+	print(f"ratio:         {dict_bytes / store_bytes:8.1f}x")
+	start = time.perf_counter()
+	_commits_json(store)
+	print(
+		f"encode from store: {time.perf_counter() - start:5.2f}s ({len(dict_json) / mib:.1f} MiB JSON)"
+	)
+
+
+if __name__ == "__main__":
+	main()
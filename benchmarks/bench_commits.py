@@ -0,0 +1,70 @@
+"""Compare per-commit ``c.stats`` extraction with the single-process log stream.
+
+Each size starts from an empty history index in a fresh temporary cache directory,
+so ``get_commits`` is timed cold, ingest included, on every run.
+
+Usage: python benchmarks/bench_commits.py [--sizes 500,5000,50000] [--workdir DIR]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import git
+
+from git_viz.git_ops import get_commits
+from git_viz.history_index import CACHE_DIR_ENV
+from synth import make_repo
+
+
+def legacy_get_commits(path: Path, limit: int) -> list[dict]:
+	repo = git.Repo(path)
+	result = []
+	for c in repo.iter_commits(max_count=limit):
+		files = [
+			{"path": f, "insertions": s["insertions"], "deletions": s["deletions"]}
+			for f, s in c.stats.files.items()
+		]
+		result.append(
+			{
+				"hash": c.hexsha,
+				"author": c.author.name,
+				"email": c.author.email,
+				"date": datetime.fromtimestamp(c.committed_date, tz=timezone.utc).isoformat(),
+				"message": c.message.strip(),
+				"files": files,
+			}
+		)
+	return result
+
+
+def _timed(fn, *args) -> tuple[float, list]:
+	start = time.perf_counter()
+	result = fn(*args)
+	return time.perf_counter() - start, result
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument("--sizes", default="500,5000,50000")
+	parser.add_argument("--workdir", default=None)
+	args = parser.parse_args()
+
+	workdir = Path(args.workdir or tempfile.mkdtemp(prefix="git-viz-bench-"))
+	sizes = [int(s) for s in args.sizes.split(",")]
+	repo_path = make_repo(workdir / f"linear-{max(sizes)}", commits=max(sizes))
+
+	print(f"{'commits':>8} {'c.stats':>10} {'log stream':>11} {'speedup':>8}")
+	for size in sizes:
+		legacy_s, legacy = _timed(legacy_get_commits, repo_path, size)
+		os.environ[CACHE_DIR_ENV] = tempfile.mkdtemp(prefix="git-viz-cache-")
+		stream_s, streamed = _timed(get_commits, repo_path, size)
+		assert [c["hash"] for c in legacy] == [c["hash"] for c in streamed]
+		print(f"{size:>8} {legacy_s:>9.2f}s {stream_s:>10.2f}s {legacy_s / stream_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+	main()
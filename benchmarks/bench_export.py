@@ -0,0 +1,81 @@
+"""Static export time and size, full and incremental, by number of worker processes.
+
+Builds a synthetic repository and exports it into a fresh directory with each
+process count, then commits ``--new-commits`` more and exports into the last
+directory again, which should only recompute the newest history chunk and the
+HEAD-derived views.
+
+Usage: python benchmarks/bench_export.py [--commits 20000] [--processes 1,4] [--new-commits 10]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import git
+from synth import make_repo
+
+from git_viz.export import DATA_DIR, export
+from git_viz.git_ops import sync_index
+from git_viz.history_index import CACHE_DIR_ENV
+
+
+def timed_export(repo: Path, out: Path, processes: int, chunk_commits: int) -> tuple[float, dict]:
+	start = time.perf_counter()
+	result = export(repo, out, processes, chunk_commits)
+	return time.perf_counter() - start, result
+
+
+def size_mb(out: Path) -> float:
+	return sum(p.stat().st_size for p in (out / DATA_DIR).iterdir()) / 1e6
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument("--commits", type=int, default=20_000)
+	parser.add_argument("--files", type=int, default=5000)
+	parser.add_argument("--processes", default=None, help="comma-separated pool sizes")
+	parser.add_argument("--chunk-commits", type=int, default=2000)
+	parser.add_argument("--new-commits", type=int, default=10)
+	parser.add_argument("--workdir", default=None)
+	args = parser.parse_args()
+
+	cores = os.cpu_count() or 1
+	sizes = [int(n) for n in args.processes.split(",")] if args.processes else sorted({1, cores})
+	workdir = Path(args.workdir or tempfile.mkdtemp(prefix="git-viz-bench-"))
+	# Set before any worker process starts; they inherit it
+	os.environ[CACHE_DIR_ENV] = str(workdir / "cache")
+	repo = make_repo(
+		workdir / f"export-{args.commits}", commits=args.commits, files=args.files, authors=20
+	)
+	# Ingestion is the same for every run and not what is measured here
+	sync_index(repo)
+	print(f"{args.commits} commits, {args.files} files, chunks of {args.chunk_commits}")
+
+	for size in sizes:
+		out = workdir / f"site-{size}"
+		shutil.rmtree(out, ignore_errors=True)
+		seconds, result = timed_export(repo, out, size, args.chunk_commits)
+		print(
+			f"{size:2d} processes  full         {seconds:7.2f}s  {result['chunks']:4d} chunks"
+			f"  {size_mb(out):7.1f} MB"
+		)
+
+	handle = git.Repo(repo)
+	for i in range(args.new_commits):
+		(repo / f"new_{i}.txt").write_text(f"new {i}\n")
+		handle.index.add([f"new_{i}.txt"])
+		handle.index.commit(f"New {i}")
+	sync_index(repo)
+	seconds, result = timed_export(repo, out, sizes[-1], args.chunk_commits)
+	print(
+		f"{sizes[-1]:2d} processes  incremental  {seconds:7.2f}s  {result['written']:4d} chunks"
+		f" written, {result['history_reused']}/{result['history_chunks']} history chunks reused"
+	)
+
+
+if __name__ == "__main__":
+	main()
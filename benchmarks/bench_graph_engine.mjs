@@ -0,0 +1,96 @@
+// Compare the timeline's co-change graph computed from scratch at every slider
+// position with the incremental engine from index.html, without a browser.
+//
+// Usage: node benchmarks/bench_graph_engine.mjs [--commits 20000] [--files 5000] [--seeks 200]
+
+import { readFileSync } from "node:fs";
+
+const INDEX_HTML = new URL("../src/git_viz/index.html", import.meta.url);
+
+export function loadEngine() {
+	const html = readFileSync(INDEX_HTML, "utf8");
+	const start = html.indexOf("// --- co-change engine ---");
+	const end = html.indexOf("// --- end co-change engine ---");
+	if (start < 0 || end < 0) throw new Error("co-change engine markers not found in index.html");
+	return new Function(`${html.slice(start, end)}\nreturn createCoChangeEngine;`)();
+}
+
+// Mirrors the per-update recompute updateGraph did before the engine existed,
+// plus the engine's per-commit edge cap
+export function recompute(commits, upto, activeAuthors, filter, maxFiles = Infinity) {
+	const fileCount = new Map(), pairCount = new Map();
+	for (const c of commits.slice(0, upto).filter(c => activeAuthors.has(c.author))) {
+		const touched = [...new Set(c.files.map(f => f.path))];
+		const paths = touched.filter(p => !filter || filter(p));
+		paths.forEach(p => fileCount.set(p, (fileCount.get(p) || 0) + 1));
+		if (touched.length > maxFiles) continue;
+		for (let i = 0; i < paths.length; i++) {
+			for (let j = i + 1; j < paths.length; j++) {
+				const key = [paths[i], paths[j]].sort().join("|");
+				pairCount.set(key, (pairCount.get(key) || 0) + 1);
+			}
+		}
+	}
+	return { fileCount, pairCount };
+}
+
+function rng(seed) {
+	return () => {
+		seed = (seed * 1103515245 + 12345) % 2147483648;
+		return seed / 2147483648;
+	};
+}
+
+export function synthCommits({ commits, files, filesPerCommit = 6, authors = 20, seed = 1 }) {
+	const rand = rng(seed);
+	return Array.from({ length: commits }, (_, i) => ({
+		hash: i.toString(16).padStart(40, "0"),
+		author: `author-${Math.floor(rand() * authors)}`,
+		files: Array.from({ length: 1 + Math.floor(rand() * filesPerCommit) }, () => ({
+			path: `src/dir${Math.floor(rand() * 50)}/file${Math.floor(rand() * files)}.js`,
+		})),
+	}));
+}
+
+function time(fn) {
+	const start = performance.now();
+	fn();
+	return performance.now() - start;
+}
+
+function main() {
+	const opts = { commits: 20000, files: 5000, seeks: 200 };
+	const argv = process.argv.slice(2);
+	for (let i = 0; i < argv.length; i += 2) opts[argv[i].replace(/^--/, "")] = Number(argv[i + 1]);
+
+	const commits = synthCommits(opts);
+	const authors = new Set(commits.map(c => c.author));
+	const createCoChangeEngine = loadEngine();
+	const rand = rng(7);
+	const seeks = Array.from({ length: opts.seeks }, () => Math.floor(rand() * commits.length));
+	// Recomputing every playback step is quadratic; sample it and extrapolate
+	const step = Math.max(1, Math.floor(commits.length / opts.seeks));
+
+	const legacyPlay = time(() => {
+		for (let i = step; i <= commits.length; i += step) recompute(commits, i, authors, null);
+	}) * step;
+	const legacySeek = time(() => seeks.forEach(p => recompute(commits, p, authors, null)));
+
+	const engine = createCoChangeEngine({ maxFilesPerCommit: Infinity });
+	const enginePlay = time(() => {
+		engine.prepend(commits);
+		for (let i = 0; i <= commits.length; i++) engine.seek(i);
+	});
+	const engineSeek = time(() => seeks.forEach(p => engine.seek(p)));
+	const toggle = time(() => {
+		engine.setAuthorActive("author-0", false);
+		engine.setAuthorActive("author-0", true);
+	});
+
+	console.log(`${opts.commits} commits, ${opts.files} files`);
+	console.log(`playback, every position   legacy ~${legacyPlay.toFixed(0)} ms   engine ${enginePlay.toFixed(0)} ms`);
+	console.log(`${opts.seeks} random seeks       legacy ${legacySeek.toFixed(0)} ms   engine ${engineSeek.toFixed(0)} ms`);
+	console.log(`author toggle off+on       engine ${toggle.toFixed(1)} ms`);
+}
+
+if (import.meta.url === `file://${process.argv[1]}`) main();
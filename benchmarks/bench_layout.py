@@ -0,0 +1,60 @@
+"""Time get_layout on a history dense enough in co-change to hit the node cap.
+
+Files are drawn from a small pool, so pairs recur and most of it ends up linked.
+Exits with status 1 when the layout takes longer than ``--max-seconds`` or lays
+out more than ``--max-nodes`` files in a keyframe.
+
+Usage: python benchmarks/bench_layout.py [--files 1500] [--commits 2000] [--max-seconds 3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from synth import make_repo
+
+from git_viz.git_ops import DEFAULT_LAYOUT_NODES, get_layout, sync_index
+from git_viz.history_index import CACHE_DIR_ENV
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument("--files", type=int, default=1_500)
+	parser.add_argument("--commits", type=int, default=2_000)
+	parser.add_argument("--files-per-commit", type=int, default=12)
+	parser.add_argument("--limit", type=int, default=500)
+	parser.add_argument("--max-nodes", type=int, default=DEFAULT_LAYOUT_NODES)
+	parser.add_argument("--max-seconds", type=float, default=3.0)
+	parser.add_argument("--workdir", default=None)
+	args = parser.parse_args()
+
+	workdir = Path(args.workdir or tempfile.mkdtemp(prefix="git-viz-bench-"))
+	# A fresh index per run, so earlier runs can't leave anything cached
+	os.environ[CACHE_DIR_ENV] = tempfile.mkdtemp(prefix="git-viz-cache-")
+	repo = make_repo(
+		workdir / f"dense-{args.files}-{args.commits}-{args.files_per_commit}",
+		commits=args.commits,
+		files=args.files,
+		initial_files=args.files,
+		files_per_commit=args.files_per_commit,
+	)
+	sync_index(repo)
+
+	start = time.perf_counter()
+	result = get_layout(repo, limit=args.limit, max_nodes=args.max_nodes)
+	elapsed = time.perf_counter() - start
+
+	nodes = max((len(k["positions"]) for k in result["keyframes"]), default=0)
+	print(f"{len(result['keyframes'])} keyframes, up to {nodes} nodes")
+	print(f"get_layout: {elapsed:8.2f}s  (bound {args.max_seconds:.2f}s)")
+	if nodes > args.max_nodes:
+		sys.exit(f"laid out {nodes} nodes, more than --max-nodes {args.max_nodes}")
+	if elapsed > args.max_seconds:
+		sys.exit(f"get_layout took {elapsed:.2f}s, more than --max-seconds {args.max_seconds}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,89 @@
+"""Multi-repository aggregation throughput by number of worker processes.
+
+Builds ``--repos`` synthetic repositories and aggregates them cold (empty history
+indexes, so every repository is ingested) and warm, once in-process one
+repository after another and then on process pools of increasing size. Cold
+aggregation is dominated by ``git log`` parsing and SQLite ingest and should
+scale with cores up to the number of repositories.
+
+Usage: python benchmarks/bench_multi_repo.py [--repos 16] [--commits 3000] [--processes 1,2,4]
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from synth import make_repo
+
+from git_viz.git_ops import get_repo_summary
+from git_viz.history_index import CACHE_DIR_ENV
+from git_viz.multi_repo import aggregate, merge_summaries
+from git_viz.workers import ProcessWorkerPool
+
+
+def clear(cache_dir: Path) -> None:
+	shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def sequential(repos: list[Path], limit: int) -> float:
+	start = time.perf_counter()
+	merge_summaries([get_repo_summary(repo, limit) for repo in repos], limit)
+	return time.perf_counter() - start
+
+
+def pooled(repos: list[Path], processes: ProcessWorkerPool, limit: int) -> float:
+	start = time.perf_counter()
+	merged = asyncio.run(aggregate(repos, processes, limit, timeout=600))
+	assert not merged["partial"], merged["errors"]
+	return time.perf_counter() - start
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument("--repos", type=int, default=16)
+	parser.add_argument("--commits", type=int, default=3000)
+	parser.add_argument("--processes", default=None, help="comma-separated pool sizes")
+	parser.add_argument("--limit", type=int, default=100)
+	parser.add_argument("--workdir", default=None)
+	args = parser.parse_args()
+
+	cores = os.cpu_count() or 1
+	sizes = (
+		[int(n) for n in args.processes.split(",")]
+		if args.processes
+		else [n for n in (1, 2, 4, 8, 16) if n < cores] + [cores]
+	)
+	workdir = Path(args.workdir or tempfile.mkdtemp(prefix="git-viz-bench-"))
+	# Set before any worker process starts; they inherit it
+	cache_dir = workdir / "cache"
+	os.environ[CACHE_DIR_ENV] = str(cache_dir)
+	repos = [
+		make_repo(workdir / f"fleet-{i:02d}", commits=args.commits, seed=i)
+		for i in range(args.repos)
+	]
+	print(f"{args.repos} repos x {args.commits} commits, {cores} cores")
+
+	clear(cache_dir)
+	cold = sequential(repos, args.limit)
+	warm = sequential(repos, args.limit)
+	print(f"in-process, sequential  cold {cold:7.2f}s  warm {warm * 1000:8.1f} ms")
+	for size in sizes:
+		processes = ProcessWorkerPool(processes=size)
+		# Start the workers outside the timed runs
+		asyncio.run(processes.run(os.getpid))
+		clear(cache_dir)
+		cold_pooled = pooled(repos, processes, args.limit)
+		warm_pooled = pooled(repos, processes, args.limit)
+		processes.close()
+		print(
+			f"{size:2d} processes             cold {cold_pooled:7.2f}s  warm {warm_pooled * 1000:8.1f} ms"
+			f"  (cold speed-up {cold / cold_pooled:.2f}x)"
+		)
+
+
+if __name__ == "__main__":
+	main()
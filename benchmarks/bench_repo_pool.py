@@ -0,0 +1,64 @@
+"""Sequential /api/tree work on distinct commits, with pooled and per-request repo handles.
+
+Every request builds a tree the history index has not seen, so it reads objects
+through ``git cat-file``. With a pool the helper processes stay warm across
+requests; with ``idle_timeout=0`` every handle is closed once returned, which is
+how a fresh ``git.Repo`` per request behaved.
+
+Usage: python benchmarks/bench_repo_pool.py [--commits 400] [--requests 200]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import git
+from synth import make_repo
+
+from git_viz import git_ops
+from git_viz.history_index import CACHE_DIR_ENV
+from git_viz.repo_pool import RepoPool
+
+
+def run(repo: Path, shas: list[str], pool: RepoPool, cache_dir: Path) -> tuple[float, dict]:
+	os.environ[CACHE_DIR_ENV] = str(cache_dir)
+	git_ops.repos = pool
+	before = pool.stats()
+	start = time.perf_counter()
+	for sha in shas:
+		git_ops.get_tree(repo, sha)
+	elapsed = time.perf_counter() - start
+	after = pool.stats()
+	pool.close()
+	spawned = {
+		k: after[k] - before[k] for k in ("processes_spawned", "persistent_processes_spawned")
+	}
+	return elapsed, {**spawned, "opened": after["opened"], "reuse_rate": after["reuse_rate"]}
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument("--commits", type=int, default=400)
+	parser.add_argument("--requests", type=int, default=200)
+	parser.add_argument("--workdir", default=None)
+	args = parser.parse_args()
+
+	workdir = Path(args.workdir or tempfile.mkdtemp(prefix="git-viz-bench-"))
+	repo = make_repo(workdir / f"pool-{args.commits}", commits=args.commits, initial_files=500)
+	shas = [c.hexsha for c in git.Repo(repo).iter_commits(max_count=args.requests)]
+
+	modes = (("per-request", RepoPool(idle_timeout=0)), ("pooled", RepoPool()))
+	print(f"{len(shas)} tree requests")
+	for label, pool in modes:
+		elapsed, stats = run(repo, shas, pool, workdir / f"cache-{label}")
+		print(
+			f"{label:<12} {elapsed:6.2f}s  processes {stats['processes_spawned']:>5}"
+			f"  cat-file {stats['persistent_processes_spawned']:>4}"
+			f"  handles opened {stats['opened']:>4}  reuse {stats['reuse_rate']:.1%}"
+		)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,435 @@
+"""End-to-end benchmarks: every ``git_ops`` function and API endpoint on large synthetic repos.
+
+Each profile builds (or reuses, under ``--workdir``) a deterministic repository
+with ``synth.make_repo`` and ingests its history index once, timed. Every case
+then runs in a fresh interpreter so it starts without pooled handles, cached
+results or memory left over from other cases, against the ingested index with
+its tree cache emptied: the first call is timed, then ``--repeat`` more calls
+(API responses come from the result cache from then on). Any subset of cases
+(``--cases``) therefore measures the same as in a full run.
+
+Per case the results record the first and median repeat time, peak RSS of the
+interpreter and how much it grew during the calls, and the git subprocesses
+started (as counted by the repository pool; the process pool behind
+``/api/multi`` is not included). They are written to ``--output`` as JSON.
+``--baseline`` compares them with an earlier results file and exits with status
+1 when a case got slower or grew more than ``--tolerance`` times its baseline,
+started more git processes, or failed (including running past ``--timeout``).
+
+Usage: python benchmarks/bench_suite.py [--profiles smoke,10k] [--output results.json]
+                                        [--baseline baseline.json] [--tolerance 1.25]
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from contextlib import closing
+from datetime import UTC, datetime
+from pathlib import Path
+
+from synth import make_repo
+
+RESULTS_VERSION = 1
+
+PROFILES = {
+	"smoke": {
+		"commits": 2_000,
+		"files": 5_000,
+		"initial_files": 5_000,
+		"authors": 50,
+		"merge_every": 50,
+		"rename_every": 40,
+		"fanout_every": 500,
+		"fanout_files": 2_000,
+	},
+	"10k": {
+		"commits": 10_000,
+		"files": 20_000,
+		"initial_files": 20_000,
+		"authors": 200,
+		"merge_every": 25,
+		"rename_every": 20,
+		"fanout_every": 2_000,
+		"fanout_files": 10_000,
+	},
+	"wide-tree": {
+		"commits": 1_000,
+		"files": 100_000,
+		"initial_files": 100_000,
+		"authors": 20,
+		"fanout_every": 250,
+		"fanout_files": 50_000,
+	},
+	"100k": {
+		"commits": 100_000,
+		"files": 50_000,
+		"initial_files": 50_000,
+		"authors": 1_000,
+		"merge_every": 20,
+		"rename_every": 50,
+		"fanout_every": 10_000,
+		"fanout_files": 20_000,
+	},
+	"500k": {
+		"commits": 500_000,
+		"files": 100_000,
+		"initial_files": 100_000,
+		"authors": 5_000,
+		"merge_every": 20,
+		"rename_every": 100,
+		"fanout_every": 50_000,
+		"fanout_files": 50_000,
+	},
+}
+
+# Endpoint cases: name -> (route, extra query parameters); every request also
+# carries path=<repo>
+API_CASES = {
+	"GET /api/bootstrap": ("/api/bootstrap", {}),
+	"GET /api/repo": ("/api/repo", {}),
+	"GET /api/commits": ("/api/commits", {}),
+	"GET /api/commits?stream": ("/api/commits", {"stream": "true"}),
+	"GET /api/commits?format=columnar": ("/api/commits", {"format": "columnar"}),
+	"GET /api/commits?pathspec": ("/api/commits", {"pathspec": "dir_03"}),
+	"GET /api/tree": ("/api/tree", {}),
+	"GET /api/tree?format=columnar": ("/api/tree", {"format": "columnar"}),
+	"GET /api/tree/deltas": ("/api/tree/deltas", {}),
+	"GET /api/clusters": ("/api/clusters", {}),
+	"GET /api/cochange": ("/api/cochange", {}),
+	"GET /api/layout": ("/api/layout", {}),
+	"GET /api/activity": ("/api/activity", {}),
+	"GET /api/hotspots": ("/api/hotspots", {"metric": "ownership", "limit": 5000}),
+	"GET /api/activity?author": ("/api/activity", {"author": "author number 7"}),
+	"GET /api/multi": ("/api/multi", {}),
+	"GET /api/pool": ("/api/pool", {}),
+	"GET /api/cache": ("/api/cache", {}),
+	"GET /api/handles": ("/api/handles", {}),
+	"GET /api/watcher": ("/api/watcher", {}),
+	"GET /metrics": ("/metrics", {}),
+}
+# Event streams never complete, so there is nothing to time
+UNTIMED_ROUTES = {"/api/events", "/api/stream"}
+
+# Time and memory differences below these are noise, not regressions
+MIN_SECONDS = 0.005
+MIN_RSS_MB = 5.0
+
+
+def _git_ops_cases(repo: str, head: str, older: str) -> dict[str, Callable[[], object]]:
+	from git_viz import git_ops
+
+	return {
+		"sync_index": lambda: git_ops.sync_index(repo),
+		"get_repo_metadata": lambda: git_ops.get_repo_metadata(repo),
+		"get_repo_summary": lambda: git_ops.get_repo_summary(repo),
+		"get_bootstrap": lambda: git_ops.get_bootstrap(repo),
+		"get_snapshot": lambda: git_ops.get_snapshot(repo),
+		"get_update": lambda: git_ops.get_update(repo, older, head),
+		"load_commits": lambda: git_ops.load_commits(repo),
+		"get_commits": lambda: git_ops.get_commits(repo),
+		"get_commits_json": lambda: git_ops.get_commits_json(repo),
+		"get_commits_json[pathspec]": lambda: git_ops.get_commits_json(repo, pathspec="dir_03"),
+		"get_commits_columnar": lambda: git_ops.get_commits_columnar(repo),
+		"iter_commits": lambda: sum(1 for _ in git_ops.iter_commits(repo)),
+		"get_tree": lambda: git_ops.get_tree(repo),
+		"get_tree[older]": lambda: git_ops.get_tree(repo, older),
+		"get_tree_columnar": lambda: git_ops.get_tree_columnar(repo),
+		"get_tree_deltas": lambda: git_ops.get_tree_deltas(repo),
+		"get_clusters": lambda: git_ops.get_clusters(repo),
+		"get_clusters[expand]": lambda: git_ops.get_clusters(repo, expand=("dir_03",)),
+		"get_activity": lambda: git_ops.get_activity(repo),
+		"get_activity[pathspec]": lambda: git_ops.get_activity(repo, pathspec="dir_03"),
+		"get_hotspots": lambda: git_ops.get_hotspots(repo),
+		"get_hotspots[pathspec]": lambda: git_ops.get_hotspots(repo, pathspec="dir_03"),
+		"get_cochange": lambda: git_ops.get_cochange(repo),
+		"get_layout": lambda: git_ops.get_layout(repo),
+	}
+
+
+def _api_case(repo: str, route: str, params: dict) -> Callable[[], object]:
+	from fastapi.testclient import TestClient
+
+	from git_viz.app import app
+
+	client = TestClient(app)
+
+	def request() -> int:
+		resp = client.get(route, params={"path": repo, **params})
+		assert resp.status_code == 200, (route, resp.status_code, resp.text[:200])
+		return len(resp.content)
+
+	return request
+
+
+def _peak_rss_mb() -> float:
+	"""This process's peak resident set size."""
+	# ru_maxrss survives exec on Linux, so a fresh interpreter would start out with
+	# the parent's peak; VmHWM belongs to the new address space
+	try:
+		with open("/proc/self/status") as status:
+			for line in status:
+				if line.startswith("VmHWM:"):
+					return int(line.split()[1]) / 1024
+	except OSError:
+		pass
+	# ru_maxrss is in kilobytes on Linux and bytes on macOS
+	scale = 1 << 20 if sys.platform == "darwin" else 1 << 10
+	return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _run_case(case: str, ctx: dict, repeat: int) -> dict:
+	"""Time one case in this (fresh) interpreter."""
+	os.environ["GIT_VIZ_CACHE_DIR"] = ctx["cache_dir"]
+	os.environ["GIT_VIZ_WATCH"] = "0"
+	from git_viz import git_ops
+
+	if case in API_CASES:
+		fn = _api_case(ctx["repo"], *API_CASES[case])
+	else:
+		fn = _git_ops_cases(ctx["repo"], ctx["head"], ctx["older"])[case]
+
+	def spawned() -> int:
+		stats = git_ops.repos.stats()
+		return stats["processes_spawned"] + stats["persistent_processes_spawned"]
+
+	rss_before = _peak_rss_mb()
+	processes = spawned()
+	start = time.perf_counter()
+	fn()
+	first = time.perf_counter() - start
+	first_processes = spawned() - processes
+	repeats = []
+	for _ in range(repeat):
+		start = time.perf_counter()
+		fn()
+		repeats.append(time.perf_counter() - start)
+	peak = _peak_rss_mb()
+	return {
+		"first_s": round(first, 6),
+		"repeat_s": round(statistics.median(repeats), 6) if repeats else None,
+		"peak_rss_mb": round(peak, 1),
+		"rss_growth_mb": round(peak - rss_before, 1),
+		"git_processes": first_processes,
+		"git_processes_total": spawned() - processes,
+	}
+
+
+def _forget_trees(cache_dir: str) -> None:
+	"""Empty the history indexes' tree caches, keeping the ingested commits."""
+	for db_path in Path(cache_dir).glob("*.sqlite3"):
+		with closing(sqlite3.connect(db_path)) as conn, conn:
+			conn.execute("DELETE FROM tree_files")
+			conn.execute("DELETE FROM trees")
+
+
+def _in_fresh_process(case: str, ctx: dict, repeat: int) -> dict:
+	"""Run ``case`` in a new interpreter (this script with ``--run-case``)."""
+	_forget_trees(ctx["cache_dir"])
+	try:
+		proc = subprocess.run(
+			[sys.executable, __file__, "--run-case", case, "--context", json.dumps(ctx)]
+			+ ["--repeat", str(repeat)],
+			check=False,
+			capture_output=True,
+			text=True,
+			env={**os.environ, "PYTHONWARNINGS": "ignore::DeprecationWarning"},
+			timeout=ctx["timeout"],
+		)
+	except subprocess.TimeoutExpired:
+		return {"error": f"timed out after {ctx['timeout']}s"}
+	if proc.returncode != 0:
+		return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"}
+	return json.loads(proc.stdout)
+
+
+def _uncovered() -> list[str]:
+	"""Public ``git_ops`` functions and API routes the suite has no case for."""
+	os.environ.setdefault("GIT_VIZ_WATCH", "0")
+	from git_viz import git_ops
+	from git_viz.app import app
+
+	functions = {
+		name
+		for name, value in vars(git_ops).items()
+		if callable(value)
+		and not name.startswith("_")
+		and getattr(value, "__module__", None) == git_ops.__name__
+	}
+	covered = {name.split("[")[0] for name in _git_ops_cases("", "", "")}
+	routes = {route.path for route in app.routes if route.path.startswith("/api")}
+	timed = {route for route, _ in API_CASES.values()}
+	return sorted(functions - covered) + sorted(routes - timed - UNTIMED_ROUTES)
+
+
+def _git(repo: Path, *args: str) -> str:
+	return subprocess.run(
+		["git", "-C", str(repo), *args], capture_output=True, text=True, check=True
+	).stdout.strip()
+
+
+def run_profile(
+	name: str, workdir: Path, repeat: int, only: set[str] | None, timeout: float
+) -> dict:
+	options = PROFILES[name]
+	repo_dir = workdir / f"suite-{name}"
+	start = time.perf_counter()
+	reused = (repo_dir / ".git" / "synth-ok").exists()
+	repo = make_repo(repo_dir, **options)
+	generate = time.perf_counter() - start
+
+	cache_dir = workdir / f"suite-{name}-cache"
+	shutil.rmtree(cache_dir, ignore_errors=True)
+	ctx = {
+		"repo": str(repo),
+		"cache_dir": str(cache_dir),
+		"head": _git(repo, "rev-parse", "HEAD"),
+		"older": _git(repo, "rev-parse", "HEAD~50"),
+		"timeout": timeout,
+	}
+	# The first case ingests the whole history into an empty index
+	ingest = _in_fresh_process("sync_index", ctx, 0)
+	if "error" in ingest:
+		raise RuntimeError(f"Indexing {repo} failed: {ingest['error']}")
+	print(
+		f"\n{name}: {options['commits']} commits, {options['files']} files"
+		f" ({'reused' if reused else f'generated in {generate:.1f}s'},"
+		f" indexed in {ingest['first_s']:.2f}s)"
+	)
+	print(f"{'case':<36} {'first':>9} {'repeat':>9} {'RSS +MB':>8} {'git procs':>9}")
+
+	cases = {}
+	names = [*_git_ops_cases("", "", ""), *API_CASES]
+	for case in names:
+		if only and case not in only:
+			continue
+		result = _in_fresh_process(case, ctx, repeat)
+		cases[case] = result
+		if "error" in result:
+			print(f"{case:<36} failed: {result['error']}")
+			continue
+		repeat_s = "" if result["repeat_s"] is None else f"{result['repeat_s'] * 1000:7.1f}ms"
+		print(
+			f"{case:<36} {result['first_s'] * 1000:7.1f}ms {repeat_s:>9}"
+			f" {result['rss_growth_mb']:8.1f} {result['git_processes']:>9}"
+		)
+	return {
+		"repo": {**options, "reused": reused, "generate_s": round(generate, 3)},
+		"ingest": ingest,
+		"cases": cases,
+	}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+	"""Human-readable regressions of ``results`` against ``baseline``."""
+	regressions = []
+	for profile, current in results["profiles"].items():
+		previous = baseline.get("profiles", {}).get(profile)
+		if previous is None:
+			continue
+		pairs = [("ingest", current["ingest"], previous["ingest"])]
+		pairs += [
+			(case, result, previous["cases"][case])
+			for case, result in current["cases"].items()
+			if case in previous["cases"]
+		]
+		for case, now, then in pairs:
+			if "error" in now or "error" in then:
+				if "error" in now and "error" not in then:
+					regressions.append(f"{profile} {case} failed: {now['error']}")
+				continue
+			for key, floor in (
+				("first_s", MIN_SECONDS),
+				("repeat_s", MIN_SECONDS),
+				("rss_growth_mb", MIN_RSS_MB),
+			):
+				if now.get(key) is None or then.get(key) is None:
+					continue
+				if now[key] > max(then[key], floor) * tolerance:
+					regressions.append(f"{profile} {case} {key}: {then[key]} -> {now[key]}")
+			if now["git_processes"] > then["git_processes"]:
+				regressions.append(
+					f"{profile} {case} git_processes: {then['git_processes']} -> {now['git_processes']}"
+				)
+	return regressions
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(
+		description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+	)
+	parser.add_argument(
+		"--profiles", default="smoke", help=f"comma-separated: {', '.join(PROFILES)}"
+	)
+	parser.add_argument("--cases", default=None, help="comma-separated case names (default: all)")
+	parser.add_argument("--repeat", type=int, default=3)
+	parser.add_argument("--workdir", default=None)
+	parser.add_argument("--output", default=None, help="write results JSON here")
+	parser.add_argument("--baseline", default=None, help="results JSON to compare against")
+	parser.add_argument("--tolerance", type=float, default=1.25)
+	parser.add_argument("--timeout", type=float, default=600, help="seconds allowed per case")
+	# Internal: time one case in this process and print its result as JSON
+	parser.add_argument("--run-case", help=argparse.SUPPRESS)
+	parser.add_argument("--context", help=argparse.SUPPRESS)
+	args = parser.parse_args()
+	if args.run_case:
+		print(json.dumps(_run_case(args.run_case, json.loads(args.context), args.repeat)))
+		return
+
+	profiles = args.profiles.split(",")
+	unknown = set(profiles) - set(PROFILES)
+	if unknown:
+		parser.error(f"unknown profiles: {', '.join(sorted(unknown))}")
+	uncovered = _uncovered()
+	if uncovered:
+		print(f"warning: no benchmark case for {', '.join(uncovered)}")
+
+	only = set(args.cases.split(",")) if args.cases else None
+	if only:
+		unknown = only - {*_git_ops_cases("", "", ""), *API_CASES}
+		if unknown:
+			parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+
+	workdir = Path(args.workdir or tempfile.mkdtemp(prefix="git-viz-bench-"))
+	results = {
+		"version": RESULTS_VERSION,
+		"created": datetime.now(UTC).isoformat(timespec="seconds"),
+		"machine": {
+			"python": platform.python_version(),
+			"platform": platform.platform(),
+			"cpus": os.cpu_count(),
+			"git": subprocess.run(
+				["git", "--version"], capture_output=True, text=True, check=True
+			).stdout.strip(),
+		},
+		"repeat": args.repeat,
+		"profiles": {
+			name: run_profile(name, workdir, args.repeat, only, args.timeout) for name in profiles
+		},
+	}
+
+	if args.output:
+		Path(args.output).write_text(json.dumps(results, indent=1) + "\n")
+		print(f"\nresults written to {args.output}")
+	if args.baseline:
+		regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+		print(
+			f"\n{len(regressions)} regressions against {args.baseline} (tolerance {args.tolerance}x)"
+		)
+		for line in regressions:
+			print(f"  {line}")
+		if regressions:
+			sys.exit(1)
+
+
+if __name__ == "__main__":
+	main()
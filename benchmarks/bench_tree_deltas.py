@@ -0,0 +1,56 @@
+"""Compare get_tree for every timeline commit with one get_tree_deltas call.
+
+Usage: python benchmarks/bench_tree_deltas.py [--files 50000] [--commits 200]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from synth import make_repo
+
+from git_viz.git_ops import get_commits, get_tree, get_tree_deltas
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument("--files", type=int, default=50_000)
+	parser.add_argument("--commits", type=int, default=200)
+	parser.add_argument("--workdir", default=None)
+	args = parser.parse_args()
+
+	workdir = Path(args.workdir or tempfile.mkdtemp(prefix="git-viz-bench-"))
+	repo = make_repo(
+		workdir / f"wide-{args.files}-{args.commits}",
+		commits=args.commits,
+		files=args.files,
+		initial_files=args.files,
+		files_per_commit=20,
+	)
+	shas = [c["hash"] for c in get_commits(repo, limit=args.commits)][::-1]
+
+	start = time.perf_counter()
+	full = [get_tree(repo, commit=sha)["files"] for sha in shas]
+	per_commit_s = time.perf_counter() - start
+
+	start = time.perf_counter()
+	result = get_tree_deltas(repo, limit=args.commits)
+	deltas_s = time.perf_counter() - start
+
+	# Replaying the deltas must reproduce every per-commit tree exactly
+	files = dict(result["files"])
+	for expected, delta in zip(full[1:], result["deltas"]):
+		for p in delta["removed"]:
+			del files[p]
+		files.update(delta["added"])
+		files.update({p: sizes[1] for p, sizes in delta["resized"].items()})
+		assert files == {p: info["size"] for p, info in expected.items()}
+
+	print(f"{len(shas)} commits, {len(full[-1])} files in HEAD's tree")
+	print(f"get_tree per commit: {per_commit_s:8.2f}s")
+	print(f"get_tree_deltas:     {deltas_s:8.2f}s  ({per_commit_s / deltas_s:.0f}x)")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,54 @@
+// Time decoding commit and tree payloads written by bench_wire_format.py, as JSON
+// the way index.html handles it and with index.html's columnar decoder.
+//
+// Usage: node benchmarks/bench_wire_format.mjs <payload directory>
+
+import { readFileSync } from "node:fs";
+import { join } from "node:path";
+
+const INDEX_HTML = new URL("../src/git_viz/index.html", import.meta.url);
+
+export function loadDecoder() {
+	const html = readFileSync(INDEX_HTML, "utf8");
+	const start = html.indexOf("// --- columnar decoder ---");
+	const end = html.indexOf("// --- end columnar decoder ---");
+	if (start < 0 || end < 0) throw new Error("columnar decoder markers not found in index.html");
+	return new Function(`${html.slice(start, end)}\nreturn { decodeColumnar, columnarCommits };`)();
+}
+
+function best(fn, repeat = 7) {
+	let min = Infinity;
+	for (let i = 0; i < repeat; i++) {
+		const start = performance.now();
+		fn();
+		min = Math.min(min, performance.now() - start);
+	}
+	return min;
+}
+
+function main(dir) {
+	const { decodeColumnar, columnarCommits } = loadDecoder();
+	const text = name => readFileSync(join(dir, name), "utf8");
+	const buffer = name => {
+		const bytes = readFileSync(join(dir, name));
+		return bytes.buffer.slice(bytes.byteOffset, bytes.byteOffset + bytes.byteLength);
+	};
+	const commitsJson = text("commits.json"), treeJson = text("tree.json");
+	const commitsColumnar = buffer("commits.columnar"), treeColumnar = buffer("tree.columnar");
+
+	const rows = [
+		["commits json     JSON.parse", best(() => JSON.parse(commitsJson))],
+		["commits columnar typed arrays", best(() => decodeColumnar(commitsColumnar))],
+		["commits columnar + objects", best(() => columnarCommits(decodeColumnar(commitsColumnar)))],
+		["tree json        parse + entries", best(() => Object.entries(JSON.parse(treeJson).files).map(
+			([path, info]) => ({ path, type: info.type, size: info.size })))],
+		["tree columnar    typed arrays", best(() => decodeColumnar(treeColumnar))],
+		["tree columnar    + objects", best(() => {
+			const { paths, columns } = decodeColumnar(treeColumnar);
+			return paths.map((path, i) => ({ path, type: "file", size: columns.size[i] }));
+		})],
+	];
+	for (const [label, ms] of rows) console.log(`${label.padEnd(34)}${ms.toFixed(1).padStart(8)} ms`);
+}
+
+if (import.meta.url === `file://${process.argv[1]}`) main(process.argv[2]);
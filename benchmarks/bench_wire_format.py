@@ -0,0 +1,88 @@
+"""Compare /api/commits and /api/tree payloads as JSON and as the columnar format.
+
+Sizes are reported raw and gzipped. Payloads are written to the work directory and,
+when Node is installed, bench_wire_format.mjs times decoding them with the same
+code index.html uses.
+
+Usage: python benchmarks/bench_wire_format.py [--commits 20000] [--tree-files 100000]
+"""
+
+import argparse
+import gzip
+import json
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from git_viz.columnar import encode_commits, encode_tree
+from git_viz.commit_store import CommitStore
+from git_viz.git_ops import _commits_json
+from synth import synthetic_records
+
+
+def tree_sizes(files: int, seed: int = 0) -> dict[str, int]:
+	rng = random.Random(seed)
+	return {
+		f"src/module_{i % 40:02d}/pkg_{i % 9}/file_{i}.py": int(rng.lognormvariate(8, 1.5))
+		for i in range(files)
+	}
+
+
+def timed(fn):
+	start = time.perf_counter()
+	result = fn()
+	return result, (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument("--commits", type=int, default=20_000)
+	parser.add_argument("--tree-files", type=int, default=100_000)
+	parser.add_argument("--workdir", default=None)
+	args = parser.parse_args()
+	workdir = Path(args.workdir or tempfile.mkdtemp(prefix="git-viz-bench-"))
+	workdir.mkdir(parents=True, exist_ok=True)
+
+	store = CommitStore(synthetic_records(args.commits))
+	sizes = tree_sizes(args.tree_files)
+	tree_json = {
+		"commit": "0" * 40,
+		"files": {p: {"type": "file", "size": n} for p, n in sizes.items()},
+	}
+	payloads = {
+		"commits": (
+			timed(lambda: _commits_json(store)),
+			timed(lambda: encode_commits(store)),
+		),
+		"tree": (
+			timed(
+				lambda: json.dumps(tree_json, ensure_ascii=False, separators=(",", ":")).encode()
+			),
+			timed(lambda: encode_tree("0" * 40, sizes)),
+		),
+	}
+
+	kib = 1024
+	print(f"{args.commits} commits, {args.tree_files} tree files")
+	print(f"{'payload':<18}{'raw KiB':>10}{'gzip KiB':>10}{'encode ms':>11}")
+	for kind, ((as_json, json_ms), (as_columns, columns_ms)) in payloads.items():
+		for label, body, ms in (("json", as_json, json_ms), ("columnar", as_columns, columns_ms)):
+			packed = len(gzip.compress(body, compresslevel=6))
+			print(
+				f"{kind + ' ' + label:<18}{len(body) / kib:>10.0f}{packed / kib:>10.0f}{ms:>11.1f}"
+			)
+		(workdir / f"{kind}.json").write_bytes(as_json)
+		(workdir / f"{kind}.columnar").write_bytes(as_columns)
+
+	if shutil.which("node") is None:
+		print(f"node is not installed; payloads left in {workdir}")
+		return
+	script = Path(__file__).resolve().parent / "bench_wire_format.mjs"
+	subprocess.run(["node", str(script), str(workdir)], check=True)
+
+
+if __name__ == "__main__":
+	main()
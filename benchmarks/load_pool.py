@@ -0,0 +1,92 @@
+"""Latency of cheap endpoints while heavy git requests are in flight.
+
+Fires ``--heavy`` concurrent ``/api/tree`` requests for distinct commits of a
+synthetic repo and meanwhile samples ``GET /`` and ``GET /api/pool``. Run once
+with the worker pool and once with ``--inline`` (git work on the event loop, the
+old behaviour) to compare p50/p99.
+
+Usage: python benchmarks/load_pool.py [--commits 3000] [--heavy 32] [--inline]
+"""
+
+import argparse
+import asyncio
+import importlib
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import git
+import httpx
+from synth import make_repo
+
+app_module = importlib.import_module("git_viz.app")
+
+
+async def _inline_run(repo_key, fn, *args, request=None):
+	return fn(*args)
+
+
+async def _sample(client: httpx.AsyncClient, url: str, stop: asyncio.Event) -> list[float]:
+	latencies = []
+	while not stop.is_set():
+		start = time.perf_counter()
+		await client.get(url)
+		latencies.append(time.perf_counter() - start)
+		await asyncio.sleep(0.01)
+	return latencies
+
+
+def _pct(values: list[float], q: int) -> float:
+	if len(values) < 2:
+		return values[0] if values else float("nan")
+	return statistics.quantiles(values, n=100)[q - 1]
+
+
+async def run(repo: Path, heavy: int) -> None:
+	shas = [c.hexsha for c in git.Repo(repo).iter_commits(max_count=heavy)]
+	transport = httpx.ASGITransport(app=app_module.app)
+	async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+		baseline = await _sample_for(client, 1.0)
+		stop = asyncio.Event()
+		samplers = [asyncio.create_task(_sample(client, u, stop)) for u in ("/", "/api/pool")]
+		start = time.perf_counter()
+		await asyncio.gather(
+			*(client.get("/api/tree", params={"path": str(repo), "commit": s}) for s in shas)
+		)
+		heavy_s = time.perf_counter() - start
+		stop.set()
+		loaded = [x for task in samplers for x in await task]
+
+	print(f"heavy requests: {len(shas)} in {heavy_s:.2f}s")
+	print(f"{'':>10} {'n':>6} {'p50 ms':>8} {'p99 ms':>8}")
+	for label, values in (("idle", baseline), ("loaded", loaded)):
+		p50, p99 = _pct(values, 50) * 1000, _pct(values, 99) * 1000
+		print(f"{label:>10} {len(values):>6} {p50:>8.1f} {p99:>8.1f}")
+
+
+async def _sample_for(client: httpx.AsyncClient, seconds: float) -> list[float]:
+	stop = asyncio.Event()
+	task = asyncio.create_task(_sample(client, "/", stop))
+	await asyncio.sleep(seconds)
+	stop.set()
+	return await task
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument("--commits", type=int, default=3000)
+	parser.add_argument("--heavy", type=int, default=32)
+	parser.add_argument("--inline", action="store_true", help="run git work on the event loop")
+	parser.add_argument("--workdir", default=None)
+	args = parser.parse_args()
+
+	workdir = Path(args.workdir or tempfile.mkdtemp(prefix="git-viz-bench-"))
+	repo = make_repo(workdir / f"linear-{args.commits}", commits=args.commits)
+	if args.inline:
+		app_module.pool.run = _inline_run
+	asyncio.run(run(repo, args.heavy))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,207 @@
+"""Deterministic synthetic repositories for benchmarks, built with git fast-import."""
+
+import random
+import subprocess
+from pathlib import Path
+
+AUTHORS = [("Alice Dev", "alice@example.com"), ("Bob Engineer", "bob@example.com")]
+EXTENSIONS = [".py", ".js", ".md", ".txt", ".json", ".css", ".html"]
+EPOCH = 1_600_000_000
+
+
+def _data(payload: bytes) -> bytes:
+	return b"data %d\n%s\n" % (len(payload), payload)
+
+
+def _people(authors: int) -> list[tuple[str, str]]:
+	return AUTHORS[:authors] + [
+		(f"Author Number {i}", f"author{i}@example.com") for i in range(len(AUTHORS), authors)
+	]
+
+
+def _commit(
+	mark: int,
+	ref: str,
+	person: tuple[str, str],
+	when: int,
+	message: bytes,
+	parent: int | None,
+	changes: list[bytes],
+	merge: int | None = None,
+) -> bytes:
+	name, email = (part.encode() for part in person)
+	out = [b"commit %s\n" % ref.encode(), b"mark :%d\n" % mark]
+	out.append(b"author %s <%s> %d +0000\n" % (name, email, when))
+	out.append(b"committer %s <%s> %d +0000\n" % (name, email, when))
+	out.append(_data(message))
+	if parent is not None:
+		out.append(b"from :%d\n" % parent)
+	if merge is not None:
+		out.append(b"merge :%d\n" % merge)
+	out.extend(changes)
+	return b"".join(out)
+
+
+def _modify(path: str, payload: bytes) -> bytes:
+	return b"M 100644 inline %s\n" % path.encode() + _data(payload)
+
+
+def _stream(
+	commits: int,
+	files: int,
+	files_per_commit: int,
+	initial_files: int,
+	seed: int,
+	authors: int = 2,
+	merge_every: int = 0,
+	rename_every: int = 0,
+	fanout_every: int = 0,
+	fanout_files: int = 1000,
+):
+	rng = random.Random(seed)
+	# Merges, renames, fan-out and extra authors draw from their own generator, so
+	# repositories without them come out exactly as they always have
+	extra = random.Random(seed ^ 0x5EED)
+	people = _people(authors)
+	paths = [
+		f"dir_{i % 50:02d}/sub_{i % 7}/file_{i}{EXTENSIONS[i % len(EXTENSIONS)]}"
+		for i in range(files)
+	]
+	present: set[str] = set()
+	side_mark = commits
+	for n in range(1, commits + 1):
+		if authors <= len(AUTHORS):
+			person = people[n % len(people)]
+		else:
+			# Pareto-distributed: a few prolific authors and a long tail
+			person = people[int(extra.paretovariate(1.2)) % authors]
+		when = EPOCH + n * 600
+		touched = paths[:initial_files] if n == 1 and initial_files else []
+		touched += rng.sample(paths, min(files_per_commit, files))
+		changes = []
+		for path in dict.fromkeys(touched):
+			lines = b"".join(b"line %d of %d\n" % (i, n) for i in range(rng.randint(1, 40)))
+			changes.append(_modify(path, lines))
+			present.add(path)
+
+		if fanout_every and n % fanout_every == 0:
+			for path in extra.sample(paths, min(fanout_files, files)):
+				changes.append(_modify(path, b"sweep %d\n" % n))
+				present.add(path)
+
+		if rename_every and n % rename_every == 0 and present:
+			index = extra.randrange(files)
+			old = paths[index]
+			if old in present and old not in touched:
+				directory, name = old.rsplit("/", 1)
+				paths[index] = f"{directory}/renamed_{n}_{name.split('_', 1)[-1]}"
+				changes.append(b"R %s %s\n" % (old.encode(), paths[index].encode()))
+				present.discard(old)
+				present.add(paths[index])
+
+		merge = None
+		if merge_every and n > 2 and n % merge_every == 0:
+			# A one-commit side branch forked two commits back, merged by this commit.
+			# fast-import takes the merge's tree from its first parent, so the side
+			# branch's change is repeated here
+			side_mark += 1
+			merge = side_mark
+			side_path = paths[extra.randrange(files)]
+			side_change = _modify(side_path, b"side work %d\n" % n)
+			yield _commit(
+				side_mark,
+				"refs/heads/side",
+				people[extra.randrange(len(people))],
+				when - 300,
+				b"Side work %d" % n,
+				n - 2,
+				[side_change],
+			)
+			changes.append(side_change)
+			present.add(side_path)
+
+		message = b"Merge side work %d" % n if merge else b"Commit %d" % n
+		yield _commit(
+			n, "refs/heads/main", person, when, message, n - 1 if n > 1 else None, changes, merge
+		)
+
+
+def make_repo(
+	path: Path,
+	*,
+	commits: int,
+	files: int = 2000,
+	files_per_commit: int = 4,
+	initial_files: int = 0,
+	seed: int = 0,
+	authors: int = 2,
+	merge_every: int = 0,
+	rename_every: int = 0,
+	fanout_every: int = 0,
+	fanout_files: int = 1000,
+) -> Path:
+	"""Create (or reuse) a repo at ``path`` with a history of ``commits`` commits on main.
+
+	``initial_files`` paths are all added by the first commit, for large trees.
+	Beyond the default two alternating authors, ``authors`` are Pareto-distributed.
+	Every ``merge_every``-th commit merges a one-commit side branch, every
+	``rename_every``-th renames a file and every ``fanout_every``-th touches
+	``fanout_files`` files at once.
+	"""
+	path = Path(path)
+	marker = path / ".git" / "synth-ok"
+	if marker.exists():
+		return path
+	path.mkdir(parents=True, exist_ok=True)
+	subprocess.run(["git", "init", "-q", "-b", "main", str(path)], check=True)
+	proc = subprocess.Popen(
+		["git", "-C", str(path), "fast-import", "--quiet"], stdin=subprocess.PIPE
+	)
+	stream = _stream(
+		commits,
+		files,
+		files_per_commit,
+		initial_files,
+		seed,
+		authors,
+		merge_every,
+		rename_every,
+		fanout_every,
+		fanout_files,
+	)
+	for chunk in stream:
+		proc.stdin.write(chunk)
+	proc.stdin.close()
+	if proc.wait() != 0:
+		raise RuntimeError("git fast-import failed")
+	subprocess.run(["git", "-C", str(path), "checkout", "-q", "main"], check=True)
+	marker.touch()
+	return path
+
+
+def synthetic_records(commits: int, paths: int = 5000, authors: int = 300, seed: int = 0):
+	"""Commit records shaped like the history index's, without any git repository.
+
+	Authors are Pareto-distributed and each commit touches a few paths from a
+	shared pool, so author and path strings repeat the way they do in real history.
+	"""
+	rng = random.Random(seed)
+	pool = [f"src/module_{i % 40:02d}/pkg_{i % 9}/file_{i}.py" for i in range(paths)]
+	for i in range(commits):
+		author = int(rng.paretovariate(1.2)) % authors
+		yield {
+			"hash": f"{rng.getrandbits(160):040x}",
+			"parents": [],
+			"author": f"Author Number {author}",
+			"email": f"author{author}@example.com",
+			"timestamp": 1_400_000_000 + i * 600,
+			"message": f"Change {i}: adjust behaviour of module {i % 40}",
+			"files": [
+				{
+					"path": rng.choice(pool),
+					"insertions": rng.randrange(200),
+					"deletions": rng.randrange(80),
+				}
+				for _ in range(1 + int(rng.expovariate(0.3)))
+			],
+		}
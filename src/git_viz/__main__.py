@@ -0,0 +1,3 @@
+from git_viz.cli import main
+
+raise SystemExit(main())
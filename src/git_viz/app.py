@@ -1,15 +1,40 @@
+import asyncio
+import contextlib
+import gzip
+import itertools
+import json
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable, Iterator
 from pathlib import Path
+from typing import Annotated, Any
 
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 
-from . import git_ops
+from . import columnar, git_ops, metrics, multi_repo
+from .cache import HeadResolver, ResultCache
+from .watcher import WATCH_ENV, ChangeFeed, RefWatcher
+from .workers import ClientDisconnectedError, GitWorkerPool, ProcessWorkerPool
 
 app = FastAPI(title="git-viz")
+app.add_middleware(metrics.MetricsMiddleware)
 
 HTML_PATH = Path(__file__).resolve().parent / "index.html"
 DEFAULT_REPO_PATH = Path(__file__).resolve().parent.parent.parent
 
+pool = GitWorkerPool.from_env()
+processes = ProcessWorkerPool.from_env()
+cache = ResultCache.from_env()
+heads = HeadResolver()
+changes = ChangeFeed()
+
+# Results served most recently per repository, recomputed when its HEAD moves
+RECENT_PER_REPO = 16
+_recent_lock = threading.Lock()
+_recent: dict[str, OrderedDict[tuple[str, tuple], Callable[..., Any]]] = {}
+
 
 @app.get("/")
 async def index():
@@ -27,37 +52,531 @@ def _resolve_repo_path(path: str | None) -> Path:
 	return resolved
 
 
-@app.get("/api/repo")
-async def get_repo(path: str | None = Query(default=None)):
-	repo_path = _resolve_repo_path(path)
+def _gzipped(fn: Callable[..., bytes]) -> Callable[..., bytes]:
+	def run(*args: Any) -> bytes:
+		body = fn(*args)
+		with metrics.phase("compress"):
+			return gzip.compress(body, compresslevel=6, mtime=0)
+
+	return run
+
+
+def _encode(result: Any) -> bytes:
+	# Functions may hand back JSON they have already encoded
+	if isinstance(result, bytes):
+		return result
+	with metrics.phase("encode"):
+		return JSONResponse(result).body
+
+
+def _remember(repo_path: Path, endpoint: str, fn: Callable[..., Any], args: tuple) -> None:
+	with _recent_lock:
+		recent = _recent.setdefault(str(repo_path), OrderedDict())
+		recent[(endpoint, args)] = fn
+		recent.move_to_end((endpoint, args))
+		while len(recent) > RECENT_PER_REPO:
+			recent.popitem(last=False)
+
+
+async def _rewarm(
+	repo_path: Path, head: str | None, recent: list[tuple[tuple[str, tuple], Callable[..., Any]]]
+) -> int:
+	"""Recompute ``recent`` results for ``head`` on the worker pool; returns how many were cached."""
+
+	async def warm(endpoint: str, args: tuple, fn: Callable[..., Any]) -> None:
+		body = _encode(await pool.run(str(repo_path), fn, repo_path, *args))
+		cache.put(str(repo_path), head, endpoint, args, body)
+
+	results = await asyncio.gather(
+		*(warm(endpoint, args, fn) for (endpoint, args), fn in recent), return_exceptions=True
+	)
+	warmed = 0
+	for result in results:
+		# e.g. a pagination cursor that is no longer in history, or a job past the timeout
+		if isinstance(result, (ValueError, TimeoutError)):
+			continue
+		if isinstance(result, BaseException):
+			raise result
+		warmed += 1
+	return warmed
+
+
+def _refresh(repo_path: Path, previous: str | None, head: str | None) -> None:
+	"""Watcher callback: ingest new commits, re-warm recent results, then tell open pages.
+
+	The re-warm runs on the event loop serving requests, so its jobs wait for the
+	same worker and per-repo slots as requests do and give up after the same
+	timeout; one slow result can't hold up the watcher for every other repo.
+	"""
+	warmed = 0
 	try:
-		return git_ops.get_repo_metadata(repo_path)
+		git_ops.sync_index(repo_path)
+		with _recent_lock:
+			recent = list(_recent.get(str(repo_path), {}).items())
+		loop = _loop
+		if loop is not None and loop.is_running():
+			future = asyncio.run_coroutine_threadsafe(_rewarm(repo_path, head, recent), loop)
+			warmed = future.result()
+		else:
+			# Nothing is serving requests; the watcher thread has no loop of its own
+			warmed = asyncio.run(_rewarm(repo_path, head, recent))
+	finally:
+		changes.publish(
+			{"repo": str(repo_path), "previous": previous, "head": head, "warmed": warmed}
+		)
+
+
+watcher = RefWatcher.from_env(_refresh) if os.environ.get(WATCH_ENV, "1") != "0" else None
+# The loop that last asked to watch a repo, where re-warms are sent
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _watch(repo_path: Path) -> None:
+	global _loop
+	if watcher is not None:
+		_loop = asyncio.get_running_loop()
+		watcher.watch(repo_path)
+
+
+async def _run_git(
+	request: Request,
+	repo_path: Path,
+	endpoint: str,
+	fn: Callable[..., Any],
+	*args: Any,
+	media_type: str = "application/json",
+	negotiated: bool = False,
+) -> Response:
+	headers = {}
+	if negotiated:
+		# The same URL answers JSON or columnar, so caches must key on both headers
+		headers["Vary"] = "Accept, Accept-Encoding"
+	if media_type == columnar.MEDIA_TYPE and "gzip" in request.headers.get("accept-encoding", ""):
+		# Compress on the worker, and cache the compressed bytes
+		fn, endpoint = _gzipped(fn), f"{endpoint}.gzip"
+		headers["Content-Encoding"] = "gzip"
+
+	body = await _cached_body(request, repo_path, heads.resolve(repo_path), endpoint, fn, *args)
+	_remember(repo_path, endpoint, fn, args)
+	_watch(repo_path)
+	return Response(body, media_type=media_type, headers=headers)
+
+
+async def _cached_body(
+	request: Request,
+	repo_path: Path,
+	head: str | None,
+	endpoint: str,
+	fn: Callable[..., Any],
+	*args: Any,
+) -> bytes:
+	"""``fn(repo_path, *args)`` encoded, from the cache for ``head`` or the worker pool."""
+
+	async def compute() -> bytes:
+		job = metrics.profiled(fn)
+		return _encode(await pool.run(str(repo_path), job, repo_path, *args, request=request))
+
+	try:
+		if metrics.profiling():
+			# A cached body would leave nothing to profile
+			body = await compute()
+		else:
+			body = await cache.get_or_compute(str(repo_path), head, endpoint, args, compute)
 	except ValueError as e:
 		raise HTTPException(status_code=400, detail=str(e))
+	except TimeoutError:
+		raise HTTPException(status_code=504, detail="Git operation timed out")
+	except ClientDisconnectedError:
+		# Nobody is listening any more; 499 is the conventional "client closed" status
+		raise HTTPException(status_code=499, detail="Client disconnected")
+	return body
+
+
+def _wants_columnar(request: Request, wire_format: str | None) -> bool:
+	"""``format=columnar``, or no ``format`` and an ``Accept`` naming the columnar type."""
+	if wire_format is not None:
+		return wire_format == "columnar"
+	return columnar.MEDIA_TYPE in request.headers.get("accept", "")
+
+
+@app.get("/api/bootstrap")
+async def get_bootstrap(
+	request: Request, path: str | None = Query(default=None), limit: int = Query(default=500)
+):
+	repo_path = _resolve_repo_path(path)
+	return await _run_git(request, repo_path, "bootstrap", git_ops.get_bootstrap, limit)
+
+
+@app.get("/api/repo")
+async def get_repo(request: Request, path: str | None = Query(default=None)):
+	repo_path = _resolve_repo_path(path)
+	return await _run_git(request, repo_path, "repo", git_ops.get_repo_metadata)
+
+
+def _ndjson(commits: Iterator[dict]) -> Iterator[bytes]:
+	for c in commits:
+		yield json.dumps(c, separators=(",", ":")).encode() + b"\n"
 
 
 @app.get("/api/commits")
-async def get_commits(path: str | None = Query(default=None), limit: int = Query(default=500)):
+async def get_commits(
+	request: Request,
+	path: str | None = Query(default=None),
+	limit: int = Query(default=500),
+	after: str | None = Query(default=None),
+	page_size: int | None = Query(default=None),
+	stream: bool = Query(default=False),
+	wire_format: str | None = Query(default=None, alias="format", pattern="^(json|columnar)$"),
+	author: str | None = Query(default=None),
+	pathspec: str | None = Query(default=None),
+	since: str | None = Query(default=None),
+	until: str | None = Query(default=None),
+):
 	repo_path = _resolve_repo_path(path)
-	try:
-		return git_ops.get_commits(repo_path, limit=limit)
-	except ValueError as e:
-		raise HTTPException(status_code=400, detail=str(e))
+	count = page_size or limit
+	filters = (author or None, pathspec or None, since, until)
+	if stream:
+		commits = git_ops.iter_commits(repo_path, count, after, *filters)
+		# Pull the first commit on the worker pool so bad cursors still get a 400;
+		# Starlette iterates the rest on its own threads, off the event loop
+		try:
+			first = await pool.run(str(repo_path), next, commits, None, request=request)
+		except ValueError as e:
+			raise HTTPException(status_code=400, detail=str(e))
+		head = [] if first is None else [first]
+		return StreamingResponse(
+			_ndjson(itertools.chain(head, commits)), media_type="application/x-ndjson"
+		)
+	if _wants_columnar(request, wire_format):
+		return await _run_git(
+			request,
+			repo_path,
+			"commits.columnar",
+			git_ops.get_commits_columnar,
+			count,
+			after,
+			*filters,
+			media_type=columnar.MEDIA_TYPE,
+			negotiated=True,
+		)
+	return await _run_git(
+		request,
+		repo_path,
+		"commits",
+		git_ops.get_commits_json,
+		count,
+		after,
+		*filters,
+		negotiated=True,
+	)
 
 
 @app.get("/api/tree")
-async def get_tree(path: str | None = Query(default=None), commit: str = Query(default="HEAD")):
+async def get_tree(
+	request: Request,
+	path: str | None = Query(default=None),
+	commit: str = Query(default="HEAD"),
+	wire_format: str | None = Query(default=None, alias="format", pattern="^(json|columnar)$"),
+	pathspec: str | None = Query(default=None),
+	until: str | None = Query(default=None),
+):
 	repo_path = _resolve_repo_path(path)
-	try:
-		return git_ops.get_tree(repo_path, commit=commit)
-	except ValueError as e:
-		raise HTTPException(status_code=400, detail=str(e))
+	commit = heads.resolve_rev(repo_path, commit)
+	if _wants_columnar(request, wire_format):
+		return await _run_git(
+			request,
+			repo_path,
+			"tree.columnar",
+			git_ops.get_tree_columnar,
+			commit,
+			pathspec or None,
+			until,
+			media_type=columnar.MEDIA_TYPE,
+			negotiated=True,
+		)
+	return await _run_git(
+		request,
+		repo_path,
+		"tree",
+		git_ops.get_tree,
+		commit,
+		pathspec or None,
+		until,
+		negotiated=True,
+	)
+
+
+@app.get("/api/clusters")
+async def get_clusters(
+	request: Request,
+	path: str | None = Query(default=None),
+	commit: str = Query(default="HEAD"),
+	limit: int = Query(default=500, ge=0),
+	expand: Annotated[list[str] | None, Query()] = None,
+	max_nodes: int = Query(default=git_ops.DEFAULT_MAX_NODES, ge=2, le=5000),
+):
+	"""Directory clusters of the tree, with the ``expand`` directories opened."""
+	repo_path = _resolve_repo_path(path)
+	commit = heads.resolve_rev(repo_path, commit)
+	# Sorted so that the same view is one cache entry whatever order it was opened in
+	opened = tuple(sorted({d.strip("/") for d in expand or ()} - {""}))
+	return await _run_git(
+		request, repo_path, "clusters", git_ops.get_clusters, commit, limit, opened, max_nodes
+	)
+
+
+@app.get("/api/tree/deltas")
+async def get_tree_deltas(
+	request: Request, path: str | None = Query(default=None), limit: int = Query(default=500)
+):
+	repo_path = _resolve_repo_path(path)
+	return await _run_git(request, repo_path, "tree_deltas", git_ops.get_tree_deltas, limit)
+
+
+@app.get("/api/cochange")
+async def get_cochange(
+	request: Request,
+	path: str | None = Query(default=None),
+	limit: int | None = Query(default=500),
+	since: str | None = Query(default=None),
+	until: str | None = Query(default=None),
+	max_files: int = Query(default=git_ops.DEFAULT_MAX_FILES, ge=2),
+	min_support: int = Query(default=git_ops.DEFAULT_MIN_SUPPORT, ge=1),
+	top_k: int = Query(default=git_ops.DEFAULT_TOP_K, ge=1),
+):
+	repo_path = _resolve_repo_path(path)
+	return await _run_git(
+		request,
+		repo_path,
+		"cochange",
+		git_ops.get_cochange,
+		limit,
+		since,
+		until,
+		max_files,
+		min_support,
+		top_k,
+	)
+
+
+@app.get("/api/layout")
+async def get_layout(
+	request: Request,
+	path: str | None = Query(default=None),
+	limit: int = Query(default=500),
+	keyframes: int = Query(default=20, ge=1, le=200),
+	path_filter: str | None = Query(default=None),
+	max_nodes: int = Query(default=git_ops.DEFAULT_LAYOUT_NODES, ge=2, le=5000),
+):
+	repo_path = _resolve_repo_path(path)
+	return await _run_git(
+		request,
+		repo_path,
+		"layout",
+		git_ops.get_layout,
+		limit,
+		keyframes,
+		path_filter or None,
+		max_nodes,
+	)
 
 
 @app.get("/api/activity")
-async def get_activity(path: str | None = Query(default=None)):
+async def get_activity(
+	request: Request,
+	path: str | None = Query(default=None),
+	bucket: str = Query(default="week"),
+	since: str | None = Query(default=None),
+	until: str | None = Query(default=None),
+	series_authors: int = Query(default=10, ge=0),
+	author: str | None = Query(default=None),
+	pathspec: str | None = Query(default=None),
+):
 	repo_path = _resolve_repo_path(path)
-	try:
-		return git_ops.get_activity(repo_path)
-	except ValueError as e:
-		raise HTTPException(status_code=400, detail=str(e))
+	return await _run_git(
+		request,
+		repo_path,
+		"activity",
+		git_ops.get_activity,
+		bucket,
+		since,
+		until,
+		series_authors,
+		author or None,
+		pathspec or None,
+	)
+
+
+@app.get("/api/hotspots")
+async def get_hotspots(
+	request: Request,
+	path: str | None = Query(default=None),
+	metric: str = Query(default="churn"),
+	limit: int = Query(default=50, ge=1, le=100_000),
+	pathspec: str | None = Query(default=None),
+):
+	repo_path = _resolve_repo_path(path)
+	return await _run_git(
+		request, repo_path, "hotspots", git_ops.get_hotspots, metric, limit, pathspec or None
+	)
+
+
+async def _sse(repo: str) -> AsyncIterator[bytes]:
+	yield b"retry: 5000\n\n"
+	async with contextlib.aclosing(changes.subscribe()) as events:
+		async for event in events:
+			if event is None:
+				yield b": keepalive\n\n"
+			elif event["repo"] == repo:
+				yield b"event: ref\ndata: " + json.dumps(event).encode() + b"\n\n"
+
+
+@app.get("/api/events")
+async def get_events(path: str | None = Query(default=None)):
+	"""Server-sent ``ref`` events each time the repository's HEAD moves."""
+	if watcher is None:
+		raise HTTPException(status_code=404, detail="Ref watching is disabled")
+	repo_path = _resolve_repo_path(path)
+	_watch(repo_path)
+	return StreamingResponse(
+		_sse(str(repo_path)), media_type="text/event-stream", headers={"Cache-Control": "no-cache"}
+	)
+
+
+@app.get("/api/multi")
+async def get_multi(
+	path: Annotated[list[str] | None, Query()] = None,
+	root: str | None = Query(default=None),
+	depth: int = Query(default=3, ge=0, le=10),
+	limit: int = Query(default=100, ge=0),
+	timeout: float | None = Query(default=None, gt=0),
+):
+	"""Contributors, weekly activity and a timeline across several repositories.
+
+	Repositories are the ``path`` values plus every working tree found under
+	``root``; each is summarised in a worker process within ``timeout`` seconds.
+	"""
+	repo_paths = [_resolve_repo_path(p) for p in path or ()]
+	if root is not None:
+		root_path = Path(root).expanduser().resolve()
+		if not root_path.is_dir():
+			raise HTTPException(status_code=404, detail=f"Directory does not exist: {root}")
+		repo_paths += multi_repo.find_repositories(root_path, depth)
+	if not repo_paths:
+		raise HTTPException(status_code=400, detail="No repositories: pass path or root")
+	return await multi_repo.aggregate(list(dict.fromkeys(repo_paths)), processes, limit, timeout)
+
+
+def _sse_event(name: str, data: bytes) -> bytes:
+	return b"event: " + name.encode() + b"\ndata: " + data + b"\n\n"
+
+
+async def _live(
+	request: Request, repo_path: Path, since: str | None, limit: int, snapshot: bytes | None
+) -> AsyncIterator[bytes]:
+	yield b"retry: 5000\n\n"
+	if snapshot is not None:
+		yield _sse_event("snapshot", snapshot)
+	async with contextlib.aclosing(changes.subscribe()) as events:
+		while True:
+			head = heads.resolve(repo_path)
+			if head is not None and head != since:
+				if since is None:
+					# The snapshot was of an empty repository; start over from the new one
+					yield _sse_event("update", json.dumps({"head": head, "reset": True}).encode())
+				else:
+					# Shared by every client that was at ``since``
+					try:
+						update = await _cached_body(
+							request,
+							repo_path,
+							head,
+							"update",
+							git_ops.get_update,
+							since,
+							head,
+							limit,
+						)
+					except HTTPException as e:
+						yield _sse_event("error", json.dumps({"detail": e.detail}).encode())
+						return
+					yield _sse_event("update", update)
+				since = head
+			# Wait for this repository's HEAD to move. Heartbeats also re-check it, which
+			# covers an event missed while subscribing or a server without a watcher.
+			async for event in events:
+				if event is None:
+					yield b": keepalive\n\n"
+					break
+				if event["repo"] == str(repo_path):
+					break
+
+
+@app.get("/api/stream")
+async def get_stream(
+	request: Request,
+	path: str | None = Query(default=None),
+	since: str | None = Query(default=None, pattern="^[0-9a-f]{40}$"),
+	limit: int = Query(default=500, ge=1),
+):
+	"""Live updates as server-sent events.
+
+	A ``snapshot`` (``get_bootstrap`` plus ``head``) comes first unless the client
+	resumes ``since`` a HEAD it already has; then an ``update`` (see
+	``git_ops.get_update``) follows each time HEAD moves.
+	"""
+	repo_path = _resolve_repo_path(path)
+	snapshot = None
+	if since is None:
+		try:
+			data = await pool.run(
+				str(repo_path), git_ops.get_snapshot, repo_path, limit, request=request
+			)
+		except ValueError as e:
+			raise HTTPException(status_code=400, detail=str(e))
+		except TimeoutError:
+			raise HTTPException(status_code=504, detail="Git operation timed out")
+		since, snapshot = data["head"], _encode(data)
+	_watch(repo_path)
+	return StreamingResponse(
+		_live(request, repo_path, since, limit, snapshot),
+		media_type="text/event-stream",
+		headers={"Cache-Control": "no-cache"},
+	)
+
+
+@app.get("/metrics")
+async def get_metrics():
+	"""Request, phase and git work totals plus pool and cache state, for Prometheus."""
+	body = metrics.registry.render() + "".join(
+		metrics.render_stats(name, stats)
+		for name, stats in (
+			("pool", pool.stats()),
+			("processes", processes.stats()),
+			("cache", cache.stats()),
+			("handles", git_ops.repos.stats()),
+		)
+	)
+	return Response(body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/api/pool")
+async def get_pool_stats():
+	return {**pool.stats(), "processes": processes.stats()}
+
+
+@app.get("/api/cache")
+async def get_cache_stats():
+	return cache.stats()
+
+
+@app.get("/api/handles")
+async def get_handle_stats():
+	return git_ops.repos.stats()
+
+
+@app.get("/api/watcher")
+async def get_watcher_stats():
+	if watcher is None:
+		return {"enabled": False}
+	return {"enabled": True, **watcher.stats(), "subscribers": changes.subscribers()}
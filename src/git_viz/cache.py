@@ -0,0 +1,242 @@
+"""In-process cache of rendered API responses with single-flight coalescing.
+
+Entries are keyed on (repo path, resolved HEAD sha, endpoint, params) and evicted
+least-recently-used first once either the entry count or the total byte size is
+exceeded. Concurrent requests for the same key share one computation. HEAD is
+resolved by reading ``.git/HEAD`` and the ref it points to, and that resolution is
+itself reused for as long as ``stat`` of those files and ``packed-refs`` is unchanged.
+Other refs a request names (``commit=feature``) are resolved to a sha the same way
+before the key is built, so their entries go stale when that ref moves too.
+"""
+
+import asyncio
+import os
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from concurrent.futures import Future
+from pathlib import Path
+
+from .workers import ClientDisconnectedError
+
+MAX_ENTRIES_ENV = "GIT_VIZ_CACHE_ENTRIES"
+MAX_BYTES_ENV = "GIT_VIZ_CACHE_BYTES"
+
+# A ref name followed only by ~n / ^n ancestry steps; reflog (@{...}) and path
+# (:path) forms are left alone
+_REV_RE = re.compile(r"([^~^:@\s]+)((?:[~^][0-9]*)*)")
+_SHA_RE = re.compile(r"[0-9a-f]{40}|[0-9a-f]{64}")
+
+
+def _stat_key(path: Path) -> tuple[int, int, int] | None:
+	try:
+		st = path.stat()
+	except FileNotFoundError:
+		return None
+	return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _read_packed_ref(git_dir: Path, ref: str) -> str | None:
+	try:
+		lines = (git_dir / "packed-refs").read_text().splitlines()
+	except FileNotFoundError:
+		return None
+	for line in lines:
+		if line.endswith(f" {ref}") and not line.startswith(("#", "^")):
+			return line.split(" ", 1)[0]
+	return None
+
+
+def _read_ref(git_dir: Path, ref: str) -> str | None:
+	"""The sha ``ref`` (e.g. ``refs/heads/main``) points to, loose or packed."""
+	try:
+		value = (git_dir / ref).read_text().strip()
+	except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+		return _read_packed_ref(git_dir, ref)
+	if value.startswith("ref: "):
+		return _read_ref(git_dir, value[5:])
+	# FETCH_HEAD lists one ref per line
+	sha = value.split(None, 1)[0] if value else ""
+	return sha if _SHA_RE.fullmatch(sha) else None
+
+
+class HeadResolver:
+	"""Resolve a repository's HEAD sha without spawning git."""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		# repo path -> (fingerprint, ref name, sha)
+		self._known: dict[str, tuple[tuple, str | None, str | None]] = {}
+
+	def _fingerprint(self, git_dir: Path, ref: str | None) -> tuple:
+		files = [git_dir / "HEAD", git_dir / "packed-refs"]
+		if ref:
+			files.append(git_dir / ref)
+		return tuple(_stat_key(f) for f in files)
+
+	def resolve(self, repo_path: Path) -> str | None:
+		"""HEAD's commit sha, or None for a repository without commits."""
+		git_dir = repo_path / ".git"
+		key = str(repo_path)
+		with self._lock:
+			known = self._known.get(key)
+		if known is not None:
+			fingerprint, ref, sha = known
+			if self._fingerprint(git_dir, ref) == fingerprint:
+				return sha
+
+		head = (git_dir / "HEAD").read_text().strip()
+		if head.startswith("ref: "):
+			ref = head[5:]
+			fingerprint = self._fingerprint(git_dir, ref)
+			sha = _read_ref(git_dir, ref)
+		else:
+			ref, sha = None, head
+			fingerprint = self._fingerprint(git_dir, ref)
+		with self._lock:
+			self._known[key] = (fingerprint, ref, sha)
+		return sha
+
+	def resolve_rev(self, repo_path: Path, rev: str) -> str:
+		"""``rev`` with the ref it starts from replaced by that ref's current sha.
+
+		``feature~2`` becomes ``<sha of feature>~2``, so it keeps naming the same
+		commit while cached. Revisions relative to HEAD (which cache keys already
+		carry), shas and anything that isn't a ref are returned unchanged.
+		"""
+		match = _REV_RE.fullmatch(rev)
+		if match is None:
+			return rev
+		name, steps = match.groups()
+		# Ref names never contain "..", so nothing outside the refs can be read
+		if name == "HEAD" or ".." in name or name.startswith("/"):
+			return rev
+		git_dir = repo_path / ".git"
+		# The lookup order of gitrevisions(7); $GIT_DIR/<name> only for full ref
+		# names and pseudo-refs such as ORIG_HEAD
+		candidates = [f"refs/{name}", f"refs/tags/{name}", f"refs/heads/{name}"]
+		candidates += [f"refs/remotes/{name}", f"refs/remotes/{name}/HEAD"]
+		if name.isupper() or name.startswith("refs/"):
+			candidates.insert(0, name)
+		for ref in candidates:
+			sha = _read_ref(git_dir, ref)
+			if sha is not None:
+				return sha + steps
+		return rev
+
+
+class ResultCache:
+	"""LRU cache of response bodies bounded by entry count and total bytes."""
+
+	def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024):
+		self.max_entries = max_entries
+		self.max_bytes = max_bytes
+		self._lock = threading.Lock()
+		self._entries: OrderedDict[tuple, bytes] = OrderedDict()
+		self._bytes = 0
+		# Futures from concurrent.futures can be awaited from any event loop
+		self._in_flight: dict[tuple, Future] = {}
+		# repo path -> HEAD sha the cached entries for that repo were computed at
+		self._heads: dict[str, str | None] = {}
+		self._counters = {
+			"hits": 0,
+			"misses": 0,
+			"coalesced": 0,
+			"evictions": 0,
+			"invalidations": 0,
+		}
+
+	@classmethod
+	def from_env(cls) -> "ResultCache":
+		return cls(
+			max_entries=int(os.environ.get(MAX_ENTRIES_ENV, 256)),
+			max_bytes=int(os.environ.get(MAX_BYTES_ENV, 64 * 1024 * 1024)),
+		)
+
+	def _invalidate_repo(self, repo: str, head: str | None) -> None:
+		# Caller holds the lock
+		if self._heads.get(repo, head) != head:
+			stale = [k for k in self._entries if k[0] == repo]
+			for k in stale:
+				self._bytes -= len(self._entries.pop(k))
+			self._counters["invalidations"] += len(stale)
+		self._heads[repo] = head
+
+	def _store(self, key: tuple, body: bytes) -> None:
+		# Caller holds the lock
+		if len(body) > self.max_bytes:
+			return
+		self._entries[key] = body
+		self._bytes += len(body)
+		while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+			_, evicted = self._entries.popitem(last=False)
+			self._bytes -= len(evicted)
+			self._counters["evictions"] += 1
+
+	def put(
+		self, repo: str, head: str | None, endpoint: str, params: Hashable, body: bytes
+	) -> None:
+		"""Store a body computed ahead of any request for it, e.g. after HEAD moved."""
+		with self._lock:
+			self._invalidate_repo(repo, head)
+			self._store((repo, head, endpoint, params), body)
+
+	async def get_or_compute(
+		self,
+		repo: str,
+		head: str | None,
+		endpoint: str,
+		params: Hashable,
+		compute: Callable[[], Awaitable[bytes]],
+	) -> bytes:
+		key = (repo, head, endpoint, params)
+		while True:
+			with self._lock:
+				self._invalidate_repo(repo, head)
+				body = self._entries.get(key)
+				if body is not None:
+					self._entries.move_to_end(key)
+					self._counters["hits"] += 1
+					return body
+				flight = self._in_flight.get(key)
+				if flight is None:
+					flight = self._in_flight[key] = Future()
+					self._counters["misses"] += 1
+					leader = True
+				else:
+					self._counters["coalesced"] += 1
+					leader = False
+
+			if not leader:
+				try:
+					return await asyncio.wrap_future(flight)
+				except ClientDisconnectedError:
+					# The request doing the work went away; take over the computation
+					continue
+
+			try:
+				body = await compute()
+			except BaseException as e:
+				with self._lock:
+					del self._in_flight[key]
+				# Followers retry rather than inherit the leader's cancellation
+				flight.set_exception(e if isinstance(e, Exception) else ClientDisconnectedError())
+				raise
+			with self._lock:
+				del self._in_flight[key]
+				if self._heads.get(repo) == head:
+					self._store(key, body)
+			flight.set_result(body)
+			return body
+
+	def stats(self) -> dict:
+		with self._lock:
+			return {
+				**self._counters,
+				"entries": len(self._entries),
+				"bytes": self._bytes,
+				"max_entries": self.max_entries,
+				"max_bytes": self.max_bytes,
+				"in_flight": len(self._in_flight),
+			}
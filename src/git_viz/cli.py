@@ -0,0 +1,43 @@
+"""The ``git-viz`` command."""
+
+import argparse
+
+import git
+
+from . import export
+
+
+def main(argv: list[str] | None = None) -> int:
+	parser = argparse.ArgumentParser(prog="git-viz", description="Git repository visualizer")
+	commands = parser.add_subparsers(dest="command", required=True)
+
+	export_parser = commands.add_parser(
+		"export",
+		help="precompute a repository into static files",
+		description="Write index.html and its data chunks to OUT for static hosting. "
+		"Exporting into the same directory again only writes what changed.",
+	)
+	export_parser.add_argument("repo", help="path to the repository")
+	export_parser.add_argument("out", help="output directory")
+	export_parser.add_argument(
+		"--processes", type=int, default=None, help="worker processes (default: one per core)"
+	)
+	export_parser.add_argument(
+		"--chunk-commits",
+		type=int,
+		default=export.CHUNK_COMMITS,
+		help=f"commits per history chunk (default: {export.CHUNK_COMMITS})",
+	)
+	args = parser.parse_args(argv)
+
+	try:
+		result = export.export(args.repo, args.out, args.processes, args.chunk_commits)
+	except (ValueError, git.GitError) as e:
+		parser.exit(1, f"git-viz: {e}\n")
+	head = (result["head"] or "empty repository")[:12]
+	print(
+		f"Exported {head} to {args.out}: {result['written']} of {result['chunks']} chunks"
+		f" written, {result['history_reused']} of {result['history_chunks']} history chunks"
+		f" reused, {result['removed']} stale chunks removed"
+	)
+	return 0
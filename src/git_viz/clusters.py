@@ -0,0 +1,178 @@
+"""Directory clusters: a bounded view of a large tree with rolled-up stats.
+
+The tree is shown as a cut through its directory hierarchy in which every file
+belongs to exactly one visible node, either the file itself or the nearest
+directory shown collapsed. The cut starts with the children of the root and
+opens each directory in ``expand`` (parents before children) while the view stays
+within ``max_nodes``. A directory with more children than fit is opened with its
+largest children plus a ``rest`` node standing for the others; one that cannot
+be opened at all stays collapsed and is reported as such.
+
+Each node carries its file count and total blob size at the tree, and the
+commits, insertions and deletions of the commit window that touched it.
+Co-change edges join nodes changed by the same commit and are pruned as in
+:mod:`git_viz.cochange`, with commits counted by the nodes they touch.
+"""
+
+from collections.abc import Iterable
+
+from .cochange import DEFAULT_MAX_FILES, DEFAULT_MIN_SUPPORT, DEFAULT_TOP_K, CoChangeCounts
+
+DEFAULT_MAX_NODES = 200
+
+
+def _parent(path: str) -> str:
+	return path.rpartition("/")[0]
+
+
+class _Hierarchy:
+	"""Directories of a ``{path: size}`` tree, with their children and rolled-up totals."""
+
+	def __init__(self, sizes: dict[str, int]):
+		self.sizes = sizes
+		self.children: dict[str, dict[str, None]] = {"": {}}
+		# directory -> [files, size]
+		self.totals: dict[str, list[int]] = {"": [0, 0]}
+		for path, size in sizes.items():
+			child = path
+			while child:
+				directory = _parent(child)
+				self.children.setdefault(directory, {})[child] = None
+				totals = self.totals.setdefault(directory, [0, 0])
+				totals[0] += 1
+				totals[1] += size
+				child = directory
+
+	def weight(self, path: str) -> tuple[int, str]:
+		size = self.totals[path][1] if path in self.totals else self.sizes[path]
+		return (-size, path)
+
+	def node(self, path: str, parent: str) -> dict:
+		if path in self.totals:
+			files, size = self.totals[path]
+			kind = "directory"
+		else:
+			files, size, kind = 1, self.sizes[path], "file"
+		return {"id": path, "type": kind, "parent": parent, "files": files, "size": size}
+
+
+class _Cut:
+	"""Visible nodes, and which visible node every directory and file belongs to."""
+
+	def __init__(self, tree: _Hierarchy, max_nodes: int):
+		self.tree = tree
+		self.max_nodes = max_nodes
+		self.nodes: dict[str, dict] = {}
+		self.dir_owner: dict[str, str] = {}
+		self.file_owner: dict[str, str] = {}
+		self.open("", max_nodes)
+
+	def open(self, directory: str, budget: int) -> None:
+		kids = sorted(self.tree.children.get(directory, ()), key=self.tree.weight)
+		if len(kids) > budget:
+			kids, folded = kids[: budget - 1], kids[budget - 1 :]
+			rest = f"{directory}/*" if directory else "*"
+			node = {"id": rest, "type": "rest", "parent": directory, "files": 0, "size": 0}
+			for path in folded:
+				folded_node = self.tree.node(path, directory)
+				node["files"] += folded_node["files"]
+				node["size"] += folded_node["size"]
+				self._own(path, rest)
+			self.nodes[rest] = node
+		for path in kids:
+			self.nodes[path] = self.tree.node(path, directory)
+			self._own(path, path)
+
+	def _own(self, path: str, owner: str) -> None:
+		if path in self.tree.totals:
+			self.dir_owner[path] = owner
+		else:
+			self.file_owner[path] = owner
+
+	def expand(self, directory: str) -> bool:
+		"""Replace the collapsed ``directory`` with its children, if the budget allows."""
+		node = self.nodes.get(directory)
+		if node is None or node["type"] != "directory":
+			return False
+		budget = self.max_nodes - len(self.nodes) + 1
+		if budget < 2 and len(self.tree.children[directory]) > budget:
+			return False
+		del self.nodes[directory]
+		del self.dir_owner[directory]
+		self.open(directory, budget)
+		return True
+
+	def owner(self, path: str) -> str | None:
+		node = self.file_owner.get(path)
+		if node is not None:
+			return node
+		directory = _parent(path)
+		while directory:
+			node = self.dir_owner.get(directory)
+			if node is not None:
+				return node
+			directory = _parent(directory)
+		# Deleted since, or inside a directory that is open
+		return None
+
+
+def directory_clusters(
+	sizes: dict[str, int],
+	commits: Iterable[list[dict]],
+	expand: Iterable[str] = (),
+	max_nodes: int = DEFAULT_MAX_NODES,
+	max_files: int = DEFAULT_MAX_FILES,
+	min_support: int = DEFAULT_MIN_SUPPORT,
+	top_k: int = DEFAULT_TOP_K,
+) -> dict:
+	"""The cut of the ``sizes`` tree that opens the ``expand`` directories.
+
+	``commits`` are the ``files`` lists of commit records (``path``, ``insertions``,
+	``deletions``). ``max_files`` caps the number of nodes a commit may touch and
+	still add edges. Returns ``{"nodes", "edges", "collapsed"}``: nodes sorted by
+	id with ``id``, ``type`` (``directory``, ``file`` or ``rest``), ``parent`` (the
+	directory whose children they are), ``files``, ``size``, ``commits``,
+	``insertions`` and ``deletions``; edges as in :func:`~git_viz.cochange.cochange_edges`;
+	and the ``expand`` entries that were not opened.
+	"""
+	cut = _Cut(_Hierarchy(sizes), max(2, max_nodes))
+	collapsed = [
+		directory
+		for directory in sorted({d.strip("/") for d in expand} - {""}, key=_depth_first)
+		if not cut.expand(directory)
+	]
+
+	for node in cut.nodes.values():
+		node.update(commits=0, insertions=0, deletions=0)
+	counts = CoChangeCounts(max_files)
+	owners: dict[str, str | None] = {}
+	for files in commits:
+		touched = set()
+		for f in files:
+			path = f["path"]
+			if path not in owners:
+				owners[path] = cut.owner(path)
+			owner = owners[path]
+			if owner is None:
+				continue
+			node = cut.nodes[owner]
+			node["insertions"] += f["insertions"]
+			node["deletions"] += f["deletions"]
+			touched.add(owner)
+		if touched:
+			counts.add(touched)
+	for owner, n in counts.files().items():
+		cut.nodes[owner]["commits"] = n
+
+	return {
+		"nodes": [cut.nodes[node_id] for node_id in sorted(cut.nodes)],
+		"edges": [
+			{"source": source, "target": target, "count": count}
+			for source, target, count in counts.edges(min_support, top_k)
+		],
+		"collapsed": collapsed,
+	}
+
+
+def _depth_first(directory: str) -> tuple[int, str]:
+	return (directory.count("/"), directory)
@@ -0,0 +1,102 @@
+"""Co-change edges: pairs of files modified in the same commit, pruned for the graph.
+
+A commit touching n files contributes n*(n-1)/2 pairs, so one reformat or vendor
+bump can dwarf the rest of history. Commits wider than ``max_files`` therefore add
+to file counts but not to edges, pairs seen fewer than ``min_support`` times are
+dropped, and each file nominates only its ``top_k`` strongest edges. An edge
+survives when either endpoint nominates it, so a hub file can keep more than
+``top_k`` edges, but the result holds at most ``top_k`` × files edges in total
+however large the commits are.
+"""
+
+import heapq
+from collections import Counter
+from collections.abc import Iterable
+from itertools import combinations
+
+DEFAULT_MAX_FILES = 50
+DEFAULT_MIN_SUPPORT = 2
+DEFAULT_TOP_K = 10
+
+
+class CoChangeCounts:
+	"""Running file and pair counts, fed one commit at a time."""
+
+	def __init__(self, max_files: int = DEFAULT_MAX_FILES):
+		self.max_files = max_files
+		self.ids: dict[str, int] = {}
+		self.paths: list[str] = []
+		self.file_counts: Counter[int] = Counter()
+		self.pair_counts: Counter[tuple[int, int]] = Counter()
+		self.commits = 0
+		self.skipped_commits = 0
+
+	def add(self, touched: Iterable[str]) -> None:
+		self.commits += 1
+		commit_ids = []
+		for path in sorted(set(touched)):
+			fid = self.ids.get(path)
+			if fid is None:
+				fid = self.ids[path] = len(self.paths)
+				self.paths.append(path)
+			commit_ids.append(fid)
+		self.file_counts.update(commit_ids)
+		if len(commit_ids) > self.max_files:
+			self.skipped_commits += 1
+			return
+		commit_ids.sort()
+		self.pair_counts.update(combinations(commit_ids, 2))
+
+	def files(self) -> dict[str, int]:
+		return {self.paths[fid]: count for fid, count in self.file_counts.items()}
+
+	def edges(
+		self, min_support: int = DEFAULT_MIN_SUPPORT, top_k: int = DEFAULT_TOP_K
+	) -> list[tuple[str, str, int]]:
+		"""Pruned ``(source, target, count)`` edges with ``source < target``, strongest first."""
+		neighbours: dict[int, list[tuple[int, tuple[int, int]]]] = {}
+		for pair, count in self.pair_counts.items():
+			if count >= min_support:
+				for fid in pair:
+					neighbours.setdefault(fid, []).append((count, pair))
+		kept: set[tuple[int, int]] = set()
+		for candidates in neighbours.values():
+			# Ties go to the pair with the lower (earlier interned) file ids
+			kept.update(pair for _, pair in heapq.nsmallest(top_k, candidates, key=_rank))
+
+		paths = self.paths
+		edges = sorted((*sorted((paths[a], paths[b])), self.pair_counts[(a, b)]) for a, b in kept)
+		edges.sort(key=lambda edge: -edge[2])
+		return edges
+
+
+def cochange_edges(
+	commits: Iterable[list[str]],
+	max_files: int = DEFAULT_MAX_FILES,
+	min_support: int = DEFAULT_MIN_SUPPORT,
+	top_k: int = DEFAULT_TOP_K,
+) -> dict:
+	"""Pruned co-change graph over ``commits``, each given as the paths it touched.
+
+	Returns ``{"commits", "skipped_commits", "files", "edges"}`` where ``files``
+	maps each touched path to its commit count and ``edges`` is a list of
+	``{"source", "target", "count"}`` with ``source < target``, sorted by
+	descending count and then by path.
+	"""
+	counts = CoChangeCounts(max_files)
+	for touched in commits:
+		counts.add(touched)
+	return {
+		"commits": counts.commits,
+		"skipped_commits": counts.skipped_commits,
+		"files": counts.files(),
+		"edges": [
+			{"source": source, "target": target, "count": count}
+			for source, target, count in counts.edges(min_support, top_k)
+		],
+	}
+
+
+def _rank(candidate: tuple[int, tuple[int, int]]) -> tuple[int, tuple[int, int]]:
+	count, pair = candidate
+	return (-count, pair)
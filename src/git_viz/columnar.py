@@ -0,0 +1,107 @@
+"""Compact binary encoding of commit pages and trees for bulk transfer.
+
+A payload is ``GVC1``, a little-endian uint32 header length and a JSON header,
+followed by raw little-endian columns. The header carries the dictionary tables
+(authors, paths) and, for each column, its name, element type (``u8``, ``u32`` or
+``f64``), element count and byte offset from the first column, which starts at
+the first 8-byte boundary after the header. Every column is 8-byte aligned, so a
+browser can view it as a typed array over the response buffer without copying or
+parsing.
+
+Commit payloads hold, per commit, a 20-byte sha, a float64 Unix timestamp, an
+author id and offsets into a UTF-8 message buffer and into per-file columns of
+path ids, insertions and deletions. Tree payloads hold a float64 size per path.
+"""
+
+import json
+import sys
+from array import array
+
+from .commit_store import CommitStore
+
+MAGIC = b"GVC1"
+MEDIA_TYPE = "application/vnd.git-viz.columnar"
+
+_TYPECODES = {"u8": "B", "u32": "I", "f64": "d"}
+
+
+def _column(typecode: str, values) -> array:
+	"""``values`` as a little-endian array, copied only when it has to be."""
+	big_endian = sys.byteorder == "big" and typecode != "B"
+	if big_endian or not (isinstance(values, array) and values.typecode == typecode):
+		values = array(typecode, values)
+		if big_endian:
+			values.byteswap()
+	return values
+
+
+def _pack(header: dict, columns: list[tuple[str, str, object]]) -> bytes:
+	arrays = [(name, kind, _column(_TYPECODES[kind], values)) for name, kind, values in columns]
+	specs, position = [], 0
+	for name, kind, values in arrays:
+		specs.append({"name": name, "type": kind, "offset": position, "length": len(values)})
+		position = _align(position + len(values) * values.itemsize)
+	encoded = json.dumps(
+		{**header, "columns": specs}, ensure_ascii=False, separators=(",", ":")
+	).encode()
+
+	out = bytearray(MAGIC)
+	out += len(encoded).to_bytes(4, "little")
+	out += encoded
+	for _, _, values in arrays:
+		out += bytes(_align(len(out)) - len(out))
+		out += values.tobytes()
+	return bytes(out)
+
+
+def _align(n: int) -> int:
+	return (n + 7) & ~7
+
+
+def encode_commits(store: CommitStore) -> bytes:
+	"""``store`` as a columnar payload; commits keep their order (newest first)."""
+	return _pack(
+		{
+			"kind": "commits",
+			"count": len(store),
+			"authors": [list(a) for a in zip(store.author_names, store.author_emails)],
+			"paths": store.paths,
+		},
+		[
+			("hash", "u8", store.shas),
+			("timestamp", "f64", store.timestamps),
+			("author", "u32", store.author_ids),
+			("message_offsets", "u32", store.message_offsets),
+			("message", "u8", store.messages),
+			("file_offsets", "u32", store.file_offsets),
+			("file_path", "u32", store.file_paths),
+			("insertions", "u32", store.insertions),
+			("deletions", "u32", store.deletions),
+		],
+	)
+
+
+def encode_tree(commit: str, sizes: dict[str, int]) -> bytes:
+	"""A tree's blob sizes as a columnar payload, ``paths[i]`` having ``size[i]`` bytes."""
+	return _pack(
+		{"kind": "tree", "commit": commit, "count": len(sizes), "paths": list(sizes)},
+		[("size", "f64", sizes.values())],
+	)
+
+
+def decode(data: bytes) -> dict:
+	"""The header of a payload with ``columns`` mapping each name to an ``array``."""
+	if data[:4] != MAGIC:
+		raise ValueError("Not a columnar payload")
+	length = int.from_bytes(data[4:8], "little")
+	header = json.loads(data[8 : 8 + length])
+	base = _align(8 + length)
+	columns = {}
+	for column in header["columns"]:
+		values = array(_TYPECODES[column["type"]])
+		start = base + column["offset"]
+		values.frombytes(data[start : start + column["length"] * values.itemsize])
+		if sys.byteorder == "big" and values.itemsize > 1:
+			values.byteswap()
+		columns[column["name"]] = values
+	return {**header, "columns": columns}
@@ -0,0 +1,108 @@
+"""Compact column-wise storage for commit history.
+
+A list of commit dicts repeats every author name, email and file path and pays
+object overhead for each field of each commit. :class:`CommitStore` interns
+authors and paths as integer ids and keeps everything else in flat ``array``
+columns: 20-byte binary shas, int64 timestamps, UTF-8 messages in one buffer, and
+per-file path ids and line counts addressed through per-commit offsets. Dicts are
+only materialised, one commit at a time, when a record is read back.
+"""
+
+from array import array
+from collections.abc import Iterable, Iterator
+
+
+class CommitStore:
+	"""Append-only commit table with interned author and path ids."""
+
+	__slots__ = (
+		"author_names",
+		"author_emails",
+		"paths",
+		"_author_ids",
+		"_path_ids",
+		"shas",
+		"timestamps",
+		"author_ids",
+		"message_offsets",
+		"messages",
+		"file_offsets",
+		"file_paths",
+		"insertions",
+		"deletions",
+	)
+
+	def __init__(self, records: Iterable[dict] = ()):
+		self.author_names: list[str] = []
+		self.author_emails: list[str] = []
+		self.paths: list[str] = []
+		self._author_ids: dict[tuple[str, str], int] = {}
+		self._path_ids: dict[str, int] = {}
+		self.shas = bytearray()
+		self.timestamps = array("q")
+		self.author_ids = array("I")
+		self.message_offsets = array("q", [0])
+		self.messages = bytearray()
+		self.file_offsets = array("q", [0])
+		self.file_paths = array("I")
+		self.insertions = array("I")
+		self.deletions = array("I")
+		for record in records:
+			self.append(record)
+
+	def __len__(self) -> int:
+		return len(self.timestamps)
+
+	def append(self, record: dict) -> None:
+		"""Add a record shaped like :func:`git_viz.log_stream.parse_log_record`'s output."""
+		key = (record["author"], record["email"])
+		author_id = self._author_ids.get(key)
+		if author_id is None:
+			author_id = self._author_ids[key] = len(self.author_names)
+			self.author_names.append(key[0])
+			self.author_emails.append(key[1])
+		self.shas += bytes.fromhex(record["hash"])
+		self.timestamps.append(record["timestamp"])
+		self.author_ids.append(author_id)
+		self.messages += record["message"].encode("utf-8", "surrogateescape")
+		self.message_offsets.append(len(self.messages))
+		for f in record["files"]:
+			path_id = self._path_ids.get(f["path"])
+			if path_id is None:
+				path_id = self._path_ids[f["path"]] = len(self.paths)
+				self.paths.append(f["path"])
+			self.file_paths.append(path_id)
+			self.insertions.append(f["insertions"])
+			self.deletions.append(f["deletions"])
+		self.file_offsets.append(len(self.file_paths))
+
+	def sha(self, i: int) -> str:
+		return self.shas[20 * i : 20 * i + 20].hex()
+
+	def message(self, i: int) -> str:
+		start, end = self.message_offsets[i], self.message_offsets[i + 1]
+		return self.messages[start:end].decode("utf-8", "surrogateescape")
+
+	def record(self, i: int) -> dict:
+		"""Commit ``i`` in the dict shape it was appended in (without parents)."""
+		author = self.author_ids[i]
+		start, end = self.file_offsets[i], self.file_offsets[i + 1]
+		return {
+			"hash": self.sha(i),
+			"author": self.author_names[author],
+			"email": self.author_emails[author],
+			"timestamp": self.timestamps[i],
+			"message": self.message(i),
+			"files": [
+				{
+					"path": self.paths[self.file_paths[j]],
+					"insertions": self.insertions[j],
+					"deletions": self.deletions[j],
+				}
+				for j in range(start, end)
+			],
+		}
+
+	def records(self) -> Iterator[dict]:
+		for i in range(len(self)):
+			yield self.record(i)
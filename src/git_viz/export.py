@@ -0,0 +1,247 @@
+"""Static snapshot export: the page and everything it loads, precomputed into files.
+
+:func:`export` writes ``index.html`` to an output directory and the data it
+loads under ``data/``, so a repository can be browsed from any static host
+with no server running. ``data/manifest.json`` describes the repository and
+names the chunk files. Every chunk is compact JSON, gzipped, and named after a
+hash of its content:
+
+- ``commits-*`` and ``deltas-*``: the history in chunks of ``chunk_commits``
+  commits, counted from the oldest, in the shapes of ``/api/commits`` and
+  ``/api/tree/deltas``; the manifest lists each chunk's commits and time range
+- ``tree-*`` (HEAD's tree) and ``activity-*`` (weekly activity)
+- ``cochange-*``: co-change edges over the whole history
+- ``layout-*``: keyframe layouts of the newest :data:`RECENT_COMMITS` commits
+- ``clusters-*``: the top-level directory cut of large trees
+- ``hotspots-<metric>-*``: the top files by each hotspot metric
+
+Chunks are computed by the :mod:`git_viz.git_ops` functions on a
+:class:`~git_viz.workers.ProcessWorkerPool`, and each job writes its own file.
+Exporting into the same directory again is incremental. History chunks whose
+commits are unchanged since the previous manifest are neither recomputed nor
+rewritten; as commits are added, only the newest chunk changes. The other
+chunks describe HEAD, so they are recomputed only when HEAD moved and written
+only when their content changed. The manifest is replaced once every
+chunk it names is in place, and chunks it no longer names are then deleted.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import re
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+
+from . import git_ops, hotspots
+from .workers import ProcessWorkerPool
+
+DATA_DIR = "data"
+MANIFEST = "manifest.json"
+MANIFEST_VERSION = 1
+CHUNK_COMMITS = 2000
+# What the page asks the server for: COMMIT_LIMIT, CLUSTER_MAX_NODES and
+# HOTSPOT_LIMIT in index.html
+RECENT_COMMITS = 500
+CLUSTER_MAX_NODES = 300
+HOTSPOT_LIMIT = 5000
+# Seconds each chunk may take
+JOB_TIMEOUT = 3600.0
+
+HTML_PATH = Path(__file__).resolve().parent / "index.html"
+# Empty when the page is served by the app; exports point it at the manifest
+_DATA_META = '<meta name="git-viz-data" content="">'
+_CHUNK_NAME = re.compile(r"[a-z_-]+-[0-9a-f]{16}\.json\.gz")
+
+
+def _write_atomic(target: Path, data: bytes) -> None:
+	# Readers see the old file or the new one, never a partial write
+	partial = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+	partial.write_bytes(data)
+	os.replace(partial, target)
+
+
+def write_chunk(directory: str | Path, kind: str, data: object) -> str:
+	"""Write ``data`` as gzipped JSON named after its content; returns the file name.
+
+	An existing file of that name already holds the same content and is left alone.
+	"""
+	raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+	name = f"{kind}-{hashlib.sha256(raw).hexdigest()[:16]}.json.gz"
+	target = Path(directory) / name
+	if not target.exists():
+		_write_atomic(target, gzip.compress(raw, compresslevel=9, mtime=0))
+	return name
+
+
+def _export_chunk(directory: str, kind: str, fn: Callable[..., object], *args: object) -> str:
+	return write_chunk(directory, kind, fn(*args))
+
+
+def _export_history(
+	directory: str, path: str, after: str | None, count: int, before: str | None
+) -> dict:
+	chunk = git_ops.get_history_chunk(path, after, count, before)
+	commits = chunk["commits"]
+	return {
+		"count": len(commits),
+		"first": commits[-1]["hash"],
+		"last": commits[0]["hash"],
+		"before": before,
+		# Commit dates are all UTC ISO 8601, so they order correctly as strings
+		"since": min(c["date"] for c in commits),
+		"until": max(c["date"] for c in commits),
+		"commits": write_chunk(directory, "commits", commits),
+		"deltas": write_chunk(directory, "deltas", chunk["deltas"]),
+	}
+
+
+def _read_manifest(data: Path) -> dict:
+	try:
+		manifest = json.loads((data / MANIFEST).read_text())
+	except (OSError, ValueError):
+		return {}
+	return manifest if manifest.get("version") == MANIFEST_VERSION else {}
+
+
+_VIEWS = ("tree", "activity", "cochange", "layout", "clusters")
+
+
+def _view_names(manifest: dict) -> dict[str, str]:
+	"""The chunks of ``manifest`` other than history, by kind."""
+	names = {kind: manifest[kind] for kind in _VIEWS if kind in manifest}
+	for metric, name in manifest.get("hotspots", {}).items():
+		names[f"hotspots-{metric}"] = name
+	return names
+
+
+def _referenced(manifest: dict) -> set[str]:
+	names = set(_view_names(manifest).values())
+	for entry in manifest["history"]:
+		names.update((entry["commits"], entry["deltas"]))
+	return names
+
+
+async def _export(path: str, out: Path, pool: ProcessWorkerPool, chunk_commits: int) -> dict:
+	# Ingest once up front rather than in every worker at the same time
+	order = git_ops.get_history_shas(path)[::-1]
+	repo = git_ops.get_repo_metadata(path)
+
+	data = out / DATA_DIR
+	data.mkdir(parents=True, exist_ok=True)
+	directory = str(data)
+	existing = set(os.listdir(data))
+	last_export = _read_manifest(data)
+	previous = {
+		(e["first"], e["last"], e["count"], e["before"]): e
+		for e in last_export.get("history", ())
+		if {e["commits"], e["deltas"]} <= existing
+	}
+	head = order[-1] if order else None
+
+	views = {
+		# The slowest job, so it starts first
+		"layout": (git_ops.get_layout, path, RECENT_COMMITS),
+		"tree": (git_ops.get_tree, path),
+		"activity": (git_ops.get_activity, path),
+		"cochange": (git_ops.get_cochange, path, None),
+		"clusters": (git_ops.get_clusters, path, "HEAD", RECENT_COMMITS, (), CLUSTER_MAX_NODES),
+		**{
+			f"hotspots-{metric}": (git_ops.get_hotspots, path, metric, HOTSPOT_LIMIT)
+			for metric in hotspots.METRICS
+		},
+	}
+	names = _view_names(last_export)
+	# Everything but the history describes HEAD, so it is only recomputed when HEAD moved
+	if (
+		last_export.get("head") != head
+		or names.keys() != views.keys()
+		or not set(names.values()) <= existing
+	):
+		names = {}
+	jobs = [
+		pool.run(_export_chunk, directory, kind, *call)
+		for kind, call in views.items()
+		if kind not in names
+	]
+
+	history = []
+	reused = 0
+	for start in range(0, len(order), chunk_commits):
+		shas = order[start : start + chunk_commits]
+		before = order[start - 1] if start else None
+		key = (shas[0], shas[-1], len(shas), before)
+		if key in previous:
+			history.append(previous[key])
+			reused += 1
+			continue
+		after = order[start + chunk_commits] if start + chunk_commits < len(order) else None
+		history.append(key)
+		jobs.append(pool.run(_export_history, directory, path, after, len(shas), before))
+
+	results = iter(await asyncio.gather(*jobs))
+	if not names:
+		names = {kind: next(results) for kind in views}
+	for i, entry in enumerate(history):
+		if isinstance(entry, tuple):
+			history[i] = next(results)
+			if (history[i]["first"], history[i]["last"], history[i]["count"]) != entry[:3]:
+				raise ValueError("HEAD moved during the export; run it again")
+	manifest = {
+		"version": MANIFEST_VERSION,
+		"exported": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+		"head": head,
+		"repo": repo,
+		"recent_commits": RECENT_COMMITS,
+		**{kind: names[kind] for kind in _VIEWS},
+		"hotspots": {metric: names[f"hotspots-{metric}"] for metric in hotspots.METRICS},
+		"history": history,
+	}
+	_write_atomic(data / MANIFEST, json.dumps(manifest, indent="\t").encode())
+
+	referenced = _referenced(manifest)
+	stale = [name for name in existing if _CHUNK_NAME.fullmatch(name) and name not in referenced]
+	for name in stale:
+		(data / name).unlink(missing_ok=True)
+
+	page = HTML_PATH.read_text().replace(
+		_DATA_META, f'<meta name="git-viz-data" content="{DATA_DIR}/{MANIFEST}">'
+	)
+	html = out / "index.html"
+	if not html.is_file() or html.read_text() != page:
+		_write_atomic(html, page.encode())
+
+	return {
+		"head": manifest["head"],
+		"chunks": len(referenced),
+		"written": len(referenced - existing),
+		"removed": len(stale),
+		"history_chunks": len(history),
+		"history_reused": reused,
+	}
+
+
+def export(
+	path: str | Path,
+	out: str | Path,
+	processes: int | None = None,
+	chunk_commits: int = CHUNK_COMMITS,
+) -> dict:
+	"""Export the repository at ``path`` into the directory ``out``.
+
+	Runs up to ``processes`` (default: one per core) chunks at once. Returns what
+	was done: the HEAD exported, the chunks the manifest names, how many of them
+	were written, how many stale ones were removed, and how many of the history
+	chunks were reused from the previous export.
+	"""
+	if chunk_commits < 1:
+		raise ValueError("chunk_commits must be at least 1")
+	pool = ProcessWorkerPool(processes, JOB_TIMEOUT)
+	try:
+		return asyncio.run(
+			_export(str(Path(path).expanduser().resolve()), Path(out), pool, chunk_commits)
+		)
+	finally:
+		pool.close()
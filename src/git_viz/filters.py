@@ -0,0 +1,125 @@
+"""Author, path and date filters pushed down into history queries.
+
+A :class:`CommitFilter` renders the same selection three ways: as SQL over the
+history index, as ``git log`` arguments for walks that bypass the index, and as
+a Python predicate on paths for tree snapshots.
+
+Paths follow git's default pathspec rules. A pattern without wildcards matches
+that file or everything under that directory; ``*``, ``?`` and ``[...]`` are
+globs in which ``*`` also matches ``/``, so ``src/*.py`` covers nested modules.
+Pathspec magic (``:(exclude)`` and friends) is not supported.
+"""
+
+import fnmatch
+import itertools
+
+_WILDCARDS = frozenset("*?[")
+
+
+class CommitFilter:
+	"""Commits by an author, touching a pathspec, committed within ``[since, until)``.
+
+	``author`` is a case-insensitive substring of ``Name <email>``; ``since`` and
+	``until`` are Unix timestamps compared with the committer date. The window is
+	half-open like the co-change window (``git log --until`` is inclusive and is
+	passed one second less). Activity is read from daily rollups instead and widens
+	its window to whole UTC days.
+	"""
+
+	__slots__ = ("author", "pathspec", "since", "until")
+
+	def __init__(
+		self,
+		author: str | None = None,
+		pathspec: str | None = None,
+		since: int | None = None,
+		until: int | None = None,
+	):
+		if pathspec is not None:
+			if pathspec.startswith(":"):
+				raise ValueError(f"Unsupported pathspec: {pathspec}")
+			pathspec = pathspec.strip("/") or None
+		self.author = author or None
+		self.pathspec = pathspec
+		self.since = since
+		self.until = until
+
+	def __bool__(self) -> bool:
+		return any(
+			value is not None for value in (self.author, self.pathspec, self.since, self.until)
+		)
+
+	@property
+	def is_glob(self) -> bool:
+		return self.pathspec is not None and not _WILDCARDS.isdisjoint(self.pathspec)
+
+	def directory(self) -> str:
+		"""The deepest directory (or file) every matching path lies under; ``""`` for all."""
+		if self.pathspec is None:
+			return ""
+		if not self.is_glob:
+			return self.pathspec
+		# Components before the first wildcard; the last one is a name pattern
+		literal = itertools.takewhile(_WILDCARDS.isdisjoint, self.pathspec.split("/"))
+		return "/".join(literal)
+
+	def matches_path(self, path: str) -> bool:
+		if self.pathspec is None:
+			return True
+		if self.is_glob:
+			return fnmatch.fnmatchcase(path, self.pathspec.replace("[^", "[!"))
+		return path == self.pathspec or path.startswith(self.pathspec + "/")
+
+	# --- SQL over the history index ---
+
+	def path_sql(self, column: str) -> tuple[str, list]:
+		"""Condition on a path column, with its parameters."""
+		if self.pathspec is None:
+			return "true", []
+		if self.is_glob:
+			# GLOB's * crosses "/" just like a pathspec's; only negation is spelled differently
+			return f"{column} GLOB ?", [self.pathspec.replace("[!", "[^")]
+		prefix = self.pathspec + "/"
+		return (
+			f"({column} = ? OR substr({column}, 1, ?) = ?)",
+			[self.pathspec, len(prefix), prefix],
+		)
+
+	def commit_sql(self, alias: str) -> tuple[str, list]:
+		"""Condition on the ``commits`` table aliased ``alias``, with its parameters."""
+		clauses, params = [], []
+		if self.author is not None:
+			clauses.append(f"instr(lower({alias}.author || ' <' || {alias}.email || '>'), ?)")
+			params.append(self.author.lower())
+		if self.since is not None:
+			clauses.append(f"{alias}.committed >= ?")
+			params.append(self.since)
+		if self.until is not None:
+			clauses.append(f"{alias}.committed < ?")
+			params.append(self.until)
+		if self.pathspec is not None:
+			path_sql, path_params = self.path_sql("pf.path")
+			clauses.append(
+				f"EXISTS (SELECT 1 FROM files AS pf WHERE pf.commit_id = {alias}.id AND {path_sql})"
+			)
+			params += path_params
+		return " AND ".join(clauses) or "true", params
+
+	# --- git log ---
+
+	def log_args(self) -> list[str]:
+		"""Revision-limiting options for ``git log``."""
+		args = []
+		if self.author is not None:
+			args += ["--fixed-strings", "--regexp-ignore-case", f"--author={self.author}"]
+		if self.since is not None:
+			args.append(f"--since=@{self.since}")
+		if self.until is not None:
+			args.append(f"--until=@{self.until - 1}")
+		if self.pathspec is not None:
+			# Without it git prunes side branches that left the paths unchanged
+			args.append("--full-history")
+		return args
+
+	def pathspecs(self) -> list[str]:
+		return [] if self.pathspec is None else [self.pathspec]
@@ -1,18 +1,37 @@
-from collections import defaultdict
+import itertools
+import json
+from collections.abc import Iterator
+from contextlib import AbstractContextManager
 from datetime import datetime, timezone
 from pathlib import Path
 
 import git
 
+from .cochange import (
+	DEFAULT_MAX_FILES,
+	DEFAULT_MIN_SUPPORT,
+	DEFAULT_TOP_K,
+	CoChangeCounts,
+	cochange_edges,
+)
+from . import columnar, hotspots, metrics
+from .clusters import DEFAULT_MAX_NODES, directory_clusters
+from .commit_store import CommitStore
+from .filters import CommitFilter
+from .history_index import HistoryIndex
+from .layout import DEFAULT_MAX_NODES as DEFAULT_LAYOUT_NODES, layout_sequence, strongest_nodes
+from .log_stream import decode_path, iter_log
+from .repo_pool import RepoPool
+from .tree_diff import blob_sizes, diff_pairs
 
-def _open_repo(path: str | Path) -> git.Repo:
-	resolved = Path(path).expanduser().resolve()
-	if not resolved.exists():
-		raise ValueError(f"Path does not exist: {path}")
-	try:
-		return git.Repo(resolved)
-	except git.InvalidGitRepositoryError:
-		raise ValueError(f"Not a git repository: {path}")
+
+# Open repository handles shared by every request in the process
+repos = RepoPool.from_env()
+
+
+def _open_repo(path: str | Path) -> AbstractContextManager[git.Repo]:
+	"""A pooled handle on the repository at ``path``, for use in a ``with`` block."""
+	return repos.checkout(path)
 
 
 def _is_empty(repo: git.Repo) -> bool:
@@ -23,115 +42,750 @@ def _is_empty(repo: git.Repo) -> bool:
 		return True
 
 
-def get_repo_metadata(path: str | Path) -> dict:
-	repo = _open_repo(path)
+def _branch_name(repo: git.Repo) -> str:
+	try:
+		return repo.active_branch.name
+	except TypeError:
+		return str(repo.head.commit.hexsha[:8]) + " (detached)"
+
+
+def _commit_dict(c: dict) -> dict:
+	return {
+		"hash": c["hash"],
+		"author": c["author"],
+		"email": c["email"],
+		"date": datetime.fromtimestamp(c["timestamp"], tz=timezone.utc).isoformat(),
+		"message": c["message"],
+		"files": c["files"],
+	}
+
+
+@metrics.phase("encode")
+def _commits_json(store: CommitStore) -> bytes:
+	"""``store`` as a JSON array of commit dicts, encoded one commit at a time.
+
+	Matches ``JSONResponse`` byte for byte without holding every dict at once.
+	"""
+	encoded = (
+		json.dumps(_commit_dict(c), ensure_ascii=False, separators=(",", ":")).encode()
+		for c in store.records()
+	)
+	return b"[" + b",".join(encoded) + b"]"
+
+
+_BUCKET_LABELS = {
+	"day": lambda d: d.strftime("%Y-%m-%d"),
+	# ISO week: YYYY-Www
+	"week": lambda d: "{0}-W{1:02d}".format(*d.isocalendar()),
+	"month": lambda d: d.strftime("%Y-%m"),
+}
+
+
+def _empty_activity(bucket: str) -> dict:
+	return {
+		"bucket": bucket,
+		"commits_per_author": {},
+		"commits_over_time": [],
+		"series": {},
+		"churn": [],
+		"hour_of_week": [[0] * 24 for _ in range(7)],
+	}
+
+
+@metrics.phase("activity")
+def _activity(
+	index: HistoryIndex,
+	bucket: str = "week",
+	since: int | None = None,
+	until: int | None = None,
+	series_authors: int = 10,
+	where: CommitFilter | None = None,
+) -> dict:
+	"""Commit analytics from the index's activity rollups, bucketed by UTC day, week or month.
+
+	``since``/``until`` are Unix timestamps, widened to whole UTC days. Time series
+	entries are keyed by the bucket name (``{"week": "2024-W03", ...}``); per-author
+	series cover the ``series_authors`` most active authors. ``where`` narrows
+	them to an author and pathspec.
+	"""
+	format_label = _BUCKET_LABELS[bucket]
+
+	def label(day: int) -> str:
+		return format_label(datetime.fromtimestamp(day * 86400, tz=timezone.utc))
+
+	rows = index.activity(
+		label,
+		None if since is None else since // 86400,
+		None if until is None else -(-until // 86400),
+		series_authors,
+		where,
+	)
+	series: dict[str, dict[str, int]] = {a: {} for a, _, _ in rows["authors"][:series_authors]}
+	for author, key, commits in rows["series"]:
+		series[author][key] = commits
+	heatmap = [[0] * 24 for _ in range(7)]
+	for weekday, hour, commits in rows["hours"]:
+		heatmap[weekday][hour] = commits
+	return {
+		"bucket": bucket,
+		"commits_per_author": {a: commits for a, commits, _ in rows["authors"]},
+		"commits_over_time": [
+			{bucket: key, "count": commits} for key, commits, _, _ in rows["totals"]
+		],
+		"series": series,
+		"churn": [
+			{bucket: key, "insertions": insertions, "deletions": deletions}
+			for key, _, insertions, deletions in rows["totals"]
+		],
+		"hour_of_week": heatmap,
+	}
+
+
+def _summarize(
+	repo: git.Repo,
+	limit: int,
+	aggregate: bool = True,
+	after: str | None = None,
+	where: CommitFilter | None = None,
+) -> dict:
+	"""Metadata, activity and the newest ``limit`` commits from one index sync.
+
+	``after`` is a pagination cursor: commits start right after that sha.
+	``where`` filters the commits, not the metadata and activity.
+	"""
+	name = Path(repo.working_dir).name
 	if _is_empty(repo):
 		return {
+			"repo": {"name": name, "branch": None, "commit_count": 0, "contributors": []},
+			"activity": _empty_activity("week"),
+			"commits": [],
+		}
+
+	index = HistoryIndex(repo)
+	index.sync()
+	with metrics.phase("history"):
+		store = CommitStore(index.iter_commits(limit, after, where) if limit else ())
+	if not aggregate:
+		return {"commits": store}
+	with metrics.phase("history"):
+		commits = [_commit_dict(c) for c in store.records()]
+
+	activity = _activity(index)
+	per_author = activity["commits_per_author"]
+	return {
+		"repo": {
+			"name": name,
+			"branch": _branch_name(repo),
+			"commit_count": sum(per_author.values()),
+			"contributors": [{"name": a, "commits": n} for a, n in per_author.items()],
+		},
+		"activity": activity,
+		"commits": commits,
+	}
+
+
+def sync_index(path: str | Path) -> None:
+	"""Ingest any commits the history index of ``path`` doesn't cover yet."""
+	with _open_repo(path) as repo:
+		if not _is_empty(repo):
+			HistoryIndex(repo).sync()
+
+
+def get_history_shas(path: str | Path) -> list[str]:
+	"""Every commit sha of HEAD's history, newest first, in the timeline's order."""
+	with _open_repo(path) as repo:
+		if _is_empty(repo):
+			return []
+		index = HistoryIndex(repo)
+		index.sync()
+	with metrics.phase("history"):
+		return index.shas()
+
+
+def get_bootstrap(path: str | Path, limit: int = 500) -> dict:
+	"""Repo metadata, activity, the newest ``limit`` commits and HEAD's tree in one call."""
+	with _open_repo(path) as repo:
+		bootstrap = _summarize(repo, limit)
+		bootstrap["tree"] = _tree_at(repo, "HEAD")
+	return bootstrap
+
+
+def get_repo_summary(path: str | Path, limit: int = 100) -> dict:
+	"""One repository's share of a multi-repository view.
+
+	Author identities with their commit counts (for unifying contributors by
+	email), weekly commit counts and the newest ``limit`` commits.
+	"""
+	with _open_repo(path) as repo:
+		summary = {
+			"path": str(Path(repo.working_dir)),
 			"name": Path(repo.working_dir).name,
 			"branch": None,
+			"head": None,
 			"commit_count": 0,
-			"contributors": [],
+			"identities": [],
+			"weekly": [],
+			"commits": [],
 		}
+		if _is_empty(repo):
+			return summary
+		index = HistoryIndex(repo)
+		summary["head"] = index.sync()
+		summary["branch"] = _branch_name(repo)
 
-	try:
-		branch = repo.active_branch.name
-	except TypeError:
-		branch = str(repo.head.commit.hexsha[:8]) + " (detached)"
+	identities = index.contributors()
+	summary["commit_count"] = sum(n for _, _, n in identities)
+	summary["identities"] = [
+		{"email": email, "name": name, "commits": n} for email, name, n in identities
+	]
+	summary["weekly"] = _activity(index, "week", series_authors=0)["commits_over_time"]
+	summary["commits"] = [_commit_dict(rec) for rec in index.iter_commits(limit)]
+	return summary
 
-	contributors: dict[str, int] = defaultdict(int)
-	count = 0
-	for c in repo.iter_commits():
-		contributors[c.author.name] += 1
-		count += 1
 
-	contributor_list = [
-		{"name": name, "commits": commits}
-		for name, commits in sorted(contributors.items(), key=lambda x: -x[1])
-	]
+def get_repo_metadata(path: str | Path) -> dict:
+	with _open_repo(path) as repo:
+		return _summarize(repo, limit=0)["repo"]
+
+
+def _commit_filter(
+	author: str | None = None,
+	pathspec: str | None = None,
+	since: str | None = None,
+	until: str | None = None,
+) -> CommitFilter:
+	return CommitFilter(author, pathspec, _parse_time(since, "since"), _parse_time(until, "until"))
+
+
+def load_commits(
+	path: str | Path,
+	limit: int = 500,
+	after: str | None = None,
+	author: str | None = None,
+	pathspec: str | None = None,
+	since: str | None = None,
+	until: str | None = None,
+) -> CommitStore:
+	"""The newest ``limit`` commits (after the ``after`` cursor) in compact form.
+
+	Only commits whose author matches ``author``, that touch ``pathspec`` and were
+	committed between ``since`` and ``until`` (ISO 8601) are read; with a pathspec,
+	only the matching files are listed.
+	"""
+	where = _commit_filter(author, pathspec, since, until)
+	with _open_repo(path) as repo:
+		if _is_empty(repo):
+			return CommitStore()
+		return _summarize(repo, limit, aggregate=False, after=after, where=where)["commits"]
+
+
+def get_commits(
+	path: str | Path,
+	limit: int = 500,
+	after: str | None = None,
+	author: str | None = None,
+	pathspec: str | None = None,
+	since: str | None = None,
+	until: str | None = None,
+) -> list[dict]:
+	"""Commit dicts newest first, filtered as by :func:`load_commits`."""
+	store = load_commits(path, limit, after, author, pathspec, since, until)
+	return [_commit_dict(c) for c in store.records()]
+
+
+def get_commits_json(
+	path: str | Path,
+	limit: int = 500,
+	after: str | None = None,
+	author: str | None = None,
+	pathspec: str | None = None,
+	since: str | None = None,
+	until: str | None = None,
+) -> bytes:
+	"""Encoded ``get_commits`` result, serialised straight from the compact store."""
+	return _commits_json(load_commits(path, limit, after, author, pathspec, since, until))
+
+
+def get_commits_columnar(
+	path: str | Path,
+	limit: int = 500,
+	after: str | None = None,
+	author: str | None = None,
+	pathspec: str | None = None,
+	since: str | None = None,
+	until: str | None = None,
+) -> bytes:
+	"""``get_commits`` as a :mod:`git_viz.columnar` payload."""
+	store = load_commits(path, limit, after, author, pathspec, since, until)
+	with metrics.phase("encode"):
+		return columnar.encode_commits(store)
+
+
+def iter_commits(
+	path: str | Path,
+	limit: int = 500,
+	after: str | None = None,
+	author: str | None = None,
+	pathspec: str | None = None,
+	since: str | None = None,
+	until: str | None = None,
+) -> Iterator[dict]:
+	"""Yield commits one at a time, newest first, so callers can stream them.
+
+	When the index is cold the first page is read straight off ``git log`` rather
+	than waiting for the whole history to be ingested, with the filters passed
+	on to git so it skips non-matching commits itself.
+	"""
+	where = _commit_filter(author, pathspec, since, until)
+	with _open_repo(path) as repo:
+		if _is_empty(repo):
+			return
+		index = HistoryIndex(repo)
+		if after is None and not index.is_current():
+			records = iter_log(repo, "HEAD", limit, *where.log_args(), paths=where.pathspecs())
+			if where.pathspec is not None:
+				# --full-history also lists merges whose first-parent diff misses the paths
+				records = (c for c in records if c["files"])
+			for c in records:
+				yield _commit_dict(c)
+			return
+		index.sync()
+	# The index is read from SQLite alone, so a slow reader doesn't keep the handle
+	for c in index.iter_commits(limit, after, where):
+		yield _commit_dict(c)
 
+
+def _build_tree(tree: git.Tree) -> dict[str, int]:
+	"""Blob sizes under ``tree`` by path relative to it."""
+	offset = len(tree.path) + 1 if tree.path else 0
+	# GitPython decodes entry names with surrogateescape; spell them as log_stream does
 	return {
-		"name": Path(repo.working_dir).name,
-		"branch": branch,
-		"commit_count": count,
-		"contributors": contributor_list,
+		decode_path(blob.path[offset:].encode("utf-8", "surrogateescape")): blob.size
+		for blob in tree.traverse()
+		if blob.type == "blob"
 	}
 
 
-def get_commits(path: str | Path, limit: int = 500) -> list[dict]:
-	repo = _open_repo(path)
-	if _is_empty(repo):
-		return []
-
-	result = []
-	for c in repo.iter_commits(max_count=limit):
-		files = []
-		for fname, stat in c.stats.files.items():
-			files.append({
-				"path": fname,
-				"insertions": stat.get("insertions", 0),
-				"deletions": stat.get("deletions", 0),
-			})
-
-		result.append({
-			"hash": c.hexsha,
-			"author": c.author.name,
-			"email": c.author.email,
-			"date": datetime.fromtimestamp(c.committed_date, tz=timezone.utc).isoformat(),
-			"message": c.message.strip(),
-			"files": files,
-		})
-
-	return result
-
-
-def _build_tree(tree: git.Tree) -> dict:
-	result: dict[str, dict] = {}
-	for blob in tree.traverse():
-		if blob.type == "blob":
-			result[blob.path] = {
-				"type": "file",
-				"size": blob.size,
-			}
-	return result
-
+@metrics.phase("tree")
+def _tree_sizes(
+	repo: git.Repo, commit: str, where: CommitFilter | None = None
+) -> tuple[str | None, dict[str, int]]:
+	"""``commit`` resolved to a sha, and its blob sizes by path.
 
-def get_tree(path: str | Path, commit: str = "HEAD") -> dict:
-	repo = _open_repo(path)
+	With ``where``, the tree is that of the newest commit before its
+	``until`` (None if there is none) and only paths matching its pathspec are
+	listed; only the subtree the pathspec points into is read.
+	"""
 	if _is_empty(repo):
-		return {"commit": commit, "files": {}}
+		return commit, {}
 
 	try:
 		commit_obj = repo.commit(commit)
 	except (git.BadName, ValueError):
 		raise ValueError(f"Invalid commit reference: {commit}")
 
+	where = where or CommitFilter()
+	if where.until is not None:
+		# --until is inclusive; the filter's window is not
+		sha = repo.git.rev_list("-1", f"--until=@{where.until - 1}", commit_obj.hexsha)
+		if not sha:
+			return None, {}
+		commit_obj = repo.commit(sha)
+
+	directory = where.directory()
+	tree = commit_obj.tree
+	if directory:
+		try:
+			tree = tree / directory
+		except KeyError:
+			return commit_obj.hexsha, {}
+		if tree.type != "tree":
+			# The pathspec names a single file (or submodule)
+			sizes = {directory: tree.size} if tree.type == "blob" else {}
+			return commit_obj.hexsha, sizes
+
+	# Subtrees are cached under their own sha, with paths relative to them
+	index = HistoryIndex(repo)
+	sizes = index.tree(tree.hexsha)
+	if sizes is None:
+		sizes = _build_tree(tree)
+		index.store_tree(tree.hexsha, sizes)
+	if directory:
+		sizes = {f"{directory}/{p}": size for p, size in sizes.items()}
+	if where.is_glob:
+		sizes = {p: size for p, size in sizes.items() if where.matches_path(p)}
+	return commit_obj.hexsha, sizes
+
+
+def _tree_at(repo: git.Repo, commit: str, where: CommitFilter | None = None) -> dict:
+	sha, sizes = _tree_sizes(repo, commit, where)
 	return {
-		"commit": commit_obj.hexsha,
-		"files": _build_tree(commit_obj.tree),
+		"commit": sha,
+		"files": {p: {"type": "file", "size": size} for p, size in sizes.items()},
 	}
 
 
-def get_activity(path: str | Path) -> dict:
-	repo = _open_repo(path)
-	if _is_empty(repo):
-		return {"commits_per_author": {}, "commits_over_time": []}
+def get_tree(
+	path: str | Path,
+	commit: str = "HEAD",
+	pathspec: str | None = None,
+	until: str | None = None,
+) -> dict:
+	"""Blob sizes at ``commit``, or at its newest ancestor committed before ``until``.
 
-	commits_per_author: dict[str, int] = defaultdict(int)
-	weekly_buckets: dict[str, int] = defaultdict(int)
+	``pathspec`` limits the listing (and the traversal) to matching paths.
+	"""
+	where = CommitFilter(pathspec=pathspec, until=_parse_time(until, "until"))
+	with _open_repo(path) as repo:
+		return _tree_at(repo, commit, where)
 
-	for c in repo.iter_commits():
-		commits_per_author[c.author.name] += 1
-		dt = datetime.fromtimestamp(c.committed_date, tz=timezone.utc)
-		# ISO week bucket: YYYY-Www
-		week_key = f"{dt.isocalendar()[0]}-W{dt.isocalendar()[1]:02d}"
-		weekly_buckets[week_key] += 1
 
-	commits_over_time = [
-		{"week": week, "count": count}
-		for week, count in sorted(weekly_buckets.items())
-	]
+def get_tree_columnar(
+	path: str | Path,
+	commit: str = "HEAD",
+	pathspec: str | None = None,
+	until: str | None = None,
+) -> bytes:
+	"""``get_tree`` as a :mod:`git_viz.columnar` payload."""
+	where = CommitFilter(pathspec=pathspec, until=_parse_time(until, "until"))
+	with _open_repo(path) as repo:
+		sha, sizes = _tree_sizes(repo, commit, where)
+	with metrics.phase("encode"):
+		return columnar.encode_tree(sha, sizes)
+
+
+def get_clusters(
+	path: str | Path,
+	commit: str = "HEAD",
+	limit: int = 500,
+	expand: tuple[str, ...] = (),
+	max_nodes: int = DEFAULT_MAX_NODES,
+) -> dict:
+	"""The tree at ``commit`` as at most ``max_nodes`` directory clusters and files.
+
+	The ``expand`` directories are opened; everything else is rolled up into its
+	top-level directory. Churn and co-change edges cover HEAD's newest ``limit``
+	commits. See :mod:`git_viz.clusters`.
+	"""
+	with _open_repo(path) as repo:
+		if _is_empty(repo):
+			return {"commit": None, **directory_clusters({}, ())}
+		sha, sizes = _tree_sizes(repo, commit)
+		index = HistoryIndex(repo)
+		index.sync()
+	with metrics.phase("clusters"):
+		return {
+			"commit": sha,
+			**directory_clusters(
+				sizes, (c["files"] for c in index.iter_commits(limit)), expand, max_nodes
+			),
+		}
+
+
+@metrics.phase("tree_diff")
+def _blob_changes(
+	repo: git.Repo, pairs: list[tuple[str, str]]
+) -> tuple[dict[str, list], dict[str, int]]:
+	"""Blobs changed by each ``(commit, parent)`` pair, and the sizes of those blobs."""
+	changes = diff_pairs(repo, pairs)
+	sizes = blob_sizes(
+		repo,
+		(sha for entries in changes.values() for _, *blobs in entries for sha in blobs if sha),
+	)
+	return changes, sizes
+
+
+def _tree_deltas(
+	pairs: list[tuple[str, str]], changes: dict[str, list], sizes: dict[str, int]
+) -> list[dict]:
+	deltas = []
+	for commit, _ in pairs:
+		added: dict[str, int] = {}
+		removed: dict[str, int] = {}
+		resized: dict[str, list[int]] = {}
+		for fpath, old, new in changes.get(commit, ()):
+			if old is None:
+				added[fpath] = sizes[new]
+			elif new is None:
+				removed[fpath] = sizes[old]
+			elif sizes[old] != sizes[new]:
+				resized[fpath] = [sizes[old], sizes[new]]
+		deltas.append({"commit": commit, "added": added, "removed": removed, "resized": resized})
+	return deltas
+
+
+def get_tree_deltas(path: str | Path, limit: int = 500) -> dict:
+	"""HEAD's newest ``limit`` commits as a base tree plus one delta per later commit.
+
+	Commits run oldest first, the same order as the timeline. The base is the full
+	tree of the oldest one; each delta lists blobs added, removed or resized
+	relative to the commit before it, with the old sizes included so deltas can be
+	reverted when stepping backwards.
+	"""
+	with _open_repo(path) as repo:
+		if _is_empty(repo) or limit <= 0:
+			return {"base": None, "files": {}, "deltas": []}
+
+		index = HistoryIndex(repo)
+		index.sync()
+		sequence = index.shas(limit)[::-1]
+		base = _tree_at(repo, sequence[0])
+		pairs = list(zip(sequence[1:], sequence[:-1]))
+		changes, sizes = _blob_changes(repo, pairs)
+
+	files = {fpath: info["size"] for fpath, info in base["files"].items()}
+	return {"base": sequence[0], "files": files, "deltas": _tree_deltas(pairs, changes, sizes)}
+
+
+def get_history_chunk(
+	path: str | Path, after: str | None, count: int, before: str | None = None
+) -> dict:
+	"""``count`` commits of HEAD's history following the ``after`` cursor, with tree deltas.
+
+	Commits run newest first, as in ``get_commits``, and deltas oldest first, as in
+	``get_tree_deltas``. The oldest commit's delta is relative to ``before``, the
+	commit preceding the chunk in the same order; without it, that commit has none.
+	"""
+	with _open_repo(path) as repo:
+		if _is_empty(repo) or count <= 0:
+			return {"commits": [], "deltas": []}
+		index = HistoryIndex(repo)
+		index.sync()
+		with metrics.phase("history"):
+			records = list(index.iter_commits(count, after))
+		sequence = [rec["hash"] for rec in reversed(records)]
+		pairs = list(zip(sequence, [before, *sequence[:-1]]))
+		if before is None:
+			pairs = pairs[1:]
+		changes, sizes = _blob_changes(repo, pairs)
+
+	return {
+		"commits": [_commit_dict(rec) for rec in records],
+		"deltas": _tree_deltas(pairs, changes, sizes),
+	}
+
 
+def _activity_delta(records: list[dict], bucket: str = "week") -> dict:
+	"""What ``records`` add to :func:`_activity`'s counts, in the same shape."""
+	format_label = _BUCKET_LABELS[bucket]
+	per_author: dict[str, int] = {}
+	series: dict[str, dict[str, int]] = {}
+	totals: dict[str, list[int]] = {}
+	heatmap = [[0] * 24 for _ in range(7)]
+	for rec in records:
+		dt = datetime.fromtimestamp(rec["timestamp"], tz=timezone.utc)
+		key = format_label(dt)
+		author = rec["author"]
+		per_author[author] = per_author.get(author, 0) + 1
+		by_bucket = series.setdefault(author, {})
+		by_bucket[key] = by_bucket.get(key, 0) + 1
+		total = totals.setdefault(key, [0, 0, 0])
+		total[0] += 1
+		total[1] += sum(f["insertions"] for f in rec["files"])
+		total[2] += sum(f["deletions"] for f in rec["files"])
+		heatmap[dt.weekday()][dt.hour] += 1
 	return {
-		"commits_per_author": dict(commits_per_author),
-		"commits_over_time": commits_over_time,
+		"bucket": bucket,
+		"commits_per_author": per_author,
+		"commits_over_time": [
+			{bucket: key, "count": n} for key, (n, _, _) in sorted(totals.items())
+		],
+		"series": series,
+		"churn": [
+			{bucket: key, "insertions": ins, "deletions": dels}
+			for key, (_, ins, dels) in sorted(totals.items())
+		],
+		"hour_of_week": heatmap,
 	}
+
+
+def get_snapshot(path: str | Path, limit: int = 500) -> dict:
+	"""``get_bootstrap`` plus the HEAD sha it describes, the starting point for updates."""
+	with _open_repo(path) as repo:
+		snapshot = _summarize(repo, limit)
+		snapshot["tree"] = _tree_at(repo, "HEAD")
+		snapshot["head"] = None if _is_empty(repo) else HistoryIndex(repo).sync()
+	return snapshot
+
+
+def get_update(path: str | Path, since: str, head: str, limit: int = 500) -> dict:
+	"""The commits from ``since`` (exclusive) up to ``head``, with activity and tree deltas.
+
+	Commits run newest first and tree deltas oldest first, as in ``get_commits`` and
+	``get_tree_deltas``. ``reset`` is set instead, with no deltas, when ``since`` is
+	not an ancestor of ``head`` (history was rewritten) or more than ``limit``
+	commits separate them; clients should then load a fresh snapshot.
+	"""
+	reset = {"since": since, "head": head, "reset": True}
+	with _open_repo(path) as repo:
+		if _is_empty(repo):
+			return reset
+		index = HistoryIndex(repo)
+		index.sync()
+		# HEAD may have moved again since ``head`` was read; deltas stop at ``head``
+		skip, end = index.rank(head), index.rank(since)
+		if skip is None or end is None or not 0 <= end - skip <= limit:
+			return reset
+		records = list(itertools.islice(index.iter_commits(end), skip, None))
+		sequence = [since] + [rec["hash"] for rec in reversed(records)]
+		pairs = list(zip(sequence[1:], sequence[:-1]))
+		changes, sizes = _blob_changes(repo, pairs)
+
+	return {
+		"since": since,
+		"head": head,
+		"reset": False,
+		"commits": [_commit_dict(rec) for rec in records],
+		"activity": _activity_delta(records),
+		"tree": {"deltas": _tree_deltas(pairs, changes, sizes)},
+	}
+
+
+def _parse_time(value: str | None, name: str) -> int | None:
+	"""Unix timestamp for an ISO 8601 date or datetime; naive values are UTC."""
+	if value is None:
+		return None
+	try:
+		parsed = datetime.fromisoformat(value)
+	except ValueError:
+		raise ValueError(f"Invalid {name} timestamp: {value}")
+	if parsed.tzinfo is None:
+		parsed = parsed.replace(tzinfo=timezone.utc)
+	return int(parsed.timestamp())
+
+
+def get_cochange(
+	path: str | Path,
+	limit: int | None = 500,
+	since: str | None = None,
+	until: str | None = None,
+	max_files: int = DEFAULT_MAX_FILES,
+	min_support: int = DEFAULT_MIN_SUPPORT,
+	top_k: int = DEFAULT_TOP_K,
+) -> dict:
+	"""Pruned co-change edges over the newest ``limit`` commits in ``[since, until)``.
+
+	See :mod:`git_viz.cochange` for how ``max_files``, ``min_support`` and ``top_k``
+	bound the edge set.
+	"""
+	window = (_parse_time(since, "since"), _parse_time(until, "until"))
+	with _open_repo(path) as repo:
+		if _is_empty(repo) or limit == 0:
+			return cochange_edges([])
+		index = HistoryIndex(repo)
+		index.sync()
+	with metrics.phase("cochange"):
+		return cochange_edges(
+			(paths for _, paths in index.commit_paths(limit, *window)),
+			max_files=max_files,
+			min_support=min_support,
+			top_k=top_k,
+		)
+
+
+def get_layout(
+	path: str | Path,
+	limit: int = 500,
+	keyframes: int = 20,
+	path_filter: str | None = None,
+	max_nodes: int = DEFAULT_LAYOUT_NODES,
+) -> dict:
+	"""Graph layouts at evenly spaced keyframes of the newest ``limit`` commits.
+
+	Keyframes are indexed like the timeline, oldest commit first, and the last one is
+	always the newest commit. Each layout covers the co-change graph of every commit
+	up to its keyframe (files whose path contains ``path_filter``, case-insensitively),
+	limited to the ``max_nodes`` most strongly linked files; files without edges are
+	left out. Each is warm-started from the one before, so positions drift rather
+	than jump and the browser can interpolate between them. Coordinates are centred
+	on the origin.
+	"""
+	with _open_repo(path) as repo:
+		if _is_empty(repo) or limit <= 0 or keyframes <= 0:
+			return {"keyframes": []}
+		index = HistoryIndex(repo)
+		index.sync()
+	sequence = list(index.commit_paths(limit))[::-1]
+	count = min(keyframes, len(sequence))
+	stops = sorted({round((i + 1) * len(sequence) / count) - 1 for i in range(count)})
+	needle = (path_filter or "").lower()
+
+	def graphs():
+		counts = CoChangeCounts()
+		remaining = iter(stops)
+		stop = next(remaining)
+		for i, (_, touched) in enumerate(sequence):
+			counts.add(touched)
+			if i == stop:
+				edges = [
+					edge
+					for edge in counts.edges()
+					if needle in edge[0].lower() and needle in edge[1].lower()
+				]
+				yield strongest_nodes(edges, max_nodes), edges
+				stop = next(remaining, None)
+
+	with metrics.phase("layout"):
+		layouts = layout_sequence(graphs())
+	return {
+		"keyframes": [
+			{
+				"index": i,
+				"commit": sequence[i][0],
+				"positions": {p: [round(x, 1), round(y, 1)] for p, (x, y) in layout.items()},
+			}
+			for i, layout in zip(stops, layouts)
+		]
+	}
+
+
+def get_activity(
+	path: str | Path,
+	bucket: str = "week",
+	since: str | None = None,
+	until: str | None = None,
+	series_authors: int = 10,
+	author: str | None = None,
+	pathspec: str | None = None,
+) -> dict:
+	"""Commit counts, per-author series, churn and an hour-of-week heatmap (all UTC).
+
+	``bucket`` is ``day``, ``week`` (ISO) or ``month``; ``since``/``until`` are ISO 8601
+	and bound the window at whole-day granularity. ``author`` and ``pathspec``
+	restrict it to matching commits, with churn counted in matching files only.
+	"""
+	if bucket not in _BUCKET_LABELS:
+		raise ValueError(f"Invalid bucket: {bucket} (expected day, week or month)")
+	window = (_parse_time(since, "since"), _parse_time(until, "until"))
+	where = CommitFilter(author, pathspec)
+	with _open_repo(path) as repo:
+		if _is_empty(repo):
+			return _empty_activity(bucket)
+		index = HistoryIndex(repo)
+		index.sync()
+	return _activity(index, bucket, *window, series_authors, where)
+
+
+def get_hotspots(
+	path: str | Path, metric: str = "churn", limit: int = 50, pathspec: str | None = None
+) -> dict:
+	"""The ``limit`` files with the highest ``metric`` over HEAD's whole history.
+
+	``metric`` is one of :data:`git_viz.hotspots.METRICS`. Each file comes with its
+	totals, the paths it was renamed from and its top authors; ``pathspec`` limits
+	the files considered.
+	"""
+	if metric not in hotspots.METRICS:
+		raise ValueError(
+			f"Invalid metric: {metric} (expected one of {', '.join(hotspots.METRICS)})"
+		)
+	with _open_repo(path) as repo:
+		if _is_empty(repo):
+			return {"metric": metric, "files": []}
+		index = HistoryIndex(repo)
+		index.sync()
+	with metrics.phase("hotspots"):
+		return {
+			"metric": metric,
+			"files": index.hotspots(metric, limit, CommitFilter(pathspec=pathspec)),
+		}
@@ -0,0 +1,562 @@
+"""Persistent commit-history index, one SQLite file per (repo, ref).
+
+The index stores per-commit author, timestamp, parents and file stats so the API
+can answer from SQL instead of walking history. Activity is also rolled up as
+commits are ingested (per author and UTC day, per day, per author, per day and
+hour, per hour of the week), so analytics read a handful of small tables rather
+than every commit, and so are per-file churn and ownership (see
+:mod:`git_viz.hotspots`). When the ref moves forward only
+the new commits are ingested; when the old tip is no longer an ancestor of the
+new one (force-push, rebase, reset) the index is rebuilt from scratch.
+"""
+
+import hashlib
+import itertools
+import os
+import sqlite3
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import closing, contextmanager
+from pathlib import Path
+
+import git
+
+from . import hotspots, metrics
+from .filters import CommitFilter
+from .log_stream import iter_log, iter_renames
+
+CACHE_DIR_ENV = "GIT_VIZ_CACHE_DIR"
+SCHEMA_VERSION = "3"
+# Trees are content-addressed and never go stale, but only the most recently
+# requested ones are worth keeping on disk.
+MAX_CACHED_TREES = 16
+
+_SCHEMA = (
+	"""
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS commits (
+	id INTEGER PRIMARY KEY,
+	ord INTEGER NOT NULL UNIQUE,
+	sha TEXT NOT NULL UNIQUE,
+	parents TEXT NOT NULL,
+	author TEXT NOT NULL,
+	email TEXT NOT NULL,
+	committed INTEGER NOT NULL,
+	message TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+	id INTEGER PRIMARY KEY,
+	commit_id INTEGER NOT NULL,
+	path TEXT NOT NULL,
+	insertions INTEGER NOT NULL,
+	deletions INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_commit ON files (commit_id);
+CREATE TABLE IF NOT EXISTS activity_days (
+	author TEXT NOT NULL,
+	day INTEGER NOT NULL,
+	commits INTEGER NOT NULL,
+	insertions INTEGER NOT NULL,
+	deletions INTEGER NOT NULL,
+	newest INTEGER NOT NULL,
+	PRIMARY KEY (author, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS activity_days_day ON activity_days (day);
+CREATE TABLE IF NOT EXISTS activity_totals (
+	day INTEGER PRIMARY KEY,
+	commits INTEGER NOT NULL,
+	insertions INTEGER NOT NULL,
+	deletions INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS activity_authors (
+	author TEXT PRIMARY KEY,
+	commits INTEGER NOT NULL,
+	newest INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS activity_hours (
+	day INTEGER NOT NULL,
+	hour INTEGER NOT NULL,
+	commits INTEGER NOT NULL,
+	PRIMARY KEY (day, hour)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS activity_week_hours (
+	weekday INTEGER NOT NULL,
+	hour INTEGER NOT NULL,
+	commits INTEGER NOT NULL,
+	PRIMARY KEY (weekday, hour)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS trees (sha TEXT PRIMARY KEY, last_used INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS tree_files (
+	tree TEXT NOT NULL,
+	path TEXT NOT NULL,
+	size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tree_files_tree ON tree_files (tree);
+"""
+	+ hotspots.SCHEMA
+)
+
+_ROLLUPS = (
+	"activity_days",
+	"activity_totals",
+	"activity_authors",
+	"activity_hours",
+	"activity_week_hours",
+)
+
+# Folds temp.new_activity (one row per new commit) into each rollup. Run as separate
+# statements: executescript() would commit the ingest transaction half-way. The
+# SELECTs need a WHERE clause for SQLite's upsert grammar.
+_ROLL_UP = (
+	"""INSERT INTO activity_days (author, day, commits, insertions, deletions, newest)
+	SELECT author, day, COUNT(*), SUM(insertions), SUM(deletions), MIN(ord)
+	FROM new_activity WHERE true GROUP BY author, day
+	ON CONFLICT (author, day) DO UPDATE SET
+		commits = commits + excluded.commits,
+		insertions = insertions + excluded.insertions,
+		deletions = deletions + excluded.deletions,
+		newest = MIN(newest, excluded.newest)""",
+	"""INSERT INTO activity_totals (day, commits, insertions, deletions)
+	SELECT day, COUNT(*), SUM(insertions), SUM(deletions)
+	FROM new_activity WHERE true GROUP BY day
+	ON CONFLICT (day) DO UPDATE SET
+		commits = commits + excluded.commits,
+		insertions = insertions + excluded.insertions,
+		deletions = deletions + excluded.deletions""",
+	"""INSERT INTO activity_authors (author, commits, newest)
+	SELECT author, COUNT(*), MIN(ord) FROM new_activity WHERE true GROUP BY author
+	ON CONFLICT (author) DO UPDATE SET
+		commits = commits + excluded.commits,
+		newest = MIN(newest, excluded.newest)""",
+	"""INSERT INTO activity_hours (day, hour, commits)
+	SELECT day, hour, COUNT(*) FROM new_activity WHERE true GROUP BY day, hour
+	ON CONFLICT (day, hour) DO UPDATE SET commits = commits + excluded.commits""",
+	# 1970-01-01 was a Thursday; weekday 0 is Monday
+	"""INSERT INTO activity_week_hours (weekday, hour, commits)
+	SELECT (day + 3) % 7, hour, COUNT(*) FROM new_activity WHERE true GROUP BY 1, 2
+	ON CONFLICT (weekday, hour) DO UPDATE SET commits = commits + excluded.commits""",
+)
+
+_sync_locks: dict[Path, threading.Lock] = {}
+_sync_locks_guard = threading.Lock()
+
+
+def cache_dir() -> Path:
+	override = os.environ.get(CACHE_DIR_ENV)
+	if override:
+		return Path(override).expanduser()
+	base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+	return Path(base) / "git-viz"
+
+
+def _sync_lock(db_path: Path) -> threading.Lock:
+	with _sync_locks_guard:
+		return _sync_locks.setdefault(db_path, threading.Lock())
+
+
+@contextmanager
+def _unless_locked(conn: sqlite3.Connection) -> Iterator[None]:
+	"""Skip the block's writes, rather than wait, while another connection holds the write lock."""
+	conn.execute("PRAGMA busy_timeout = 0")
+	try:
+		yield
+	except sqlite3.OperationalError as e:
+		if "locked" not in str(e) and "busy" not in str(e):
+			raise
+
+
+class HistoryIndex:
+	"""Commit history of ``repo``'s current HEAD ref, cached on disk."""
+
+	def __init__(self, repo: git.Repo):
+		self.repo = repo
+		self.ref = "HEAD" if repo.head.is_detached else repo.head.ref.path
+		key = hashlib.sha1(f"{repo.git_dir}\0{self.ref}".encode()).hexdigest()[:24]
+		self.db_path = cache_dir() / f"{key}.sqlite3"
+
+	def _connect(self) -> sqlite3.Connection:
+		self.db_path.parent.mkdir(parents=True, exist_ok=True)
+		# Connections are never shared, but a streaming iter_commits() generator may be
+		# resumed from a different worker thread than the one that opened it
+		conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+		conn.execute("PRAGMA journal_mode=WAL")
+		conn.execute("PRAGMA synchronous=NORMAL")
+		conn.executescript(_SCHEMA)
+		return conn
+
+	# --- ingestion ---
+
+	@metrics.phase("sync")
+	def sync(self) -> str:
+		"""Bring the index up to date with the ref's tip and return the tip sha."""
+		tip = self.repo.head.commit.hexsha
+		with _sync_lock(self.db_path), closing(self._connect()) as conn:
+			# Other processes (the multi-repo workers) may sync the same index, so the
+			# stored tip is read under SQLite's write lock rather than just our own
+			conn.execute("BEGIN IMMEDIATE")
+			meta = dict(conn.execute("SELECT key, value FROM meta"))
+			if meta and meta.get("version") != SCHEMA_VERSION:
+				for (table,) in conn.execute(
+					"SELECT name FROM sqlite_master WHERE type = 'table'"
+				).fetchall():
+					conn.execute(f"DROP TABLE {table}")
+				# executescript() commits first, so take the lock again afterwards
+				conn.executescript(_SCHEMA)
+				conn.execute("BEGIN IMMEDIATE")
+				meta = {}
+			stored = meta.get("tip")
+			if stored == tip:
+				conn.rollback()
+				return tip
+			with conn:
+				if stored and self._is_ancestor(stored, tip):
+					new = f"{stored}..{tip}"
+					self._ingest(conn, iter_log(self.repo, new), iter_renames(self.repo, new))
+				else:
+					for table in ("files", "commits", *_ROLLUPS, *hotspots.TABLES):
+						conn.execute(f"DELETE FROM {table}")
+					self._ingest(conn, iter_log(self.repo, tip), iter_renames(self.repo, tip))
+				conn.executemany(
+					"INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+					[
+						("version", SCHEMA_VERSION),
+						("repo", str(self.repo.git_dir)),
+						("ref", self.ref),
+						("tip", tip),
+					],
+				)
+		return tip
+
+	def _is_ancestor(self, ancestor: str, descendant: str) -> bool:
+		try:
+			return self.repo.is_ancestor(ancestor, descendant)
+		except git.GitCommandError:
+			# The old tip is gone entirely, e.g. after a gc following a force-push
+			return False
+
+	def _ingest(
+		self,
+		conn: sqlite3.Connection,
+		records: Iterable[dict],
+		renames: Iterable[tuple[str, list[tuple[str, str]], list[str]]] = (),
+	) -> None:
+		# ``ord`` orders commits newest first. New commits arrive newest first and
+		# must sort before everything already stored, so they are numbered 0..n-1
+		# on insert and then shifted below the previous minimum in one update.
+		(first_new_id,) = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM commits").fetchone()
+		(min_ord,) = conn.execute("SELECT COALESCE(MIN(ord), 0) FROM commits").fetchone()
+		offset = 1 << 40
+		count = 0
+		for rec in records:
+			cur = conn.execute(
+				"INSERT INTO commits (ord, sha, parents, author, email, committed, message)"
+				" VALUES (?, ?, ?, ?, ?, ?, ?)",
+				(
+					offset + count,
+					rec["hash"],
+					" ".join(rec["parents"]),
+					rec["author"],
+					rec["email"],
+					rec["timestamp"],
+					rec["message"],
+				),
+			)
+			conn.executemany(
+				"INSERT INTO files (commit_id, path, insertions, deletions) VALUES (?, ?, ?, ?)",
+				[(cur.lastrowid, f["path"], f["insertions"], f["deletions"]) for f in rec["files"]],
+			)
+			count += 1
+		conn.execute(
+			"UPDATE commits SET ord = ord - ? WHERE id >= ?",
+			(offset - (min_ord - count), first_new_id),
+		)
+		self._roll_up(conn, first_new_id)
+		hotspots.update(conn, first_new_id, renames)
+
+	def _roll_up(self, conn: sqlite3.Connection, first_new_id: int) -> None:
+		# Per-commit churn and UTC day/hour for the new commits
+		conn.execute("DROP TABLE IF EXISTS temp.new_activity")
+		conn.execute(
+			"CREATE TEMP TABLE new_activity AS"
+			" SELECT c.author, c.committed / 86400 AS day, c.committed % 86400 / 3600 AS hour,"
+			" c.ord, COALESCE(f.insertions, 0) AS insertions, COALESCE(f.deletions, 0) AS deletions"
+			" FROM commits AS c LEFT JOIN ("
+			"  SELECT commit_id, SUM(insertions) AS insertions, SUM(deletions) AS deletions"
+			"  FROM files WHERE commit_id >= ? GROUP BY commit_id"
+			" ) AS f ON f.commit_id = c.id"
+			" WHERE c.id >= ?",
+			(first_new_id, first_new_id),
+		)
+		for statement in _ROLL_UP:
+			conn.execute(statement)
+		conn.execute("DROP TABLE temp.new_activity")
+
+	# --- queries ---
+
+	def commit_count(self) -> int:
+		with closing(self._connect()) as conn:
+			(count,) = conn.execute("SELECT COUNT(*) FROM commits").fetchone()
+		return count
+
+	def activity(
+		self,
+		label: Callable[[int], str],
+		since_day: int | None = None,
+		until_day: int | None = None,
+		series_authors: int = 10,
+		where: CommitFilter | None = None,
+	) -> dict[str, list[tuple]]:
+		"""Rolled-up activity for UTC days in ``[since_day, until_day)``.
+
+		``label`` maps a day number to its bucket. Returns rows keyed by
+		``authors`` ``(author, commits, newest ord)`` ranked most commits first,
+		``totals`` ``(bucket, commits, insertions, deletions)``, ``series``
+		``(author, bucket, commits)`` for the top ``series_authors`` authors and
+		``hours`` ``(weekday, hour, commits)`` with weekday 0 being Monday.
+
+		With an author or pathspec in ``where``, the rollups are rebuilt in temp
+		tables from just the matching commits, counting lines in matching files
+		only; its ``since``/``until`` are ignored in favour of the day window.
+		"""
+		filtered = where is not None and (where.author is not None or where.pathspec is not None)
+		windowed = filtered or since_day is not None or until_day is not None
+		window = (
+			-(1 << 62) if since_day is None else since_day,
+			1 << 62 if until_day is None else until_day,
+		)
+		days_table, totals_table, hours_table = (
+			("filtered_days", "filtered_totals", "filtered_hours")
+			if filtered
+			else ("activity_days", "activity_totals", "activity_hours")
+		)
+		with closing(self._connect()) as conn:
+			if filtered:
+				self._filtered_rollups(conn, where)
+			if windowed:
+				authors = conn.execute(
+					f"SELECT author, SUM(commits), MIN(newest) FROM {days_table}"
+					" WHERE day >= ? AND day < ? GROUP BY author",
+					window,
+				).fetchall()
+				hours = conn.execute(
+					f"SELECT (day + 3) % 7 AS weekday, hour, SUM(commits) FROM {hours_table}"
+					" WHERE day >= ? AND day < ? GROUP BY weekday, hour",
+					window,
+				).fetchall()
+			else:
+				authors = conn.execute(
+					"SELECT author, commits, newest FROM activity_authors"
+				).fetchall()
+				hours = conn.execute(
+					"SELECT weekday, hour, commits FROM activity_week_hours"
+				).fetchall()
+			# Most commits first; ties go to whoever committed most recently
+			authors.sort(key=lambda row: (-row[1], row[2]))
+
+			# Bucketing runs once per distinct day; the sums stay in SQL
+			days = conn.execute(
+				f"SELECT day FROM {totals_table} WHERE day >= ? AND day < ?", window
+			).fetchall()
+			conn.execute(
+				"CREATE TEMP TABLE day_buckets (day INTEGER PRIMARY KEY, bucket TEXT NOT NULL)"
+			)
+			conn.executemany(
+				"INSERT INTO day_buckets (day, bucket) VALUES (?, ?)",
+				[(day, label(day)) for (day,) in days],
+			)
+			totals = conn.execute(
+				"SELECT b.bucket, SUM(t.commits), SUM(t.insertions), SUM(t.deletions)"
+				f" FROM {totals_table} AS t JOIN day_buckets AS b ON b.day = t.day"
+				" GROUP BY b.bucket ORDER BY b.bucket"
+			).fetchall()
+			top = [author for author, _, _ in authors[:series_authors]]
+			series = conn.execute(
+				"SELECT a.author, b.bucket, SUM(a.commits)"
+				f" FROM {days_table} AS a JOIN day_buckets AS b ON b.day = a.day"
+				f" WHERE a.author IN ({', '.join('?' * len(top))})"
+				" GROUP BY a.author, b.bucket ORDER BY b.bucket",
+				top,
+			).fetchall()
+		return {"authors": authors, "totals": totals, "series": series, "hours": hours}
+
+	def _filtered_rollups(self, conn: sqlite3.Connection, where: CommitFilter) -> None:
+		"""The per-day rollups of commits matching ``where``, as connection-local temp tables."""
+		where = CommitFilter(where.author, where.pathspec)
+		commit_sql, commit_params = where.commit_sql("c")
+		file_sql, file_params = where.path_sql("f.path")
+		conn.execute(
+			"CREATE TEMP TABLE filtered AS SELECT c.author, c.committed / 86400 AS day,"
+			" c.committed % 86400 / 3600 AS hour, c.ord,"
+			" COALESCE(SUM(f.insertions), 0) AS insertions,"
+			" COALESCE(SUM(f.deletions), 0) AS deletions"
+			f" FROM commits AS c LEFT JOIN files AS f ON f.commit_id = c.id AND {file_sql}"
+			f" WHERE {commit_sql} GROUP BY c.id",
+			(*file_params, *commit_params),
+		)
+		conn.execute(
+			"CREATE TEMP TABLE filtered_days AS SELECT author, day, COUNT(*) AS commits,"
+			" SUM(insertions) AS insertions, SUM(deletions) AS deletions, MIN(ord) AS newest"
+			" FROM filtered GROUP BY author, day"
+		)
+		conn.execute(
+			"CREATE TEMP TABLE filtered_totals AS SELECT day, COUNT(*) AS commits,"
+			" SUM(insertions) AS insertions, SUM(deletions) AS deletions"
+			" FROM filtered GROUP BY day"
+		)
+		conn.execute(
+			"CREATE TEMP TABLE filtered_hours AS SELECT day, hour, COUNT(*) AS commits"
+			" FROM filtered GROUP BY day, hour"
+		)
+
+	def is_current(self) -> bool:
+		"""Whether the index already covers the ref's current tip."""
+		with closing(self._connect()) as conn:
+			row = conn.execute("SELECT value FROM meta WHERE key = 'tip'").fetchone()
+		return row is not None and row[0] == self.repo.head.commit.hexsha
+
+	def shas(self, limit: int | None = None) -> list[str]:
+		"""Commit shas newest first."""
+		with closing(self._connect()) as conn:
+			rows = conn.execute(
+				"SELECT sha FROM commits ORDER BY ord LIMIT ?", (-1 if limit is None else limit,)
+			)
+			return [sha for (sha,) in rows]
+
+	def contributors(self) -> list[tuple[str, str, int]]:
+		"""``(email, name, commits)`` for each author identity, most commits first."""
+		with closing(self._connect()) as conn:
+			return conn.execute(
+				"SELECT email, author, COUNT(*) AS n FROM commits"
+				" GROUP BY email, author ORDER BY n DESC, email, author"
+			).fetchall()
+
+	def hotspots(
+		self, metric: str = "churn", limit: int = 50, where: CommitFilter | None = None
+	) -> list[dict]:
+		"""The ``limit`` files with the highest ``metric`` (one of :data:`hotspots.METRICS`).
+
+		``where`` may narrow them with a pathspec; its other filters don't apply.
+		"""
+		with closing(self._connect()) as conn:
+			return list(hotspots.ranked(conn, metric, limit, where))
+
+	def rank(self, sha: str) -> int | None:
+		"""How many indexed commits are newer than ``sha``, or None if it isn't indexed."""
+		with closing(self._connect()) as conn:
+			row = conn.execute("SELECT ord FROM commits WHERE sha = ?", (sha,)).fetchone()
+			if row is None:
+				return None
+			(count,) = conn.execute("SELECT COUNT(*) FROM commits WHERE ord < ?", row).fetchone()
+		return count
+
+	def iter_commits(
+		self, limit: int | None = None, after: str | None = None, where: CommitFilter | None = None
+	) -> Iterator[dict]:
+		"""Yield commit records newest first, in the shape produced by ``iter_log``.
+
+		With ``after``, start with the commit following that sha in index order.
+		``where`` selects commits in SQL; with a pathspec, only the matching files
+		are listed, as ``git log -- <pathspec>`` would.
+		"""
+		limit = -1 if limit is None else limit
+		where = where or CommitFilter()
+		commit_sql, commit_params = where.commit_sql("c")
+		file_sql, file_params = where.path_sql("f.path")
+		with closing(self._connect()) as conn:
+			start = -(1 << 62)
+			if after is not None:
+				row = conn.execute("SELECT ord FROM commits WHERE sha = ?", (after,)).fetchone()
+				if row is None:
+					raise ValueError(f"Unknown commit cursor: {after}")
+				start = row[0]
+			rows = conn.execute(
+				"SELECT c.sha, c.parents, c.author, c.email, c.committed, c.message,"
+				" f.path, f.insertions, f.deletions"
+				" FROM (SELECT * FROM commits AS c WHERE c.ord > ? AND "
+				+ commit_sql
+				+ " ORDER BY c.ord LIMIT ?) AS c"
+				" LEFT JOIN files AS f ON f.commit_id = c.id AND "
+				+ file_sql
+				+ " ORDER BY c.ord, f.id",
+				(start, *commit_params, limit, *file_params),
+			)
+			current = None
+			for sha, parents, author, email, committed, message, fpath, ins, dels in rows:
+				if current is None or current["hash"] != sha:
+					if current is not None:
+						yield current
+					current = {
+						"hash": sha,
+						"parents": parents.split(),
+						"author": author,
+						"email": email,
+						"timestamp": committed,
+						"message": message,
+						"files": [],
+					}
+				if fpath is not None:
+					current["files"].append({"path": fpath, "insertions": ins, "deletions": dels})
+			if current is not None:
+				yield current
+
+	def commit_paths(
+		self, limit: int | None = None, since: int | None = None, until: int | None = None
+	) -> Iterator[tuple[str, list[str]]]:
+		"""``(sha, paths touched)`` for the newest ``limit`` commits in ``[since, until)``.
+
+		Commits come newest first, like :meth:`iter_commits`.
+		"""
+		with closing(self._connect()) as conn:
+			rows = conn.execute(
+				"SELECT c.sha, f.path"
+				" FROM (SELECT id, ord, sha FROM commits WHERE committed >= ? AND committed < ?"
+				" ORDER BY ord LIMIT ?) AS c"
+				" LEFT JOIN files AS f ON f.commit_id = c.id"
+				" ORDER BY c.ord",
+				(
+					-(1 << 62) if since is None else since,
+					1 << 62 if until is None else until,
+					-1 if limit is None else limit,
+				),
+			)
+			for sha, group in itertools.groupby(rows, key=lambda row: row[0]):
+				yield sha, [path for _, path in group if path is not None]
+
+	# --- tree cache ---
+
+	def tree(self, tree_sha: str) -> dict[str, int] | None:
+		"""Cached ``{path: size}`` for a tree object, or None if not cached."""
+		with closing(self._connect()) as conn:
+			if conn.execute("SELECT 1 FROM trees WHERE sha = ?", (tree_sha,)).fetchone() is None:
+				return None
+			files = dict(
+				conn.execute("SELECT path, size FROM tree_files WHERE tree = ?", (tree_sha,))
+			)
+			# Recency only steers eviction, so it isn't worth waiting on a sync for
+			with _unless_locked(conn), conn:
+				conn.execute(
+					"UPDATE trees SET last_used = (SELECT COALESCE(MAX(last_used), 0) + 1 FROM trees)"
+					" WHERE sha = ?",
+					(tree_sha,),
+				)
+		return files
+
+	def store_tree(self, tree_sha: str, files: dict[str, int]) -> None:
+		"""Cache ``files`` for a tree object, unless a sync holds the index right now."""
+		with closing(self._connect()) as conn, _unless_locked(conn), conn:
+			conn.execute(
+				"INSERT OR REPLACE INTO trees (sha, last_used)"
+				" VALUES (?, (SELECT COALESCE(MAX(last_used), 0) + 1 FROM trees))",
+				(tree_sha,),
+			)
+			conn.execute("DELETE FROM tree_files WHERE tree = ?", (tree_sha,))
+			conn.executemany(
+				"INSERT INTO tree_files (tree, path, size) VALUES (?, ?, ?)",
+				[(tree_sha, p, size) for p, size in files.items()],
+			)
+			stale = conn.execute(
+				"SELECT sha FROM trees ORDER BY last_used DESC LIMIT -1 OFFSET ?",
+				(MAX_CACHED_TREES,),
+			).fetchall()
+			conn.executemany("DELETE FROM tree_files WHERE tree = ?", stale)
+			conn.executemany("DELETE FROM trees WHERE sha = ?", stale)
@@ -0,0 +1,248 @@
+"""Per-file churn, change frequency and ownership, kept up to date as commits are ingested.
+
+Every file in the history index has a row of totals over the commits that
+touched it: commits, lines inserted and deleted, distinct authors, the share of
+its commits made by its most frequent author (its ownership) and when it last
+changed, plus per-author commit and line counts. New commits are applied oldest
+first. Renames, detected as ``git log -M`` does, move a file's row to its new
+path and keep its history; a deleted file's row is dropped. Rows are indexed by
+each metric, so the top files by any of them are a short index scan.
+"""
+
+import itertools
+import sqlite3
+from collections.abc import Iterable, Iterator
+
+from .filters import CommitFilter
+
+# Files can be ranked by each of these columns, and each has an index
+METRICS = ("churn", "commits", "insertions", "deletions", "authors", "ownership", "last_modified")
+TOP_AUTHORS = 3
+# Rows held in memory while a batch is applied before they are written back
+FLUSH_ROWS = 50_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hotspots (
+	path TEXT PRIMARY KEY,
+	commits INTEGER NOT NULL,
+	insertions INTEGER NOT NULL,
+	deletions INTEGER NOT NULL,
+	churn INTEGER NOT NULL,
+	authors INTEGER NOT NULL,
+	ownership REAL NOT NULL,
+	last_modified INTEGER NOT NULL,
+	previous TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS hotspot_authors (
+	path TEXT NOT NULL,
+	author TEXT NOT NULL,
+	commits INTEGER NOT NULL,
+	churn INTEGER NOT NULL,
+	PRIMARY KEY (path, author)
+) WITHOUT ROWID;
+""" + "".join(
+	f"CREATE INDEX IF NOT EXISTS hotspots_{column} ON hotspots ({column});\n" for column in METRICS
+)
+
+TABLES = ("hotspots", "hotspot_authors")
+
+
+class _Row:
+	__slots__ = ("authors", "commits", "deletions", "insertions", "last_modified", "previous")
+
+	def __init__(self):
+		self.commits = self.insertions = self.deletions = self.last_modified = 0
+		# Earlier paths, most recent first
+		self.previous: list[str] = []
+		# author -> [commits, lines changed]
+		self.authors: dict[str, list[int]] = {}
+
+	def merge(self, other: "_Row") -> None:
+		self.commits += other.commits
+		self.insertions += other.insertions
+		self.deletions += other.deletions
+		self.last_modified = max(self.last_modified, other.last_modified)
+		for author, (commits, churn) in other.authors.items():
+			counts = self.authors.setdefault(author, [0, 0])
+			counts[0] += commits
+			counts[1] += churn
+
+
+class HotspotUpdate:
+	"""Applies new commits to the hotspot tables on ``conn``, oldest commit first.
+
+	Rows are read on first use and written back by :meth:`flush`.
+	"""
+
+	def __init__(self, conn: sqlite3.Connection):
+		self.conn = conn
+		# path -> row, or None for a path with no row any more
+		self.rows: dict[str, _Row | None] = {}
+		(self.empty,) = conn.execute("SELECT NOT EXISTS (SELECT 1 FROM hotspots)").fetchone()
+
+	def _row(self, path: str) -> _Row | None:
+		if path not in self.rows:
+			self.rows[path] = None if self.empty else self._load(path)
+		return self.rows[path]
+
+	def _load(self, path: str) -> _Row | None:
+		found = self.conn.execute(
+			"SELECT commits, insertions, deletions, last_modified, previous FROM hotspots"
+			" WHERE path = ?",
+			(path,),
+		).fetchone()
+		if found is None:
+			return None
+		row = _Row()
+		row.commits, row.insertions, row.deletions, row.last_modified, previous = found
+		row.previous = previous.split("\n") if previous else []
+		row.authors = {
+			author: [commits, churn]
+			for author, commits, churn in self.conn.execute(
+				"SELECT author, commits, churn FROM hotspot_authors WHERE path = ?", (path,)
+			)
+		}
+		return row
+
+	def apply(
+		self,
+		author: str,
+		timestamp: int,
+		files: Iterable[tuple[str, int, int]],
+		renames: Iterable[tuple[str, str]] = (),
+		deleted: Iterable[str] = (),
+	) -> None:
+		"""One commit: ``files`` as ``(path, insertions, deletions)``, then its renames and deletions."""
+		renamed = dict(renames)
+		for old, new in renamed.items():
+			moved = self._row(old)
+			self.rows[old] = None
+			if moved is None:
+				continue
+			target = self._row(new)
+			if target is not None:
+				# The new path had a history of its own, e.g. a file that was replaced
+				moved.merge(target)
+			moved.previous = [old, *(p for p in moved.previous if p != new)]
+			self.rows[new] = moved
+
+		# A rename lists the old path as deleted and the new one as added; both count
+		# once, towards the new path
+		touched: dict[str, list[int]] = {}
+		for path, insertions, deletions in files:
+			counts = touched.setdefault(renamed.get(path, path), [0, 0])
+			counts[0] += insertions
+			counts[1] += deletions
+		gone = set(deleted)
+		for path, (insertions, deletions) in touched.items():
+			if path in gone:
+				continue
+			row = self._row(path)
+			if row is None:
+				row = self.rows[path] = _Row()
+			row.commits += 1
+			row.insertions += insertions
+			row.deletions += deletions
+			row.last_modified = max(row.last_modified, timestamp)
+			counts = row.authors.setdefault(author, [0, 0])
+			counts[0] += 1
+			counts[1] += insertions + deletions
+		for path in gone:
+			self.rows[path] = None
+
+		if len(self.rows) >= FLUSH_ROWS:
+			self.flush()
+
+	def flush(self) -> None:
+		stale = [(path,) for path in self.rows]
+		self.conn.executemany("DELETE FROM hotspots WHERE path = ?", stale)
+		self.conn.executemany("DELETE FROM hotspot_authors WHERE path = ?", stale)
+		live = [(path, row) for path, row in self.rows.items() if row is not None]
+		self.conn.executemany(
+			"INSERT INTO hotspots (path, commits, insertions, deletions, churn, authors,"
+			" ownership, last_modified, previous) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+			[
+				(
+					path,
+					row.commits,
+					row.insertions,
+					row.deletions,
+					row.insertions + row.deletions,
+					len(row.authors),
+					max(commits for commits, _ in row.authors.values()) / row.commits,
+					row.last_modified,
+					"\n".join(row.previous),
+				)
+				for path, row in live
+			],
+		)
+		self.conn.executemany(
+			"INSERT INTO hotspot_authors (path, author, commits, churn) VALUES (?, ?, ?, ?)",
+			[
+				(path, author, commits, churn)
+				for path, row in live
+				for author, (commits, churn) in row.authors.items()
+			],
+		)
+		self.rows.clear()
+		self.empty = False
+
+
+def update(
+	conn: sqlite3.Connection,
+	first_new_id: int,
+	renames: Iterable[tuple[str, list[tuple[str, str]], list[str]]],
+) -> None:
+	"""Apply the commits stored from ``first_new_id`` on, with their ``renames``.
+
+	``renames`` is :func:`~git_viz.log_stream.iter_renames` over the same commits.
+	"""
+	moves = {sha: (renamed, deleted) for sha, renamed, deleted in renames}
+	rows = conn.execute(
+		"SELECT c.sha, c.author, c.committed, f.path, f.insertions, f.deletions"
+		" FROM commits AS c LEFT JOIN files AS f ON f.commit_id = c.id"
+		" WHERE c.id >= ? ORDER BY c.ord DESC, f.id",
+		(first_new_id,),
+	)
+	batch = HotspotUpdate(conn)
+	for (sha, author, committed), group in itertools.groupby(rows, key=lambda row: row[:3]):
+		files = [row[3:] for row in group if row[3] is not None]
+		batch.apply(author, committed, files, *moves.get(sha, ((), ())))
+	batch.flush()
+
+
+def ranked(
+	conn: sqlite3.Connection, metric: str, limit: int, where: CommitFilter | None = None
+) -> Iterator[dict]:
+	"""Files with the highest ``metric`` (ties by path), with their top authors."""
+	if metric not in METRICS:
+		raise ValueError(f"Invalid metric: {metric} (expected one of {', '.join(METRICS)})")
+	path_sql, path_params = (where or CommitFilter()).path_sql("path")
+	rows = conn.execute(
+		"WITH top AS (SELECT * FROM hotspots WHERE "
+		+ path_sql
+		+ f" ORDER BY {metric} DESC, path LIMIT ?)"
+		f" SELECT top.path, {', '.join(f'top.{c}' for c in METRICS)}, top.previous,"
+		" a.author, a.commits, a.churn"
+		" FROM top JOIN ("
+		"  SELECT path, author, commits, churn, ROW_NUMBER() OVER ("
+		"   PARTITION BY path ORDER BY commits DESC, churn DESC, author) AS rank"
+		"  FROM hotspot_authors WHERE path IN (SELECT path FROM top)"
+		" ) AS a ON a.path = top.path AND a.rank <= ?"
+		f" ORDER BY top.{metric} DESC, top.path, a.rank",
+		(*path_params, limit, TOP_AUTHORS),
+	)
+	current = None
+	for path, *totals, previous, author, commits, churn in rows:
+		if current is None or current["path"] != path:
+			if current is not None:
+				yield current
+			current = {
+				"path": path,
+				**dict(zip(METRICS, totals)),
+				"previous_paths": previous.split("\n") if previous else [],
+				"top_authors": [],
+			}
+		current["top_authors"].append({"name": author, "commits": commits, "churn": churn})
+	if current is not None:
+		yield current
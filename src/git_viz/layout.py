@@ -0,0 +1,238 @@
+"""Force-directed 2D layouts for a sequence of graphs, warm-started step to step.
+
+This is a Fruchterman–Reingold layout whose all-pairs repulsion is approximated
+with a Barnes–Hut quadtree, so an iteration costs O(n log n) rather than O(n²).
+Each graph in a sequence starts from the previous graph's positions; files that
+are new at a step are placed at the centroid of their already-placed neighbours
+and settle while everything else may only move a little, so consecutive layouts
+differ mostly where the graph did.
+
+Only files with a co-change edge carry any layout information, so callers pass
+just the endpoints of the strongest edges (:func:`strongest_nodes`); everything
+else is left to the browser's simulation.
+"""
+
+import math
+import random
+from collections.abc import Iterable
+
+# Ideal edge length, matching the browser simulation's link distance
+EDGE_LENGTH = 40.0
+# Barnes–Hut opening angle: larger is faster and coarser
+THETA = 0.9
+GRAVITY = 0.02
+COLD_ITERATIONS = 60
+WARM_ITERATIONS = 8
+# Nodes laid out per graph; an iteration is pure Python, so this bounds the cost
+DEFAULT_MAX_NODES = 400
+# Step cap of already placed nodes during a warm start, relative to new ones
+SETTLED_MOBILITY = 0.05
+
+
+class _Cell:
+	"""Quadtree cell holding either one body or four children, plus its centre of mass."""
+
+	__slots__ = ("x", "y", "half", "mass", "mx", "my", "body", "bx", "by", "children")
+
+	def __init__(self, x: float, y: float, half: float):
+		self.x, self.y, self.half = x, y, half
+		self.mass = 0
+		self.mx = self.my = 0.0
+		self.body: int | None = None
+		self.bx = self.by = 0.0
+		self.children: list["_Cell"] | None = None
+
+	def insert(self, i: int, px: float, py: float, depth: int = 0) -> None:
+		self.mx = (self.mx * self.mass + px) / (self.mass + 1)
+		self.my = (self.my * self.mass + py) / (self.mass + 1)
+		self.mass += 1
+		if self.mass == 1:
+			self.body, self.bx, self.by = i, px, py
+			return
+		# Coincident points would split forever; past this depth they share a leaf
+		if depth > 40:
+			return
+		if self.children is None:
+			h = self.half / 2
+			self.children = [
+				_Cell(self.x - h, self.y - h, h),
+				_Cell(self.x + h, self.y - h, h),
+				_Cell(self.x - h, self.y + h, h),
+				_Cell(self.x + h, self.y + h, h),
+			]
+			if self.body is not None:
+				self._child(self.bx, self.by).insert(self.body, self.bx, self.by, depth + 1)
+				self.body = None
+		self._child(px, py).insert(i, px, py, depth + 1)
+
+	def _child(self, px: float, py: float) -> "_Cell":
+		return self.children[(px >= self.x) + 2 * (py >= self.y)]
+
+
+def _flatten(root: _Cell) -> tuple[list, list, list, list, list, list]:
+	"""Non-empty cells in depth-first order as parallel lists.
+
+	``skip[c]`` is the index just past ``c``'s subtree, so a traversal that accepts a
+	cell's centre of mass jumps there and one that opens it moves to ``c + 1``.
+	``opening[c]`` is the squared distance beyond which the cell is far enough away
+	to be treated as one body (-1 for leaves, which are always accepted).
+	"""
+	mx, my, mass, opening, body, skip = [], [], [], [], [], []
+	scale = 4 / (THETA * THETA)
+
+	def visit(cell: _Cell) -> None:
+		c = len(mx)
+		mx.append(cell.mx)
+		my.append(cell.my)
+		mass.append(cell.mass)
+		leaf = cell.children is None
+		opening.append(-1.0 if leaf else cell.half * cell.half * scale)
+		body.append(cell.body if leaf else -1)
+		skip.append(0)
+		if not leaf:
+			for child in cell.children:
+				if child.mass:
+					visit(child)
+		skip[c] = len(mx)
+
+	visit(root)
+	return mx, my, mass, opening, body, skip
+
+
+def _repulsion(cells: tuple, i: int, px: float, py: float, k2: float) -> tuple[float, float]:
+	mx, my, mass, opening, body, skip = cells
+	fx = fy = 0.0
+	c, end = 0, len(mx)
+	while c < end:
+		dx, dy = px - mx[c], py - my[c]
+		d2 = dx * dx + dy * dy
+		if d2 > opening[c]:
+			if body[c] != i:
+				if d2 < 1e-6:
+					# Nudge coincident points apart in a stable direction
+					dx, dy, d2 = 0.01 * ((i % 7) - 3 or 1), 0.01, 1e-4
+				f = k2 * mass[c] / d2
+				fx += dx * f
+				fy += dy * f
+			c = skip[c]
+		else:
+			c += 1
+	return fx, fy
+
+
+def _iterate(
+	xs: list[float],
+	ys: list[float],
+	edges: list[tuple[int, int, float]],
+	iterations: int,
+	start_temperature: float,
+	mobility: list[float] | None = None,
+) -> None:
+	"""Move nodes in place; ``mobility`` scales each node's step cap (default 1)."""
+	n = len(xs)
+	if n < 2:
+		return
+	k = EDGE_LENGTH
+	k2 = k * k
+	for step in range(iterations):
+		temperature = start_temperature * (1 - step / iterations)
+		extent = max(max(map(abs, xs)), max(map(abs, ys))) + 1
+		root = _Cell(0.0, 0.0, extent)
+		for i in range(n):
+			root.insert(i, xs[i], ys[i])
+		cells = _flatten(root)
+		dx = [0.0] * n
+		dy = [0.0] * n
+		for i in range(n):
+			fx, fy = _repulsion(cells, i, xs[i], ys[i], k2)
+			dx[i] = fx - GRAVITY * xs[i]
+			dy[i] = fy - GRAVITY * ys[i]
+		for a, b, weight in edges:
+			ex, ey = xs[a] - xs[b], ys[a] - ys[b]
+			d = math.sqrt(ex * ex + ey * ey) or 0.01
+			f = d * weight / k
+			dx[a] -= ex * f
+			dy[a] -= ey * f
+			dx[b] += ex * f
+			dy[b] += ey * f
+		for i in range(n):
+			d = math.sqrt(dx[i] * dx[i] + dy[i] * dy[i])
+			if d > 0:
+				cap = temperature if mobility is None else temperature * mobility[i]
+				limit = min(d, cap) / d
+				xs[i] += dx[i] * limit
+				ys[i] += dy[i] * limit
+
+
+def strongest_nodes(
+	edges: Iterable[tuple[str, str, int]], max_nodes: int = DEFAULT_MAX_NODES
+) -> list[str]:
+	"""The ``max_nodes`` edge endpoints with the most co-change weight, sorted by path."""
+	weight: dict[str, int] = {}
+	for a, b, count in edges:
+		weight[a] = weight.get(a, 0) + count
+		weight[b] = weight.get(b, 0) + count
+	ranked = sorted(weight, key=lambda node: (-weight[node], node))
+	return sorted(ranked[:max_nodes])
+
+
+def layout_sequence(
+	graphs: Iterable[tuple[list[str], list[tuple[str, str, int]]]],
+	seed: int = 0,
+	cold_iterations: int = COLD_ITERATIONS,
+	warm_iterations: int = WARM_ITERATIONS,
+) -> list[dict[str, tuple[float, float]]]:
+	"""Positions for each ``(nodes, edges)`` graph, centred on the origin.
+
+	``edges`` are ``(source, target, count)``; stronger co-change pulls harder, with
+	diminishing returns. Results are deterministic for a given ``seed``.
+	"""
+	rng = random.Random(seed)
+	placed: dict[str, tuple[float, float]] = {}
+	layouts = []
+	for nodes, edge_list in graphs:
+		index = {node: i for i, node in enumerate(nodes)}
+		edges = [
+			(index[a], index[b], math.log1p(count))
+			for a, b, count in edge_list
+			if a in index and b in index
+		]
+		neighbours: dict[int, list[int]] = {}
+		for a, b, _ in edges:
+			neighbours.setdefault(a, []).append(b)
+			neighbours.setdefault(b, []).append(a)
+
+		warm = bool(placed)
+		radius = EDGE_LENGTH * math.sqrt(len(nodes) + 1)
+		xs, ys = [0.0] * len(nodes), [0.0] * len(nodes)
+		fresh = []
+		for i, node in enumerate(nodes):
+			if node in placed:
+				xs[i], ys[i] = placed[node]
+			else:
+				fresh.append(i)
+		for i in fresh:
+			anchors = [placed[nodes[j]] for j in neighbours.get(i, ()) if nodes[j] in placed]
+			if anchors:
+				cx = sum(x for x, _ in anchors) / len(anchors)
+				cy = sum(y for _, y in anchors) / len(anchors)
+				jitter = EDGE_LENGTH / 2
+			else:
+				cx = cy = 0.0
+				jitter = radius
+			angle = rng.uniform(0, 2 * math.pi)
+			distance = jitter * math.sqrt(rng.random())
+			xs[i], ys[i] = cx + distance * math.cos(angle), cy + distance * math.sin(angle)
+
+		if warm:
+			# New files settle freely; the rest only adjust, so the picture stays put
+			mobility = [SETTLED_MOBILITY] * len(nodes)
+			for i in fresh:
+				mobility[i] = 1.0
+			_iterate(xs, ys, edges, warm_iterations, EDGE_LENGTH, mobility)
+		else:
+			_iterate(xs, ys, edges, cold_iterations, radius / 4)
+		layout = {node: (xs[i], ys[i]) for i, node in enumerate(nodes)}
+		placed.update(layout)
+		layouts.append(layout)
+	return layouts
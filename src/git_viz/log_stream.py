@@ -0,0 +1,129 @@
+"""Streaming parsers for ``git log --numstat -z`` and ``--name-status -z`` output."""
+
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any
+
+import git
+
+# One record per commit: a \x1e marker, then NUL-separated header fields.
+# The --numstat entries follow the message as "ins\tdel\tpath\0" tokens.
+_LOG_FORMAT = "%x1e%H%x00%P%x00%an%x00%ae%x00%ct%x00%B%x00"
+_LOG_ARGS = ("--numstat", "-z", "--no-renames", "--diff-merges=first-parent")
+_READ_SIZE = 1 << 16
+# Only commits that rename or delete files, each as a \x1e marker and its sha
+# followed by "status\0path\0[new path\0]" tokens
+_RENAME_ARGS = (
+	"--name-status",
+	"-z",
+	"-M",
+	"--diff-filter=DR",
+	"--diff-merges=first-parent",
+	"--format=%x1e%H",
+)
+
+
+def decode_path(raw: bytes) -> str:
+	"""A path from git's output as text.
+
+	Bytes that aren't valid UTF-8 become ``\\xNN`` escapes rather than lone
+	surrogates, so every path can still be encoded for SQLite and JSON.
+	"""
+	return raw.decode("utf-8", "backslashreplace")
+
+
+def parse_log_record(raw: bytes) -> dict:
+	fields = raw.split(b"\0")
+	sha, parents, author, email, timestamp, message = fields[:6]
+	files = []
+	for token in fields[6:]:
+		token = token.lstrip(b"\n")
+		if not token:
+			continue
+		insertions, deletions, fname = token.split(b"\t", 2)
+		# Binary files report "-" for both counts; c.stats counts them as 0
+		files.append(
+			{
+				"path": decode_path(fname),
+				"insertions": 0 if insertions == b"-" else int(insertions),
+				"deletions": 0 if deletions == b"-" else int(deletions),
+			}
+		)
+	return {
+		"hash": sha.decode("ascii"),
+		"parents": parents.decode("ascii").split(),
+		"author": author.decode("utf-8", "replace"),
+		"email": email.decode("utf-8", "replace"),
+		"timestamp": int(timestamp),
+		"message": message.decode("utf-8", "replace").strip(),
+		"files": files,
+	}
+
+
+def parse_rename_record(raw: bytes) -> tuple[str, list[tuple[str, str]], list[str]]:
+	sha, *tokens = raw.split(b"\0")
+	tokens = iter(token.lstrip(b"\n") for token in tokens)
+	renames, deleted = [], []
+	for status in tokens:
+		if status.startswith(b"R"):
+			old, new = next(tokens), next(tokens)
+			renames.append((decode_path(old), decode_path(new)))
+		elif status == b"D":
+			deleted.append(decode_path(next(tokens)))
+	return sha.decode("ascii"), renames, deleted
+
+
+def _records(repo: git.Repo, args: Iterable[str], parse: Callable[[bytes], Any]) -> Iterator[Any]:
+	"""Parse each \x1e-separated record of one ``git log`` process as it arrives."""
+	handle = repo.git.log(*args, as_process=True)
+	proc = handle.proc
+	buf = b""
+	try:
+		for chunk in iter(lambda: proc.stdout.read1(_READ_SIZE), b""):
+			buf += chunk
+			if b"\x1e" not in chunk:
+				continue
+			*records, buf = buf.split(b"\x1e")
+			for raw in records:
+				if raw:
+					yield parse(raw)
+		if buf:
+			yield parse(buf)
+		if proc.wait() != 0:
+			stderr = proc.stderr.read().decode("utf-8", "replace").strip()
+			raise ValueError(f"git log failed: {stderr}")
+	finally:
+		if proc.poll() is None:
+			proc.kill()
+			proc.wait()
+
+
+def iter_log(
+	repo: git.Repo,
+	rev: str = "HEAD",
+	max_count: int | None = None,
+	*extra: str,
+	paths: Iterable[str] = (),
+) -> Iterator[dict]:
+	"""Stream commits reachable from ``rev`` out of a single ``git log`` process.
+
+	Per-file stats match ``Commit.stats``: merges are diffed against their first
+	parent, renames are reported as a deletion plus an addition and binary files
+	count as zero lines. ``paths`` are pathspecs limiting both the walk and the
+	files listed.
+	"""
+	args = [*_LOG_ARGS, f"--format={_LOG_FORMAT}"]
+	if max_count is not None:
+		args.append(f"--max-count={max_count}")
+	args.extend(extra)
+	return _records(repo, [*args, rev, "--", *paths], parse_log_record)
+
+
+def iter_renames(
+	repo: git.Repo, rev: str = "HEAD"
+) -> Iterator[tuple[str, list[tuple[str, str]], list[str]]]:
+	"""``(sha, [(old path, new path)], [deleted path])`` for commits that rename or delete.
+
+	Renames are detected as ``git log -M`` does, against the first parent of merges
+	like :func:`iter_log`'s stats.
+	"""
+	return _records(repo, [*_RENAME_ARGS, rev, "--"], parse_rename_record)
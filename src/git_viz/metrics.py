@@ -0,0 +1,288 @@
+"""Per-request instrumentation: phase timings, git work, response sizes and profiles.
+
+:class:`MetricsMiddleware` gives every HTTP request a :class:`RequestMetrics`
+record in a context variable. Code on the request's path (including jobs on the
+:class:`~git_viz.workers.GitWorkerPool`, which run in a copy of the request's
+context) adds to it through :func:`phase` and :func:`count`; outside a request
+both are no-ops. Phases are timed exclusive of the phases nested in them, so they
+add up to no more than the request's own time.
+
+When the response starts, the record goes out as a ``Server-Timing`` header.
+When the response ends, it is folded into :data:`registry`, which ``/metrics``
+renders in the Prometheus text format.
+
+Profiling is opt-in. With ``GIT_VIZ_PROFILE_DIR`` set, a request carrying
+``profile=1`` bypasses the result cache and runs its git job under cProfile. Two
+reports are written to that directory: ``<id>.prof`` (pstats) and ``<id>.txt``
+(the top functions by cumulative time). The report's name comes back in an
+``X-Profile-Report`` header.
+"""
+
+import contextvars
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs
+
+PROFILE_DIR_ENV = "GIT_VIZ_PROFILE_DIR"
+
+# Counters every request reports, in Server-Timing and in /metrics
+COUNTERS = ("git_processes", "objects_read")
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PROFILE_LINES = 40
+
+
+class RequestMetrics:
+	"""What one request spent its time on and how much git work it caused."""
+
+	def __init__(self, profile: bool = False):
+		self.start = time.perf_counter()
+		self.profile = profile
+		self.profile_report: str | None = None
+		self.phases: dict[str, float] = {}
+		self.counts = dict.fromkeys(COUNTERS, 0)
+		# Worker threads and the event loop may both add to one record
+		self._lock = threading.Lock()
+
+	def add_phase(self, name: str, seconds: float) -> None:
+		with self._lock:
+			self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+	def add_count(self, name: str, n: int) -> None:
+		with self._lock:
+			self.counts[name] += n
+
+	def server_timing(self) -> str:
+		with self._lock:
+			entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.phases.items()]
+			entries += [f'{name};desc="{n}"' for name, n in self.counts.items()]
+		entries.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.1f}")
+		return ", ".join(entries)
+
+
+_current: contextvars.ContextVar[RequestMetrics | None] = contextvars.ContextVar(
+	"git_viz_request_metrics", default=None
+)
+# Seconds spent in phases nested inside the innermost open one
+_nested: contextvars.ContextVar[list[float] | None] = contextvars.ContextVar(
+	"git_viz_nested_phases", default=None
+)
+
+
+def current() -> RequestMetrics | None:
+	return _current.get()
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+	"""Time the block as phase ``name`` of the current request.
+
+	Must not span a ``yield`` of a generator, whose consumer would be timed too.
+	"""
+	record = _current.get()
+	if record is None:
+		yield
+		return
+	nested = [0.0]
+	token = _nested.set(nested)
+	start = time.perf_counter()
+	try:
+		yield
+	finally:
+		elapsed = time.perf_counter() - start
+		_nested.reset(token)
+		outer = _nested.get()
+		if outer is not None:
+			outer[0] += elapsed
+		record.add_phase(name, elapsed - nested[0])
+
+
+def count(name: str, n: int = 1) -> None:
+	"""Add ``n`` to the current request's counter ``name`` (one of :data:`COUNTERS`)."""
+	record = _current.get()
+	if record is not None:
+		record.add_count(name, n)
+
+
+def profiling() -> bool:
+	record = _current.get()
+	return record is not None and record.profile
+
+
+def profiled(fn: Callable[..., Any]) -> Callable[..., Any]:
+	"""``fn``, run under cProfile when the current request asked for a profile."""
+	record = _current.get()
+	if record is None or not record.profile:
+		return fn
+
+	def run(*args: Any) -> Any:
+		profiler = cProfile.Profile()
+		try:
+			return profiler.runcall(fn, *args)
+		finally:
+			record.profile_report = _write_profile(profiler, getattr(fn, "__name__", "job"))
+
+	return run
+
+
+def _write_profile(profiler: cProfile.Profile, name: str) -> str:
+	directory = Path(os.environ[PROFILE_DIR_ENV]).expanduser()
+	directory.mkdir(parents=True, exist_ok=True)
+	report = f"{time.strftime('%Y%m%dT%H%M%S')}-{name}-{uuid.uuid4().hex[:8]}"
+	profiler.dump_stats(directory / f"{report}.prof")
+	text = io.StringIO()
+	pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(PROFILE_LINES)
+	(directory / f"{report}.txt").write_text(text.getvalue())
+	return report
+
+
+class Registry:
+	"""Process-wide totals of finished requests, by endpoint."""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._requests: dict[tuple[str, int], int] = {}
+		# endpoint -> [cumulative count per bucket, [count, sum of seconds]]
+		self._durations: dict[str, list] = {}
+		self._phases: dict[tuple[str, str], list] = {}
+		self._counts: dict[tuple[str, str], int] = {}
+		self._bytes: dict[str, int] = {}
+
+	def record(self, endpoint: str, status: int, seconds: float, metrics: RequestMetrics) -> None:
+		with self._lock:
+			key = (endpoint, status)
+			self._requests[key] = self._requests.get(key, 0) + 1
+			buckets, total = self._durations.setdefault(
+				endpoint, [[0] * len(DURATION_BUCKETS), [0, 0.0]]
+			)
+			for i, bound in enumerate(DURATION_BUCKETS):
+				if seconds <= bound:
+					buckets[i] += 1
+			total[0] += 1
+			total[1] += seconds
+			with metrics._lock:
+				for name, spent in metrics.phases.items():
+					calls = self._phases.setdefault((endpoint, name), [0, 0.0])
+					calls[0] += 1
+					calls[1] += spent
+				for name, n in metrics.counts.items():
+					self._counts[(endpoint, name)] = self._counts.get((endpoint, name), 0) + n
+
+	def add_bytes(self, endpoint: str, n: int) -> None:
+		with self._lock:
+			self._bytes[endpoint] = self._bytes.get(endpoint, 0) + n
+
+	def render(self) -> str:
+		lines = []
+
+		def family(name: str, kind: str, doc: str) -> None:
+			lines.extend((f"# HELP git_viz_{name} {doc}", f"# TYPE git_viz_{name} {kind}"))
+
+		with self._lock:
+			family("requests_total", "counter", "HTTP requests by endpoint and status.")
+			for (endpoint, status), n in sorted(self._requests.items()):
+				lines.append(
+					f'git_viz_requests_total{{endpoint="{endpoint}",status="{status}"}} {n}'
+				)
+
+			family("request_duration_seconds", "histogram", "Time until the response ended.")
+			for endpoint, (buckets, (n, seconds)) in sorted(self._durations.items()):
+				label = f'endpoint="{endpoint}"'
+				for bound, hits in zip(DURATION_BUCKETS, buckets):
+					lines.append(
+						f'git_viz_request_duration_seconds_bucket{{{label},le="{bound}"}} {hits}'
+					)
+				lines += [
+					f'git_viz_request_duration_seconds_bucket{{{label},le="+Inf"}} {n}',
+					f"git_viz_request_duration_seconds_sum{{{label}}} {seconds:.6f}",
+					f"git_viz_request_duration_seconds_count{{{label}}} {n}",
+				]
+
+			family("phase_seconds", "summary", "Time spent in each phase, nested phases excluded.")
+			for (endpoint, name), (n, seconds) in sorted(self._phases.items()):
+				label = f'endpoint="{endpoint}",phase="{name}"'
+				lines += [
+					f"git_viz_phase_seconds_sum{{{label}}} {seconds:.6f}",
+					f"git_viz_phase_seconds_count{{{label}}} {n}",
+				]
+
+			for counter in COUNTERS:
+				family(f"{counter}_total", "counter", f"{counter.replace('_', ' ')} by requests.")
+				for (endpoint, name), n in sorted(self._counts.items()):
+					if name == counter:
+						lines.append(f'git_viz_{counter}_total{{endpoint="{endpoint}"}} {n}')
+
+			family("response_bytes_total", "counter", "Response body bytes sent.")
+			for endpoint, n in sorted(self._bytes.items()):
+				lines.append(f'git_viz_response_bytes_total{{endpoint="{endpoint}"}} {n}')
+		return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def render_stats(name: str, stats: dict) -> str:
+	"""Numeric entries of a ``stats()`` dict as untyped ``git_viz_<name>_<key>`` samples."""
+	return "".join(
+		f"# TYPE git_viz_{name}_{key} untyped\ngit_viz_{name}_{key} {value}\n"
+		for key, value in stats.items()
+		if isinstance(value, int | float) and not isinstance(value, bool)
+	)
+
+
+def _endpoint(scope: dict) -> str:
+	route = scope.get("route")
+	return getattr(route, "path", None) or "other"
+
+
+def _wants_profile(scope: dict) -> bool:
+	if not os.environ.get(PROFILE_DIR_ENV):
+		return False
+	query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+	return query.get("profile", ["0"])[-1] not in ("0", "false", "")
+
+
+class MetricsMiddleware:
+	"""ASGI middleware that gives each HTTP request a :class:`RequestMetrics` record."""
+
+	def __init__(self, app: Callable[..., Any]):
+		self.app = app
+
+	async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+		if scope["type"] != "http":
+			await self.app(scope, receive, send)
+			return
+		record = RequestMetrics(profile=_wants_profile(scope))
+		token = _current.set(record)
+		status = 500
+		sent = 0
+
+		async def send_with_metrics(message: dict) -> None:
+			nonlocal status, sent
+			if message["type"] == "http.response.start":
+				status = message["status"]
+				headers = list(message.get("headers", []))
+				headers.append((b"server-timing", record.server_timing().encode("latin-1")))
+				if record.profile_report is not None:
+					headers.append((b"x-profile-report", record.profile_report.encode("latin-1")))
+				message = {**message, "headers": headers}
+			elif message["type"] == "http.response.body":
+				sent += len(message.get("body", b""))
+			await send(message)
+
+		try:
+			await self.app(scope, receive, send_with_metrics)
+		finally:
+			_current.reset(token)
+			endpoint = _endpoint(scope)
+			registry.add_bytes(endpoint, sent)
+			registry.record(endpoint, status, time.perf_counter() - record.start, record)
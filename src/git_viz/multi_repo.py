@@ -0,0 +1,136 @@
+"""Views across many repositories at once.
+
+:func:`aggregate` runs :func:`git_viz.git_ops.get_repo_summary` for every
+repository on a :class:`~git_viz.workers.ProcessWorkerPool`, so large fleets use
+every core, and merges whatever finished in time: contributors unified by email,
+combined weekly activity and one timeline of the newest commits across all of them.
+Repositories that fail or run past the timeout are listed under ``errors`` and
+the rest is returned as a partial result.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+from pathlib import Path
+
+from .git_ops import get_repo_summary
+from .workers import ProcessWorkerPool
+
+# Directory names never worth descending into while looking for repositories
+_SKIP_DIRS = {"node_modules", "__pycache__", ".venv", "venv"}
+
+
+def find_repositories(root: str | Path, max_depth: int = 3) -> list[Path]:
+	"""Working trees under ``root`` (itself included), at most ``max_depth`` levels down.
+
+	Nested repositories inside a found one (submodules, vendored checkouts) are
+	not searched for.
+	"""
+	root = Path(root).expanduser().resolve()
+	found = []
+	for directory, dirnames, filenames in os.walk(root):
+		if ".git" in dirnames or ".git" in filenames:
+			found.append(Path(directory))
+			dirnames.clear()
+			continue
+		depth = len(Path(directory).relative_to(root).parts)
+		if depth >= max_depth:
+			dirnames.clear()
+			continue
+		dirnames[:] = sorted(d for d in dirnames if not d.startswith(".") and d not in _SKIP_DIRS)
+	return sorted(found)
+
+
+def _identity_key(email: str, name: str) -> str:
+	return email.strip().lower() or f"name:{name}"
+
+
+def merge_summaries(summaries: list[dict], limit: int = 100) -> dict:
+	"""Combine ``get_repo_summary`` results into one cross-repository view."""
+	contributors: dict[str, dict] = {}
+	for summary in summaries:
+		for identity in summary["identities"]:
+			key = _identity_key(identity["email"], identity["name"])
+			entry = contributors.setdefault(
+				key, {"email": identity["email"], "names": {}, "commits": 0, "repos": {}}
+			)
+			names = entry["names"]
+			names[identity["name"]] = names.get(identity["name"], 0) + identity["commits"]
+			entry["commits"] += identity["commits"]
+			repos = entry["repos"]
+			repos[summary["path"]] = repos.get(summary["path"], 0) + identity["commits"]
+
+	merged_contributors = []
+	for entry in contributors.values():
+		# The name used for most commits represents the person
+		names = sorted(entry["names"].items(), key=lambda item: (-item[1], item[0]))
+		merged_contributors.append(
+			{
+				"name": names[0][0],
+				"email": entry["email"],
+				"aliases": [name for name, _ in names[1:]],
+				"commits": entry["commits"],
+				"repos": entry["repos"],
+			}
+		)
+	merged_contributors.sort(key=lambda c: (-c["commits"], c["name"]))
+
+	weekly: dict[str, int] = {}
+	for summary in summaries:
+		for bucket in summary["weekly"]:
+			weekly[bucket["week"]] = weekly.get(bucket["week"], 0) + bucket["count"]
+
+	# Each repository's commits are newest first; dates are all UTC ISO 8601, so
+	# they order correctly as strings
+	timeline = heapq.merge(
+		*(
+			[{**commit, "repo": summary["path"]} for commit in summary["commits"]]
+			for summary in summaries
+		),
+		key=lambda commit: commit["date"],
+		reverse=True,
+	)
+
+	return {
+		"repos": [
+			{key: summary[key] for key in ("path", "name", "branch", "head", "commit_count")}
+			for summary in summaries
+		],
+		"commit_count": sum(summary["commit_count"] for summary in summaries),
+		"contributors": merged_contributors,
+		"activity": {
+			"bucket": "week",
+			"commits_over_time": [{"week": w, "count": n} for w, n in sorted(weekly.items())],
+			"by_repo": {summary["path"]: summary["weekly"] for summary in summaries},
+		},
+		"timeline": list(itertools.islice(timeline, limit)),
+	}
+
+
+async def aggregate(
+	paths: list[Path],
+	processes: ProcessWorkerPool,
+	limit: int = 100,
+	timeout: float | None = None,
+) -> dict:
+	"""Summarise ``paths`` in parallel and merge the ones that finished.
+
+	``timeout`` (default: the pool's) applies to each repository separately.
+	"""
+	results = await asyncio.gather(
+		*(processes.run(get_repo_summary, str(path), limit, timeout=timeout) for path in paths),
+		return_exceptions=True,
+	)
+	summaries, errors = [], []
+	for path, result in zip(paths, results):
+		if isinstance(result, TimeoutError):
+			errors.append({"path": str(path), "error": "Timed out"})
+		elif isinstance(result, BaseException):
+			errors.append({"path": str(path), "error": str(result) or type(result).__name__})
+		else:
+			summaries.append(result)
+	merged = merge_summaries(summaries, limit)
+	merged["errors"] = errors
+	merged["partial"] = bool(errors)
+	return merged
@@ -0,0 +1,235 @@
+"""Pool of open ``git.Repo`` handles, reused across requests.
+
+Opening a ``git.Repo`` is cheap, but each one starts its own ``git cat-file
+--batch`` helpers the first time it reads an object, and those die with the handle.
+:class:`RepoPool` keeps handles open per resolved repository path so the helpers
+stay warm. A handle is used by one thread at a time (GitPython's persistent
+commands are not thread-safe): :meth:`RepoPool.checkout` lends an idle handle or
+opens a new one and takes it back afterwards. Handles idle for longer than
+``idle_timeout`` are closed, the least recently used idle handle makes room once
+``max_open`` are open, and a handle whose repository vanished or whose helper
+process died is discarded instead of being lent out again.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import git
+
+from . import metrics
+
+MAX_OPEN_ENV = "GIT_VIZ_REPO_HANDLES"
+IDLE_TIMEOUT_ENV = "GIT_VIZ_REPO_IDLE_SECONDS"
+
+# Subprocess counts for every pooled handle, shared by all pools in the process
+_spawn_lock = threading.Lock()
+_spawned = {"processes": 0, "persistent": 0}
+
+
+def _count_spawn(name: str) -> None:
+	with _spawn_lock:
+		_spawned[name] += 1
+	metrics.count("git_processes")
+
+
+class _CountingGit(git.Git):
+	"""``git.Git`` that counts the subprocesses it starts and the objects it reads."""
+
+	def execute(self, *args: Any, **kwargs: Any) -> Any:
+		_count_spawn("processes")
+		return super().execute(*args, **kwargs)
+
+	def _get_persistent_cmd(self, attr_name: str, *args: Any, **kwargs: Any) -> Any:
+		if getattr(self, attr_name) is None:
+			_count_spawn("persistent")
+		return super()._get_persistent_cmd(attr_name, *args, **kwargs)
+
+	def get_object_header(self, ref: str) -> Any:
+		metrics.count("objects_read")
+		return super().get_object_header(ref)
+
+	def get_object_data(self, ref: str) -> Any:
+		metrics.count("objects_read")
+		return super().get_object_data(ref)
+
+	def stream_object_data(self, ref: str) -> Any:
+		metrics.count("objects_read")
+		return super().stream_object_data(ref)
+
+
+class _PooledRepo(git.Repo):
+	GitCommandWrapperType = _CountingGit
+
+
+def _healthy(repo: git.Repo) -> bool:
+	if not Path(repo.git_dir).is_dir():
+		return False
+	for cmd in (repo.git.cat_file_all, repo.git.cat_file_header):
+		if cmd is not None and cmd.proc.poll() is not None:
+			return False
+	return True
+
+
+class RepoPool:
+	"""Open repository handles keyed by resolved path, lent to one thread at a time."""
+
+	def __init__(
+		self,
+		max_open: int = 16,
+		idle_timeout: float = 300.0,
+		checkout_timeout: float = 30.0,
+		clock: Callable[[], float] = time.monotonic,
+	):
+		self.max_open = max_open
+		self.idle_timeout = idle_timeout
+		self.checkout_timeout = checkout_timeout
+		self._clock = clock
+		self._lock = threading.Lock()
+		self._returned = threading.Condition(self._lock)
+		# (path, handle id) -> (handle, time it was returned), least recently used first
+		self._idle: OrderedDict[tuple[str, int], tuple[git.Repo, float]] = OrderedDict()
+		self._in_use: dict[str, int] = {}
+		self._counters = {
+			"checkouts": 0,
+			"reused": 0,
+			"opened": 0,
+			"closed_idle": 0,
+			"closed_for_capacity": 0,
+			"closed_unhealthy": 0,
+		}
+
+	@classmethod
+	def from_env(cls) -> "RepoPool":
+		return cls(
+			max_open=int(os.environ.get(MAX_OPEN_ENV, 16)),
+			idle_timeout=float(os.environ.get(IDLE_TIMEOUT_ENV, 300)),
+		)
+
+	def _count(self, name: str) -> None:
+		with self._lock:
+			self._counters[name] += 1
+
+	def _open_count(self) -> int:
+		return len(self._idle) + sum(self._in_use.values())
+
+	def _close_idle(self, now: float) -> list[git.Repo]:
+		# Caller holds the lock; handles are closed after it is released
+		expired = [k for k, (_, since) in self._idle.items() if now - since > self.idle_timeout]
+		self._counters["closed_idle"] += len(expired)
+		return [self._idle.pop(k)[0] for k in expired]
+
+	def _take(self, key: str) -> tuple[git.Repo | None, list[git.Repo], bool]:
+		"""``(idle handle or None to open one, handles to close, whether a slot was got)``."""
+		deadline = self._clock() + self.checkout_timeout
+		with self._lock:
+			self._counters["checkouts"] += 1
+			closing = self._close_idle(self._clock())
+			while True:
+				for k in reversed(self._idle):
+					if k[0] == key:
+						repo, _ = self._idle.pop(k)
+						self._in_use[key] = self._in_use.get(key, 0) + 1
+						return repo, closing, True
+				if self._open_count() >= self.max_open and self._idle:
+					closing.append(self._idle.popitem(last=False)[1][0])
+					self._counters["closed_for_capacity"] += 1
+				if self._open_count() < self.max_open:
+					self._in_use[key] = self._in_use.get(key, 0) + 1
+					return None, closing, True
+				remaining = deadline - self._clock()
+				if remaining <= 0 or not self._returned.wait(remaining):
+					return None, closing, False
+
+	def _release(self, key: str, repo: git.Repo | None, healthy: bool) -> None:
+		with self._lock:
+			if self._in_use[key] == 1:
+				del self._in_use[key]
+			else:
+				self._in_use[key] -= 1
+			if repo is not None and healthy:
+				self._idle[(key, id(repo))] = (repo, self._clock())
+			self._returned.notify()
+
+	@contextmanager
+	def checkout(self, path: str | Path) -> Iterator[git.Repo]:
+		"""Lend a handle on the repository at ``path`` for the duration of the block.
+
+		Raises ``ValueError`` when ``path`` is missing or not a git repository and
+		``TimeoutError`` when every handle stays busy for ``checkout_timeout``.
+		"""
+		resolved = Path(path).expanduser().resolve()
+		if not resolved.exists():
+			raise ValueError(f"Path does not exist: {path}")
+		key = str(resolved)
+		repo, closing, ok = self._take(key)
+		for stale in closing:
+			stale.close()
+		if not ok:
+			raise TimeoutError("No repository handle available")
+		try:
+			if repo is not None and not _healthy(repo):
+				repo.close()
+				self._count("closed_unhealthy")
+				repo = None
+			if repo is None:
+				try:
+					repo = _PooledRepo(resolved)
+				except (git.InvalidGitRepositoryError, git.NoSuchPathError):
+					raise ValueError(f"Not a git repository: {path}")
+				self._count("opened")
+			else:
+				self._count("reused")
+		except BaseException:
+			self._release(key, None, False)
+			raise
+
+		healthy = True
+		try:
+			yield repo
+		except BaseException:
+			# A failed job may have left a helper mid-response; only reuse it if it's intact
+			healthy = _healthy(repo)
+			raise
+		finally:
+			if not healthy:
+				repo.close()
+				self._count("closed_unhealthy")
+			self._release(key, repo, healthy)
+
+	def close(self) -> None:
+		"""Close every idle handle; handles in use are closed when they come back."""
+		with self._lock:
+			idle = [repo for repo, _ in self._idle.values()]
+			self._idle.clear()
+		for repo in idle:
+			repo.close()
+
+	def stats(self) -> dict:
+		with self._lock:
+			idle_by_repo: dict[str, int] = {}
+			for key, _ in self._idle:
+				idle_by_repo[key] = idle_by_repo.get(key, 0) + 1
+			checkouts = self._counters["checkouts"]
+			stats = {
+				**self._counters,
+				"max_open": self.max_open,
+				"idle_timeout_seconds": self.idle_timeout,
+				"open": self._open_count(),
+				"idle": len(self._idle),
+				"in_use": sum(self._in_use.values()),
+				"reuse_rate": self._counters["reused"] / checkouts if checkouts else 0.0,
+				"open_by_repo": {
+					key: idle_by_repo.get(key, 0) + self._in_use.get(key, 0)
+					for key in idle_by_repo.keys() | self._in_use.keys()
+				},
+			}
+		with _spawn_lock:
+			stats["processes_spawned"] = _spawned["processes"]
+			stats["persistent_processes_spawned"] = _spawned["persistent"]
+		return stats
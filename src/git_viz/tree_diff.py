@@ -0,0 +1,70 @@
+"""Batched tree diffs between consecutive commits, via ``git diff-tree --stdin``.
+
+``diff-tree`` compares tree object ids level by level and never descends into a
+subtree whose id is unchanged, so the cost of a delta is proportional to what
+changed rather than to the size of the tree.
+"""
+
+import subprocess
+from collections.abc import Iterable
+
+import git
+
+from . import metrics
+from .log_stream import decode_path
+
+# Gitlinks (submodules) are commits, not blobs; _build_tree skips them too
+_GITLINK_MODE = b"160000"
+_NULL_MODE = b"000000"
+
+
+def diff_pairs(repo: git.Repo, pairs: Iterable[tuple[str, str]]) -> dict[str, list[tuple]]:
+	"""Raw blob changes for each ``(commit, previous)`` pair, keyed by commit sha.
+
+	Each change is ``(path, old blob sha or None, new blob sha or None)``. Commits
+	whose tree is identical to the previous one are absent from the result.
+	"""
+	stdin = "".join(f"{commit} {previous}\n" for commit, previous in pairs).encode()
+	handle = repo.git.diff_tree(
+		"--stdin", "-r", "--raw", "--no-renames", "-z", as_process=True, istream=subprocess.PIPE
+	)
+	out, err = handle.proc.communicate(stdin)
+	if handle.proc.returncode != 0:
+		raise ValueError(f"git diff-tree failed: {err.decode('utf-8', 'replace').strip()}")
+
+	changes: dict[str, list[tuple]] = {}
+	current: list[tuple] = []
+	tokens = iter(out.split(b"\0"))
+	for token in tokens:
+		if not token:
+			continue
+		if not token.startswith(b":"):
+			current = changes.setdefault(token.decode("ascii"), [])
+			continue
+		path = decode_path(next(tokens))
+		old_mode, new_mode, old_sha, new_sha, _status = token[1:].split(b" ")
+		if _GITLINK_MODE in (old_mode, new_mode):
+			continue
+		current.append(
+			(
+				path,
+				None if old_mode == _NULL_MODE else old_sha.decode("ascii"),
+				None if new_mode == _NULL_MODE else new_sha.decode("ascii"),
+			)
+		)
+	return changes
+
+
+def blob_sizes(repo: git.Repo, shas: Iterable[str]) -> dict[str, int]:
+	"""Sizes of many blobs from a single ``git cat-file --batch-check`` process."""
+	unique = sorted(set(shas))
+	if not unique:
+		return {}
+	metrics.count("objects_read", len(unique))
+	handle = repo.git.cat_file("--batch-check", as_process=True, istream=subprocess.PIPE)
+	out, _ = handle.proc.communicate("".join(f"{sha}\n" for sha in unique).encode())
+	sizes = {}
+	for line in out.decode("ascii").splitlines():
+		sha, _type, size = line.split(" ")
+		sizes[sha] = int(size)
+	return sizes
@@ -0,0 +1,268 @@
+"""Background detection of HEAD moving in the repositories being served.
+
+:class:`RefWatcher` watches ``.git/HEAD``, ``.git/packed-refs`` and everything
+under ``.git/refs`` of each registered repository, using inotify (through ctypes,
+Linux only) or, where that is unavailable, by re-checking every ``poll_interval``
+seconds. Any ref activity triggers a re-read of HEAD; when the resolved sha
+differs from the last one seen, ``on_change(repo_path, previous, head)`` is called
+on the watcher's thread.
+
+:class:`ChangeFeed` fans events out from that thread to async subscribers (the
+SSE endpoint), each on whatever event loop it runs on.
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+from collections.abc import AsyncIterator, Callable
+from pathlib import Path
+
+from .cache import HeadResolver
+
+WATCH_ENV = "GIT_VIZ_WATCH"
+POLL_INTERVAL_ENV = "GIT_VIZ_WATCH_INTERVAL"
+
+# inotify(7) constants
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_IGNORED = 0x8000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT = struct.Struct("iIII")
+# Names in .git itself that can move HEAD; everything under refs/ counts
+_GIT_DIR_NAMES = {"HEAD", "packed-refs"}
+
+
+class _Inotify:
+	"""Minimal ctypes binding: one inotify descriptor, directory watches only."""
+
+	def __init__(self):
+		libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+		self._add_watch = libc.inotify_add_watch
+		self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+		self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+		if self.fd < 0:
+			raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+	def add(self, directory: Path) -> int | None:
+		wd = self._add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+		return wd if wd >= 0 else None
+
+	def read(self) -> list[tuple[int, int, str]]:
+		"""Pending ``(wd, mask, name)`` events, without blocking."""
+		try:
+			data = os.read(self.fd, 64 * 1024)
+		except BlockingIOError:
+			return []
+		events, offset = [], 0
+		while offset < len(data):
+			wd, mask, _, length = _EVENT.unpack_from(data, offset)
+			offset += _EVENT.size
+			name = data[offset : offset + length].rstrip(b"\0").decode(errors="replace")
+			offset += length
+			events.append((wd, mask, name))
+		return events
+
+	def close(self) -> None:
+		os.close(self.fd)
+
+
+class RefWatcher:
+	"""Calls ``on_change(repo_path, previous_head, head)`` when a watched HEAD moves."""
+
+	def __init__(
+		self,
+		on_change: Callable[[Path, str | None, str | None], None],
+		poll_interval: float = 2.0,
+		use_inotify: bool = True,
+	):
+		self.on_change = on_change
+		self.poll_interval = poll_interval
+		self._heads = HeadResolver()
+		self._lock = threading.Lock()
+		# repo path -> last HEAD sha seen
+		self._known: dict[Path, str | None] = {}
+		# inotify watch descriptor -> (repo path, watched directory)
+		self._watches: dict[int, tuple[Path, Path]] = {}
+		self._inotify: _Inotify | None = None
+		if use_inotify and sys.platform.startswith("linux"):
+			try:
+				self._inotify = _Inotify()
+			except (OSError, AttributeError):
+				self._inotify = None
+		self._thread: threading.Thread | None = None
+		self._stopping = threading.Event()
+		self._counters = {"changes": 0, "failed_callbacks": 0}
+
+	@classmethod
+	def from_env(cls, on_change: Callable[[Path, str | None, str | None], None]) -> "RefWatcher":
+		return cls(on_change, poll_interval=float(os.environ.get(POLL_INTERVAL_ENV, 2)))
+
+	@property
+	def mode(self) -> str:
+		return "inotify" if self._inotify is not None else "polling"
+
+	def watched(self) -> list[Path]:
+		with self._lock:
+			return list(self._known)
+
+	def watch(self, repo_path: Path) -> None:
+		"""Start watching ``repo_path`` (a working tree with a ``.git`` directory)."""
+		with self._lock:
+			if repo_path in self._known:
+				return
+			self._known[repo_path] = self._resolve(repo_path)
+			if self._inotify is not None:
+				self._add_tree(repo_path)
+			if self._thread is None:
+				self._thread = threading.Thread(
+					target=self._run, name="git-viz-watcher", daemon=True
+				)
+				self._thread.start()
+
+	def _resolve(self, repo_path: Path) -> str | None:
+		try:
+			return self._heads.resolve(repo_path)
+		except OSError:
+			return None
+
+	def _add_tree(self, repo_path: Path) -> None:
+		# Caller holds the lock
+		self._add_dir(repo_path, repo_path / ".git")
+		self._add_refs(repo_path, repo_path / ".git" / "refs")
+
+	def _add_refs(self, repo_path: Path, refs_dir: Path) -> None:
+		for directory, _, _ in os.walk(refs_dir):
+			self._add_dir(repo_path, Path(directory))
+
+	def _add_dir(self, repo_path: Path, directory: Path) -> None:
+		wd = self._inotify.add(directory)
+		if wd is not None:
+			self._watches[wd] = (repo_path, directory)
+
+	def stop(self) -> None:
+		self._stopping.set()
+		if self._thread is not None:
+			self._thread.join()
+		if self._inotify is not None:
+			self._inotify.close()
+
+	def _run(self) -> None:
+		while not self._stopping.is_set():
+			if self._inotify is None:
+				self._stopping.wait(self.poll_interval)
+				self.check(self.watched())
+				continue
+			ready, _, _ = select.select([self._inotify.fd], [], [], self.poll_interval)
+			if ready:
+				self.check(self._drain())
+
+	def _drain(self) -> set[Path]:
+		"""Repositories with ref activity among the pending inotify events."""
+		touched = set()
+		with self._lock:
+			for wd, mask, name in self._inotify.read():
+				watch = self._watches.get(wd)
+				if watch is None:
+					continue
+				repo_path, directory = watch
+				if mask & _IN_IGNORED:
+					# The directory is gone (or the whole repository was deleted)
+					del self._watches[wd]
+					continue
+				if directory == repo_path / ".git":
+					if name not in _GIT_DIR_NAMES:
+						continue
+				elif mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO):
+					# A new namespace such as refs/heads/feature/
+					self._add_refs(repo_path, directory / name)
+				touched.add(repo_path)
+		return touched
+
+	def check(self, repos) -> None:
+		"""Re-resolve HEAD for ``repos`` and report the ones that moved."""
+		for repo_path in repos:
+			head = self._resolve(repo_path)
+			with self._lock:
+				if repo_path not in self._known:
+					continue
+				if not (repo_path / ".git").is_dir():
+					# Deleted; its inotify watches went with it
+					del self._known[repo_path]
+					continue
+				previous = self._known[repo_path]
+				if head == previous:
+					continue
+				self._known[repo_path] = head
+				self._counters["changes"] += 1
+			try:
+				self.on_change(repo_path, previous, head)
+			except Exception:
+				# A failing refresh must not stop the watcher for every other repo
+				with self._lock:
+					self._counters["failed_callbacks"] += 1
+
+	def stats(self) -> dict:
+		with self._lock:
+			return {
+				**self._counters,
+				"mode": self.mode,
+				"poll_interval_seconds": self.poll_interval,
+				"watched": len(self._known),
+				"inotify_watches": len(self._watches),
+			}
+
+
+class ChangeFeed:
+	"""Thread-safe fan-out of change events to async subscribers."""
+
+	def __init__(self, max_pending: int = 64):
+		self.max_pending = max_pending
+		self._lock = threading.Lock()
+		self._subscribers: set[tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+
+	def publish(self, event: dict) -> None:
+		"""Deliver ``event`` to every subscriber; callable from any thread."""
+		with self._lock:
+			subscribers = list(self._subscribers)
+		for loop, queue in subscribers:
+			try:
+				loop.call_soon_threadsafe(self._offer, queue, event)
+			except RuntimeError:
+				# That subscriber's event loop has closed
+				with self._lock:
+					self._subscribers.discard((loop, queue))
+
+	def _offer(self, queue: asyncio.Queue, event: dict) -> None:
+		if queue.full():
+			# A subscriber that stopped reading loses its oldest events, not new ones
+			queue.get_nowait()
+		queue.put_nowait(event)
+
+	async def subscribe(self, heartbeat: float = 15.0) -> AsyncIterator[dict | None]:
+		"""Yield events as they are published, and ``None`` after ``heartbeat`` idle seconds."""
+		entry = (asyncio.get_running_loop(), asyncio.Queue(self.max_pending))
+		with self._lock:
+			self._subscribers.add(entry)
+		try:
+			while True:
+				try:
+					yield await asyncio.wait_for(entry[1].get(), heartbeat)
+				except TimeoutError:
+					yield None
+		finally:
+			with self._lock:
+				self._subscribers.discard(entry)
+
+	def subscribers(self) -> int:
+		with self._lock:
+			return len(self._subscribers)
@@ -0,0 +1,326 @@
+"""Bounded thread pool that keeps blocking git work off the event loop.
+
+Every endpoint hands its ``git_ops`` call to :class:`GitWorkerPool`, which caps the
+number of concurrent jobs per repository, enforces a per-request timeout and drops
+queued jobs whose client has gone away. Jobs that are already running cannot be
+interrupted; they finish in the background and their result is discarded, but
+they keep their worker and repository slot until then, so the limits hold.
+
+Work that fans out over many repositories at once goes to :class:`ProcessWorkerPool`
+instead, so it is spread across cores rather than sharing one interpreter.
+"""
+
+import asyncio
+import contextvars
+import multiprocessing
+import os
+import threading
+import time
+import weakref
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
+from starlette.requests import Request
+
+WORKERS_ENV = "GIT_VIZ_WORKERS"
+PER_REPO_LIMIT_ENV = "GIT_VIZ_PER_REPO_LIMIT"
+TIMEOUT_ENV = "GIT_VIZ_REQUEST_TIMEOUT"
+PROCESSES_ENV = "GIT_VIZ_PROCESSES"
+PROCESS_TIMEOUT_ENV = "GIT_VIZ_PROCESS_TIMEOUT"
+
+DISCONNECT_POLL_INTERVAL = 0.25
+
+
+class ClientDisconnectedError(Exception):
+	"""The client went away before the job finished."""
+
+
+def _release_when_done(
+	future: Future, loop: asyncio.AbstractEventLoop, *slots: asyncio.Semaphore
+) -> None:
+	"""Give ``slots`` back on ``loop`` once the executor ``future`` is done, not before."""
+
+	def release(_: Future) -> None:
+		for slot in slots:
+			try:
+				loop.call_soon_threadsafe(slot.release)
+			except RuntimeError:
+				# The loop has closed, and its semaphores are gone with it
+				pass
+
+	future.add_done_callback(release)
+
+
+class GitWorkerPool:
+	def __init__(self, max_workers: int = 8, per_repo_limit: int = 4, timeout: float = 60.0):
+		self.max_workers = max_workers
+		self.per_repo_limit = per_repo_limit
+		self.timeout = timeout
+		self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="git-viz")
+		# asyncio primitives belong to one event loop, so slots are kept per loop
+		self._repo_slots: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+		self._worker_slots: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+		self._lock = threading.Lock()
+		self._counters = {
+			"submitted": 0,
+			"completed": 0,
+			"failed": 0,
+			"timed_out": 0,
+			"cancelled": 0,
+		}
+		self._waiting = 0
+		self._queued = 0
+		self._active = 0
+		self._busy_seconds = 0.0
+		self._in_flight: dict[str, int] = {}
+
+	@classmethod
+	def from_env(cls) -> "GitWorkerPool":
+		return cls(
+			max_workers=int(os.environ.get(WORKERS_ENV, 8)),
+			per_repo_limit=int(os.environ.get(PER_REPO_LIMIT_ENV, 4)),
+			timeout=float(os.environ.get(TIMEOUT_ENV, 60)),
+		)
+
+	def _slot(self, repo_key: str) -> asyncio.Semaphore:
+		loop = asyncio.get_running_loop()
+		slots = self._repo_slots.setdefault(loop, {})
+		if repo_key not in slots:
+			slots[repo_key] = asyncio.Semaphore(self.per_repo_limit)
+		return slots[repo_key]
+
+	def _workers(self) -> asyncio.Semaphore:
+		loop = asyncio.get_running_loop()
+		if loop not in self._worker_slots:
+			self._worker_slots[loop] = asyncio.Semaphore(self.max_workers)
+		return self._worker_slots[loop]
+
+	def _count(self, name: str, delta: int = 1) -> None:
+		with self._lock:
+			self._counters[name] += delta
+
+	def _call(self, fn: Callable[..., Any], args: tuple) -> Any:
+		with self._lock:
+			self._queued -= 1
+			self._active += 1
+		start = time.perf_counter()
+		try:
+			return fn(*args)
+		finally:
+			with self._lock:
+				self._active -= 1
+				self._busy_seconds += time.perf_counter() - start
+
+	async def run(
+		self,
+		repo_key: str,
+		fn: Callable[..., Any],
+		*args: Any,
+		request: Request | None = None,
+	) -> Any:
+		"""Run ``fn(*args)`` on the pool and return its result.
+
+		Raises ``TimeoutError`` when the job (including time spent queued) exceeds the
+		pool timeout and ``ClientDisconnectedError`` when ``request``'s client leaves.
+		"""
+		self._count("submitted")
+		with self._lock:
+			self._waiting += 1
+			self._in_flight[repo_key] = self._in_flight.get(repo_key, 0) + 1
+		has_slot = False
+		# Slots taken so far; once the job is submitted they are released when it
+		# finishes, which for a job that timed out is after run() has returned
+		held: list[asyncio.Semaphore] = []
+		submitted = False
+		try:
+			async with asyncio.timeout(self.timeout):
+				for slot in (self._slot(repo_key), self._workers()):
+					await slot.acquire()
+					held.append(slot)
+				with self._lock:
+					self._waiting -= 1
+					self._queued += 1
+				has_slot = True
+				# The job sees the request's context, e.g. its metrics record
+				context = contextvars.copy_context()
+				future = self._executor.submit(context.run, self._call, fn, args)
+				_release_when_done(future, asyncio.get_running_loop(), *held)
+				submitted = True
+				try:
+					result = await self._wait(future, request)
+				except BaseException:
+					if future.cancel():
+						with self._lock:
+							self._queued -= 1
+					raise
+		except TimeoutError:
+			self._count("timed_out")
+			raise
+		except ClientDisconnectedError:
+			self._count("cancelled")
+			raise
+		except Exception:
+			self._count("failed")
+			raise
+		finally:
+			if not submitted:
+				for slot in held:
+					slot.release()
+			with self._lock:
+				if not has_slot:
+					self._waiting -= 1
+				if self._in_flight[repo_key] == 1:
+					del self._in_flight[repo_key]
+				else:
+					self._in_flight[repo_key] -= 1
+		self._count("completed")
+		return result
+
+	async def _wait(self, future, request: Request | None) -> Any:
+		wrapped = asyncio.wrap_future(future)
+		if request is None:
+			return await wrapped
+		while True:
+			done, _ = await asyncio.wait({wrapped}, timeout=DISCONNECT_POLL_INTERVAL)
+			if done:
+				return wrapped.result()
+			if await request.is_disconnected():
+				raise ClientDisconnectedError()
+
+	def stats(self) -> dict:
+		with self._lock:
+			return {
+				**self._counters,
+				"max_workers": self.max_workers,
+				"per_repo_limit": self.per_repo_limit,
+				"timeout_seconds": self.timeout,
+				"active": self._active,
+				"queued": self._queued,
+				"waiting_for_repo_slot": self._waiting,
+				"saturation": self._active / self.max_workers,
+				"busy_seconds": round(self._busy_seconds, 3),
+				"in_flight_by_repo": dict(self._in_flight),
+			}
+
+
+class ProcessWorkerPool:
+	"""Worker processes for per-repository jobs that should scale with cores.
+
+	Jobs must be picklable module-level functions. At most ``processes`` jobs are
+	handed to the processes at once, so a job's timeout starts when a process is
+	free for it rather than when it was queued. A job that times out keeps its
+	process, and its slot, until it finishes; its result is discarded.
+	"""
+
+	def __init__(self, processes: int | None = None, timeout: float = 30.0):
+		self.processes = processes or os.cpu_count() or 1
+		self.timeout = timeout
+		self._executor: ProcessPoolExecutor | None = None
+		self._lock = threading.Lock()
+		self._slots: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+		self._counters = {
+			"submitted": 0,
+			"completed": 0,
+			"failed": 0,
+			"timed_out": 0,
+			"restarts": 0,
+		}
+		self._active = 0
+
+	@classmethod
+	def from_env(cls) -> "ProcessWorkerPool":
+		return cls(
+			processes=int(os.environ.get(PROCESSES_ENV, 0)) or None,
+			timeout=float(os.environ.get(PROCESS_TIMEOUT_ENV, 30)),
+		)
+
+	def _count(self, name: str, delta: int = 1) -> None:
+		with self._lock:
+			self._counters[name] += delta
+
+	def _slot(self) -> asyncio.Semaphore:
+		loop = asyncio.get_running_loop()
+		if loop not in self._slots:
+			self._slots[loop] = asyncio.Semaphore(self.processes)
+		return self._slots[loop]
+
+	def _get_executor(self) -> ProcessPoolExecutor:
+		with self._lock:
+			if self._executor is None:
+				# Forking this (threaded) server would copy locks other threads hold
+				method = (
+					"forkserver"
+					if "forkserver" in multiprocessing.get_all_start_methods()
+					else "spawn"
+				)
+				self._executor = ProcessPoolExecutor(
+					self.processes, mp_context=multiprocessing.get_context(method)
+				)
+			return self._executor
+
+	async def run(self, fn: Callable[..., Any], *args: Any, timeout: float | None = None) -> Any:
+		"""Run ``fn(*args)`` in a worker process and return its result.
+
+		Raises ``TimeoutError`` when it runs longer than ``timeout`` (default: the
+		pool's) and ``BrokenProcessPool`` when a worker process died under it.
+		"""
+		self._count("submitted")
+		slot = self._slot()
+		await slot.acquire()
+		executor = self._get_executor()
+		try:
+			job = executor.submit(fn, *args)
+		except BaseException as e:
+			slot.release()
+			if isinstance(e, BrokenProcessPool):
+				self._restart(executor)
+			raise
+		with self._lock:
+			self._active += 1
+		job.add_done_callback(self._finished)
+		# Held until the process is done with the job, even past its timeout
+		_release_when_done(job, asyncio.get_running_loop(), slot)
+		try:
+			result = await asyncio.wait_for(asyncio.wrap_future(job), timeout or self.timeout)
+		except TimeoutError:
+			self._count("timed_out")
+			raise
+		except BrokenProcessPool:
+			self._restart(executor)
+			raise
+		except Exception:
+			self._count("failed")
+			raise
+		self._count("completed")
+		return result
+
+	def _restart(self, executor: ProcessPoolExecutor) -> None:
+		# A worker was killed (out of memory, say); later jobs get fresh processes
+		with self._lock:
+			self._counters["failed"] += 1
+			if self._executor is executor:
+				self._executor = None
+				self._counters["restarts"] += 1
+		executor.shutdown(wait=False, cancel_futures=True)
+
+	def _finished(self, _: Future) -> None:
+		with self._lock:
+			self._active -= 1
+
+	def close(self) -> None:
+		with self._lock:
+			executor, self._executor = self._executor, None
+		if executor is not None:
+			executor.shutdown(wait=False, cancel_futures=True)
+
+	def stats(self) -> dict:
+		with self._lock:
+			return {
+				**self._counters,
+				"processes": self.processes,
+				"timeout_seconds": self.timeout,
+				"active": self._active,
+				"started": self._executor is not None,
+			}
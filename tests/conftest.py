@@ -1,10 +1,14 @@
+import importlib
+import os
 import time
+from datetime import datetime
 
 import git
 import pytest
 from starlette.testclient import TestClient
 
 from git_viz.app import app
+from git_viz.cache import ResultCache
 
 
 @pytest.fixture
@@ -42,8 +46,11 @@ def temp_git_repo(tmp_path):
 
 
 @pytest.fixture
-def client():
-	"""httpx-compatible TestClient against the FastAPI app."""
+def client(monkeypatch):
+	"""TestClient against the FastAPI app, with an empty result cache and no ref watcher."""
+	app_module = importlib.import_module("git_viz.app")
+	monkeypatch.setattr(app_module, "cache", ResultCache())
+	monkeypatch.setattr(app_module, "watcher", None)
 	return TestClient(app)
 
 
@@ -150,3 +157,92 @@ def large_repo(tmp_path):
 		repo.index.commit(f"Commit {i}: update {subdir}/file_{i}{ext}", author=author, committer=author)
 
 	return repo_dir
+
+
+@pytest.fixture
+def history_repo(tmp_path):
+	"""Renames, a binary file and a merge commit, for stats parity checks."""
+	repo_dir = tmp_path / f"history-{time.monotonic_ns()}"
+	repo_dir.mkdir()
+	repo = git.Repo.init(repo_dir)
+	repo.config_writer().set_value("user", "name", "Test Author").release()
+	repo.config_writer().set_value("user", "email", "test@example.com").release()
+
+	(repo_dir / "old_name.txt").write_text("one\ntwo\n")
+	(repo_dir / "image.bin").write_bytes(b"\x00\x01\x02\xff" * 64)
+	repo.index.add(["old_name.txt", "image.bin"])
+	repo.index.commit("Add text and binary files")
+
+	repo.git.mv("old_name.txt", "new_name.txt")
+	(repo_dir / "new_name.txt").write_text("one\ntwo\nthree\n")
+	repo.git.add("new_name.txt")
+	repo.git.commit("-m", "Rename and extend")
+
+	repo.git.checkout("-b", "feature")
+	(repo_dir / "feature.txt").write_text("feature\n")
+	repo.git.add("feature.txt")
+	repo.git.commit("-m", "Feature work")
+
+	repo.git.checkout("main")
+	(repo_dir / "main.txt").write_text("main\n")
+	repo.git.add("main.txt")
+	repo.git.commit("-m", "Main work")
+	repo.git.merge("--no-ff", "--no-edit", "feature")
+	return repo_dir
+
+
+@pytest.fixture
+def dated_repo(tmp_path):
+	"""Four commits by two authors at fixed UTC times across two months."""
+	repo_dir = tmp_path / f"dated-{time.monotonic_ns()}"
+	repo_dir.mkdir()
+	repo = git.Repo.init(repo_dir)
+	alice = git.Actor("Alice Dev", "alice@example.com")
+	bob = git.Actor("Bob Engineer", "bob@example.com")
+	commits = [
+		# Monday
+		(alice, "2024-01-01T10:00:00+00:00", "src/app.py", 3),
+		(bob, "2024-01-01T23:30:00+00:00", "docs/guide.md", 2),
+		# Wednesday
+		(alice, "2024-01-17T15:00:00+00:00", "src/app.py", 5),
+		# Saturday
+		(bob, "2024-02-03T08:00:00+00:00", "src/util.py", 1),
+	]
+	for author, date, path, lines in commits:
+		fpath = repo_dir / path
+		fpath.parent.mkdir(exist_ok=True)
+		fpath.write_text("line\n" * lines)
+		repo.index.add([path])
+		# GitPython wants git's internal "<unix time> <offset>" format
+		stamp = f"{int(datetime.fromisoformat(date).timestamp())} +0000"
+		repo.index.commit(
+			f"Update {path}", author=author, committer=author, author_date=stamp, commit_date=stamp
+		)
+	return repo_dir
+
+
+@pytest.fixture
+def latin1_repo(tmp_path):
+	"""Two commits, the first adding a file whose name is Latin-1 rather than UTF-8."""
+	repo_dir = tmp_path / f"latin1-{time.monotonic_ns()}"
+	repo_dir.mkdir()
+	repo = git.Repo.init(repo_dir)
+	repo.config_writer().set_value("user", "name", "Test Author").release()
+	repo.config_writer().set_value("user", "email", "test@example.com").release()
+
+	with open(os.fsencode(repo_dir) + b"/caf\xe9.txt", "wb") as f:
+		f.write(b"latin-1\n")
+	repo.git.add("-A")
+	repo.git.commit("-m", "Add Latin-1 name")
+	(repo_dir / "plain.txt").write_text("plain\n")
+	repo.git.add("plain.txt")
+	repo.git.commit("-m", "Add plain file")
+	return repo_dir
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+	"""Keep the on-disk history index out of the user's cache directory."""
+	cache = tmp_path / "git-viz-cache"
+	monkeypatch.setenv("GIT_VIZ_CACHE_DIR", str(cache))
+	return cache
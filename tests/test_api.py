@@ -1,5 +1,7 @@
+import json
 import pathlib
 
+from git_viz import columnar
 
 HTML_PATH = pathlib.Path(__file__).resolve().parent.parent / "src" / "git_viz" / "index.html"
 
@@ -69,3 +71,256 @@ def test_api_activity_default_path(client):
 	assert resp.status_code == 200
 	data = resp.json()
 	assert "authors" in data or "weekly" in data or isinstance(data, dict)
+
+
+def test_api_bootstrap_default_path(client):
+	resp = client.get("/api/bootstrap", params={"limit": 5})
+	assert resp.status_code == 200
+	data = resp.json()
+	assert set(data) == {"repo", "commits", "activity", "tree"}
+	assert len(data["commits"]) <= 5
+
+
+def test_index_html_loads_bootstrap():
+	content = HTML_PATH.read_text()
+	assert "/api/bootstrap" in content
+
+
+def test_api_non_utf8_path(client, latin1_repo):
+	params = {"path": str(latin1_repo)}
+	assert client.get("/api/repo", params=params).json()["commit_count"] == 2
+	commits = client.get("/api/commits", params=params).json()
+	assert commits[-1]["files"][0]["path"] == "caf\\xe9.txt"
+	tree = client.get("/api/tree", params=params).json()
+	assert "caf\\xe9.txt" in tree["files"]
+	deltas = client.get("/api/tree/deltas", params=params)
+	assert deltas.status_code == 200
+	assert client.get("/api/activity", params=params).status_code == 200
+
+
+def test_api_commits_cursor_pagination(client, large_repo):
+	params = {"path": str(large_repo), "page_size": 25}
+	seen = []
+	while True:
+		page = client.get("/api/commits", params=params).json()
+		seen.extend(c["hash"] for c in page)
+		if len(page) < 25:
+			break
+		params["after"] = page[-1]["hash"]
+	full = client.get("/api/commits", params={"path": str(large_repo)}).json()
+	assert seen == [c["hash"] for c in full]
+	assert len(seen) == 110
+
+
+def test_api_commits_unknown_cursor(client, multi_commit_repo):
+	params = {"path": str(multi_commit_repo), "after": "0" * 40}
+	assert client.get("/api/commits", params=params).status_code == 400
+	assert client.get("/api/commits", params={**params, "stream": True}).status_code == 400
+
+
+def test_api_commits_stream_ndjson(client, large_repo):
+	resp = client.get("/api/commits", params={"path": str(large_repo), "stream": True, "limit": 30})
+	assert resp.status_code == 200
+	assert resp.headers["content-type"].startswith("application/x-ndjson")
+	streamed = [json.loads(line) for line in resp.text.splitlines()]
+	listed = client.get("/api/commits", params={"path": str(large_repo), "limit": 30}).json()
+	assert streamed == listed
+
+
+def test_api_commits_stream_after_cursor(client, multi_commit_repo):
+	listed = client.get("/api/commits", params={"path": str(multi_commit_repo)}).json()
+	params = {"path": str(multi_commit_repo), "stream": True, "after": listed[1]["hash"]}
+	resp = client.get("/api/commits", params=params)
+	streamed = [json.loads(line) for line in resp.text.splitlines()]
+	assert [c["hash"] for c in streamed] == [c["hash"] for c in listed[2:]]
+
+
+def test_api_commits_stream_empty_repo(client, empty_repo):
+	resp = client.get("/api/commits", params={"path": str(empty_repo), "stream": True})
+	assert resp.status_code == 200
+	assert resp.text == ""
+
+
+def test_index_html_streams_commits():
+	content = HTML_PATH.read_text()
+	assert "stream=true" in content
+	assert "getReader()" in content
+
+
+def test_api_tree_deltas(client, multi_commit_repo):
+	resp = client.get("/api/tree/deltas", params={"path": str(multi_commit_repo)})
+	assert resp.status_code == 200
+	data = resp.json()
+	assert len(data["files"]) == 1
+	assert [list(d["added"]) for d in data["deltas"]] == [[f"file_{i}.txt"] for i in range(1, 5)]
+
+
+def test_api_clusters(client, large_repo):
+	params = {"path": str(large_repo), "max_nodes": 10}
+	top = client.get("/api/clusters", params=params).json()
+	assert {n["id"] for n in top["nodes"]} == {"src", "tests", "docs", "config"}
+	resp = client.get("/api/clusters", params={**params, "expand": ["docs", "src/"]})
+	nodes = {n["id"]: n for n in resp.json()["nodes"]}
+	# docs opens first and fills the budget, so src stays collapsed
+	assert len(nodes) == 10
+	assert nodes["docs/*"]["type"] == "rest"
+	assert nodes["src"]["type"] == "directory"
+	assert resp.json()["collapsed"] == ["src"]
+	assert client.get("/api/clusters", params={**params, "max_nodes": 1}).status_code == 422
+
+
+def test_api_cochange(client, history_repo):
+	params = {"path": str(history_repo), "min_support": 1, "top_k": 1}
+	resp = client.get("/api/cochange", params=params)
+	assert resp.status_code == 200
+	assert {"commits", "skipped_commits", "files", "edges"} <= resp.json().keys()
+	resp = client.get("/api/cochange", params={**params, "until": "yesterday"})
+	assert resp.status_code == 400
+
+
+def test_index_html_has_canvas_renderer():
+	content = HTML_PATH.read_text()
+	assert "canvas_above" in content
+	assert "d3.quadtree" in content
+	assert "debug-overlay" in content
+
+
+def test_index_html_runs_layout_in_worker():
+	content = HTML_PATH.read_text()
+	assert 'id="layout-worker"' in content
+	assert "new Worker(" in content
+	assert "Float32Array" in content
+	assert "d3.forceSimulation" not in content.split('id="layout-worker"')[0]
+
+
+def test_api_layout(client, multi_commit_repo):
+	resp = client.get("/api/layout", params={"path": str(multi_commit_repo), "keyframes": 2})
+	assert resp.status_code == 200
+	assert [f["index"] for f in resp.json()["keyframes"]] == [1, 4]
+
+
+def test_index_html_seeds_layout_from_keyframes():
+	content = HTML_PATH.read_text()
+	assert "/api/layout" in content
+	assert "seeds" in content
+
+
+def test_api_activity_bucket_and_window(client, dated_repo):
+	params = {"path": str(dated_repo), "bucket": "month", "since": "2024-02-01"}
+	resp = client.get("/api/activity", params=params)
+	assert resp.status_code == 200
+	assert resp.json()["commits_over_time"] == [{"month": "2024-02", "count": 1}]
+	resp = client.get("/api/activity", params={**params, "bucket": "year"})
+	assert resp.status_code == 400
+
+
+def test_api_filters(client, dated_repo):
+	params = {"path": str(dated_repo), "author": "alice", "pathspec": "src/*.py"}
+	commits = client.get("/api/commits", params=params).json()
+	assert [c["files"][0]["path"] for c in commits] == ["src/app.py", "src/app.py"]
+	streamed = client.get("/api/commits", params={**params, "stream": True})
+	assert [json.loads(line) for line in streamed.text.splitlines()] == commits
+	activity = client.get("/api/activity", params=params).json()
+	assert activity["commits_per_author"] == {"Alice Dev": 2}
+	tree = client.get("/api/tree", params={**params, "until": "2024-01-02"}).json()
+	assert list(tree["files"]) == ["src/app.py"]
+	assert client.get("/api/commits", params={**params, "since": "soon"}).status_code == 400
+	resp = client.get("/api/commits", params={**params, "stream": True, "pathspec": ":/"})
+	assert resp.status_code == 400
+
+
+def test_api_commits_columnar(client, multi_commit_repo):
+	params = {"path": str(multi_commit_repo)}
+	listed = client.get("/api/commits", params=params).json()
+	resp = client.get("/api/commits", params={**params, "format": "columnar"})
+	assert resp.status_code == 200
+	assert resp.headers["content-type"] == columnar.MEDIA_TYPE
+	assert resp.headers["content-encoding"] == "gzip"
+	payload = columnar.decode(resp.content)
+	assert payload["count"] == len(listed)
+	assert bytes(payload["columns"]["hash"][:20]).hex() == listed[0]["hash"]
+	# Accept negotiation picks the same payload
+	negotiated = client.get("/api/commits", params=params, headers={"Accept": columnar.MEDIA_TYPE})
+	assert negotiated.content == resp.content
+	assert negotiated.headers["vary"] == "Accept, Accept-Encoding"
+	# JSON from the same URL must not be cached for a client that asked for columnar
+	assert client.get("/api/commits", params=params).headers["vary"] == "Accept, Accept-Encoding"
+	assert client.get("/api/commits", params={**params, "format": "xml"}).status_code == 422
+
+
+def test_api_tree_columnar(client, multi_commit_repo):
+	params = {"path": str(multi_commit_repo)}
+	tree = client.get("/api/tree", params=params).json()
+	resp = client.get("/api/tree", params={**params, "format": "columnar"})
+	payload = columnar.decode(resp.content)
+	assert payload["commit"] == tree["commit"]
+	sizes = dict(zip(payload["paths"], payload["columns"]["size"]))
+	assert sizes == {p: info["size"] for p, info in tree["files"].items()}
+	assert client.get("/api/tree", params=params).headers["vary"] == "Accept, Accept-Encoding"
+
+
+def test_index_html_decodes_columnar():
+	content = HTML_PATH.read_text()
+	assert "format=columnar" in content
+	assert "function decodeColumnar" in content
+
+
+def test_index_html_follows_live_stream():
+	content = HTML_PATH.read_text()
+	assert "/api/stream?since=" in content
+	assert "treeTimeline.extend" in content
+
+
+def test_api_server_timing_and_metrics(client, multi_commit_repo):
+	params = {"path": str(multi_commit_repo)}
+	timing = client.get("/api/bootstrap", params=params).headers["server-timing"]
+	phases = dict(entry.split(";", 1) for entry in timing.split(", "))
+	assert {"sync", "history", "activity", "tree", "encode", "total"} <= phases.keys()
+	assert phases["git_processes"] != 'desc="0"'
+
+	resp = client.get("/metrics")
+	assert resp.headers["content-type"].startswith("text/plain")
+	assert 'git_viz_requests_total{endpoint="/api/bootstrap",status="200"}' in resp.text
+	assert 'git_viz_phase_seconds_count{endpoint="/api/bootstrap",phase="sync"}' in resp.text
+	assert "git_viz_handles_processes_spawned" in resp.text
+
+
+def test_api_profile(client, multi_commit_repo, tmp_path, monkeypatch):
+	params = {"path": str(multi_commit_repo), "profile": "1"}
+	assert "x-profile-report" not in client.get("/api/tree", params=params).headers
+
+	monkeypatch.setenv("GIT_VIZ_PROFILE_DIR", str(tmp_path / "profiles"))
+	# Profiled requests skip the cache, so the same one is profiled again
+	for _ in range(2):
+		report = client.get("/api/tree", params=params).headers["x-profile-report"]
+		assert "get_tree" in (tmp_path / "profiles" / f"{report}.txt").read_text()
+	assert len(list((tmp_path / "profiles").glob("*.prof"))) == 2
+
+
+def test_index_html_draws_directory_clusters():
+	content = HTML_PATH.read_text()
+	assert "/api/clusters?" in content
+	assert 'params.append("expand", dir)' in content
+
+
+def test_api_hotspots(client, history_repo):
+	params = {"path": str(history_repo), "metric": "churn", "limit": 1}
+	resp = client.get("/api/hotspots", params=params)
+	assert resp.status_code == 200
+	(top,) = resp.json()["files"]
+	assert top["path"] == "new_name.txt"
+	assert top["previous_paths"] == ["old_name.txt"]
+	assert client.get("/api/hotspots", params={**params, "metric": "size"}).status_code == 400
+
+
+def test_index_html_colors_by_hotspots():
+	content = HTML_PATH.read_text()
+	assert "/api/hotspots?metric=" in content
+	assert 'id="color-by"' in content
+	assert 'id="size-by"' in content
+
+
+def test_index_html_reads_static_exports():
+	content = HTML_PATH.read_text()
+	assert '<meta name="git-viz-data" content="">' in content
+	assert 'new DecompressionStream("gzip")' in content
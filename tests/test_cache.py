@@ -0,0 +1,187 @@
+import asyncio
+
+import git
+import pytest
+
+from git_viz.cache import HeadResolver, ResultCache
+from git_viz.workers import ClientDisconnectedError
+
+
+def _const(body: bytes):
+	async def compute():
+		return body
+
+	return compute
+
+
+class TestResultCache:
+	def test_hit_after_miss(self):
+		cache = ResultCache()
+		calls = []
+
+		async def compute():
+			calls.append(1)
+			return b"[]"
+
+		async def main():
+			await cache.get_or_compute("repo", "sha", "commits", (500,), compute)
+			return await cache.get_or_compute("repo", "sha", "commits", (500,), compute)
+
+		assert asyncio.run(main()) == b"[]"
+		assert len(calls) == 1
+		stats = cache.stats()
+		assert (stats["hits"], stats["misses"]) == (1, 1)
+
+	def test_lru_eviction_by_entries(self):
+		cache = ResultCache(max_entries=2)
+
+		async def main():
+			for endpoint in ("repo", "commits", "repo", "activity"):
+				await cache.get_or_compute("r", "sha", endpoint, (), _const(endpoint.encode()))
+
+		asyncio.run(main())
+		stats = cache.stats()
+		assert stats["entries"] == 2
+		assert stats["evictions"] == 1
+		assert stats["hits"] == 1
+
+	def test_eviction_by_bytes(self):
+		cache = ResultCache(max_bytes=10)
+
+		async def main():
+			await cache.get_or_compute("r", "sha", "a", (), _const(b"123456"))
+			await cache.get_or_compute("r", "sha", "b", (), _const(b"123456"))
+
+		asyncio.run(main())
+		assert cache.stats()["bytes"] == 6
+		assert cache.stats()["evictions"] == 1
+
+	def test_concurrent_requests_coalesce(self):
+		cache = ResultCache()
+		calls = []
+
+		async def compute():
+			calls.append(1)
+			await asyncio.sleep(0.05)
+			return b"{}"
+
+		async def main():
+			return await asyncio.gather(
+				*(cache.get_or_compute("r", "sha", "tree", ("HEAD",), compute) for _ in range(5))
+			)
+
+		assert asyncio.run(main()) == [b"{}"] * 5
+		assert len(calls) == 1
+		assert cache.stats()["coalesced"] == 4
+
+	def test_follower_takes_over_when_leader_disconnects(self):
+		cache = ResultCache()
+		calls = []
+
+		async def compute():
+			calls.append(1)
+			await asyncio.sleep(0.02)
+			if len(calls) == 1:
+				raise ClientDisconnectedError()
+			return b"ok"
+
+		async def main():
+			return await asyncio.gather(
+				cache.get_or_compute("r", "sha", "tree", (), compute),
+				cache.get_or_compute("r", "sha", "tree", (), compute),
+				return_exceptions=True,
+			)
+
+		leader, follower = asyncio.run(main())
+		assert isinstance(leader, ClientDisconnectedError)
+		assert follower == b"ok"
+
+	def test_head_change_invalidates_repo_entries(self):
+		cache = ResultCache()
+
+		async def main():
+			await cache.get_or_compute("r", "old", "repo", (), _const(b"old"))
+			await cache.get_or_compute("other", "x", "repo", (), _const(b"other"))
+			return await cache.get_or_compute("r", "new", "repo", (), _const(b"new"))
+
+		assert asyncio.run(main()) == b"new"
+		stats = cache.stats()
+		assert stats["invalidations"] == 1
+		assert stats["entries"] == 2
+
+
+class TestHeadResolver:
+	def test_resolves_loose_ref(self, multi_commit_repo):
+		expected = git.Repo(multi_commit_repo).head.commit.hexsha
+		assert HeadResolver().resolve(multi_commit_repo) == expected
+
+	def test_resolves_packed_ref(self, multi_commit_repo):
+		repo = git.Repo(multi_commit_repo)
+		repo.git.pack_refs("--all")
+		assert HeadResolver().resolve(multi_commit_repo) == repo.head.commit.hexsha
+
+	def test_detached_head(self, multi_commit_repo):
+		repo = git.Repo(multi_commit_repo)
+		first = list(repo.iter_commits())[-1]
+		repo.head.reference = first
+		assert HeadResolver().resolve(multi_commit_repo) == first.hexsha
+
+	def test_empty_repo(self, empty_repo):
+		assert HeadResolver().resolve(empty_repo) is None
+
+	def test_new_commit_seen(self, multi_commit_repo):
+		resolver = HeadResolver()
+		before = resolver.resolve(multi_commit_repo)
+		repo = git.Repo(multi_commit_repo)
+		(multi_commit_repo / "next.txt").write_text("next\n")
+		repo.index.add(["next.txt"])
+		after = repo.index.commit("Next").hexsha
+		assert resolver.resolve(multi_commit_repo) == after != before
+
+	def test_resolve_rev(self, multi_branch_repo):
+		repo = git.Repo(multi_branch_repo)
+		feature = repo.heads.feature.commit.hexsha
+		resolver = HeadResolver()
+		assert resolver.resolve_rev(multi_branch_repo, "feature") == feature
+		assert resolver.resolve_rev(multi_branch_repo, "feature~1^") == f"{feature}~1^"
+		assert resolver.resolve_rev(multi_branch_repo, "refs/heads/feature") == feature
+		repo.git.pack_refs("--all")
+		assert resolver.resolve_rev(multi_branch_repo, "feature") == feature
+
+	def test_resolve_rev_leaves_others_alone(self, multi_branch_repo):
+		resolver = HeadResolver()
+		for rev in ("HEAD", "HEAD~1", "abc1234", "feature@{1}", "missing", "../../HEAD"):
+			assert resolver.resolve_rev(multi_branch_repo, rev) == rev
+
+
+class TestCachedEndpoints:
+	@pytest.mark.parametrize(
+		"endpoint", ["/api/repo", "/api/commits", "/api/tree", "/api/activity"]
+	)
+	def test_second_request_is_a_hit(self, client, multi_commit_repo, endpoint):
+		first = client.get(endpoint, params={"path": str(multi_commit_repo)})
+		second = client.get(endpoint, params={"path": str(multi_commit_repo)})
+		assert first.json() == second.json()
+		assert client.get("/api/cache").json()["hits"] == 1
+
+	def test_new_commit_invalidates(self, client, multi_commit_repo):
+		params = {"path": str(multi_commit_repo)}
+		assert client.get("/api/repo", params=params).json()["commit_count"] == 5
+		repo = git.Repo(multi_commit_repo)
+		(multi_commit_repo / "next.txt").write_text("next\n")
+		repo.index.add(["next.txt"])
+		repo.index.commit("Next")
+		assert client.get("/api/repo", params=params).json()["commit_count"] == 6
+		assert client.get("/api/cache").json()["invalidations"] == 1
+
+	def test_other_ref_moving_invalidates(self, client, multi_branch_repo):
+		params = {"path": str(multi_branch_repo), "commit": "feature"}
+		repo = git.Repo(multi_branch_repo)
+		before = client.get("/api/tree", params=params).json()["commit"]
+		assert before == repo.heads.feature.commit.hexsha
+
+		# Commit on feature while HEAD stays on main
+		tree = repo.heads.feature.commit.tree
+		moved = repo.git.commit_tree(tree.hexsha, "-p", before, "-m", "More feature work")
+		repo.heads.feature.commit = moved
+		assert client.get("/api/tree", params=params).json()["commit"] == moved
@@ -0,0 +1,80 @@
+from git_viz.clusters import directory_clusters
+
+SIZES = {
+	"README.md": 10,
+	"src/app.py": 100,
+	"src/lib/a.py": 20,
+	"src/lib/b.py": 30,
+	"docs/guide.md": 5,
+	"vendor/x/1.c": 1,
+	"vendor/x/2.c": 1,
+	"vendor/y.c": 1,
+}
+
+
+def _change(*paths):
+	return [{"path": p, "insertions": 2, "deletions": 1} for p in paths]
+
+
+def _nodes(result):
+	return {n["id"]: n for n in result["nodes"]}
+
+
+def test_top_level_rollup():
+	commits = [_change("src/app.py", "src/lib/a.py", "docs/guide.md"), _change("src/lib/b.py")]
+	result = directory_clusters(SIZES, commits, min_support=1)
+	nodes = _nodes(result)
+	assert set(nodes) == {"README.md", "src", "docs", "vendor"}
+	assert nodes["src"] == {
+		"id": "src",
+		"type": "directory",
+		"parent": "",
+		"files": 3,
+		"size": 150,
+		"commits": 2,
+		"insertions": 6,
+		"deletions": 3,
+	}
+	assert nodes["README.md"]["type"] == "file"
+	assert result["edges"] == [{"source": "docs", "target": "src", "count": 1}]
+	assert result["collapsed"] == []
+
+
+def test_expand_opens_parents_first():
+	commits = [_change("src/app.py", "src/lib/a.py"), _change("src/lib/a.py", "src/lib/b.py")]
+	result = directory_clusters(
+		SIZES, commits, expand=["src/lib/", "src", "missing"], min_support=1
+	)
+	nodes = _nodes(result)
+	assert {"src/app.py", "src/lib/a.py", "src/lib/b.py"} <= nodes.keys()
+	assert "src" not in nodes and "src/lib" not in nodes
+	assert nodes["src/lib/a.py"]["parent"] == "src/lib"
+	assert {(e["source"], e["target"]) for e in result["edges"]} == {
+		("src/app.py", "src/lib/a.py"),
+		("src/lib/a.py", "src/lib/b.py"),
+	}
+	assert result["collapsed"] == ["missing"]
+
+
+def test_node_budget_folds_smallest_children():
+	sizes = {f"big/{i:03}.txt": i for i in range(1, 101)}
+	result = directory_clusters(sizes, [_change("big/001.txt")], expand=["big"], max_nodes=10)
+	nodes = _nodes(result)
+	assert len(nodes) == 10
+	assert nodes["big/*"]["type"] == "rest"
+	assert nodes["big/*"]["files"] == 91
+	assert nodes["big/*"]["commits"] == 1
+	assert "big/100.txt" in nodes
+
+
+def test_expansion_beyond_budget_stays_collapsed():
+	sizes = {"a/1": 1, "a/2": 1, "b/1": 1, "b/2": 1}
+	result = directory_clusters(sizes, [], expand=["a", "b"], max_nodes=3)
+	assert set(_nodes(result)) == {"a/1", "a/2", "b"}
+	assert result["collapsed"] == ["b"]
+
+
+def test_deleted_paths_count_towards_their_directory():
+	result = directory_clusters(SIZES, [_change("docs/old.md", "gone.txt")])
+	assert _nodes(result)["docs"]["commits"] == 1
+	assert sum(n["commits"] for n in result["nodes"]) == 1
@@ -0,0 +1,46 @@
+from git_viz.cochange import cochange_edges
+
+
+def _edges(result):
+	return {(e["source"], e["target"]): e["count"] for e in result["edges"]}
+
+
+class TestCochangeEdges:
+	def test_counts_pairs_and_files(self):
+		result = cochange_edges([["a", "b"], ["b", "a", "c"], ["c"]], min_support=1)
+		assert result["commits"] == 3
+		assert result["files"] == {"a": 2, "b": 2, "c": 2}
+		assert _edges(result) == {("a", "b"): 2, ("a", "c"): 1, ("b", "c"): 1}
+
+	def test_wide_commits_add_files_but_no_edges(self):
+		wide = [f"vendor/{i}" for i in range(2000)]
+		result = cochange_edges([wide, ["a", "b"]], max_files=10, min_support=1)
+		assert result["skipped_commits"] == 1
+		assert len(result["files"]) == 2002
+		assert _edges(result) == {("a", "b"): 1}
+
+	def test_min_support(self):
+		result = cochange_edges([["a", "b"], ["a", "b"], ["a", "c"]], min_support=2)
+		assert _edges(result) == {("a", "b"): 2}
+
+	def test_top_k_per_file(self):
+		# "hub" changes with everyone; each leaf only with the hub
+		commits = [["hub", f"leaf{i}"] for i in range(5) for _ in range(i + 1)]
+		result = cochange_edges(commits, min_support=1, top_k=2)
+		# Every leaf keeps its only edge, so the hub's top-2 cap doesn't drop any
+		assert len(result["edges"]) == 5
+		# Once leaf0 and leaf1 prefer each other, their hub edges are in nobody's top 1
+		result = cochange_edges(commits + [["leaf0", "leaf1"]] * 9, min_support=1, top_k=1)
+		assert _edges(result) == {
+			("leaf0", "leaf1"): 9,
+			("hub", "leaf4"): 5,
+			("hub", "leaf3"): 4,
+			("hub", "leaf2"): 3,
+		}
+
+	def test_edges_sorted_by_count(self):
+		result = cochange_edges([["a", "b"], ["c", "d"], ["c", "d"]], min_support=1)
+		assert [e["count"] for e in result["edges"]] == [2, 1]
+
+	def test_no_commits(self):
+		assert cochange_edges([]) == {"commits": 0, "skipped_commits": 0, "files": {}, "edges": []}
@@ -0,0 +1,79 @@
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from git_viz import columnar
+from git_viz.commit_store import CommitStore
+from git_viz.git_ops import _commit_dict
+
+BENCH = Path(__file__).resolve().parent.parent / "benchmarks" / "bench_wire_format.mjs"
+
+RECORDS = [
+	{
+		"hash": f"{i:02x}" * 20,
+		"parents": [],
+		"author": ("Alice", "Bob")[i % 2],
+		"email": ("alice@example.com", "bob@example.com")[i % 2],
+		"timestamp": 1_704_103_200 + i * 3_601,
+		"message": message,
+		"files": [{"path": p, "insertions": i, "deletions": 2 * i} for p in paths],
+	}
+	for i, (message, paths) in enumerate(
+		[("Initial", ["a.py", "b.md"]), ("Ünïcode\nbody", []), ("Tweak", ["a.py"])]
+	)
+]
+
+
+class TestColumnar:
+	def test_commit_columns(self):
+		payload = columnar.decode(columnar.encode_commits(CommitStore(RECORDS)))
+		cols = payload["columns"]
+		assert payload["count"] == 3
+		assert payload["authors"] == [["Alice", "alice@example.com"], ["Bob", "bob@example.com"]]
+		assert payload["paths"] == ["a.py", "b.md"]
+		assert list(cols["timestamp"]) == [r["timestamp"] for r in RECORDS]
+		assert list(cols["file_offsets"]) == [0, 2, 2, 3]
+		assert list(cols["file_path"]) == [0, 1, 0]
+		assert bytes(cols["hash"][20:40]).hex() == RECORDS[1]["hash"]
+		start, end = cols["message_offsets"][1:3]
+		assert bytes(cols["message"][start:end]).decode() == "Ünïcode\nbody"
+
+	def test_columns_are_aligned(self):
+		data = columnar.encode_commits(CommitStore(RECORDS))
+		header = json.loads(data[8 : 8 + int.from_bytes(data[4:8], "little")])
+		assert all(c["offset"] % 8 == 0 for c in header["columns"])
+
+	def test_tree(self):
+		payload = columnar.decode(columnar.encode_tree("abc", {"a": 3, "b/c": 1 << 40}))
+		assert payload["commit"] == "abc"
+		assert dict(zip(payload["paths"], payload["columns"]["size"])) == {"a": 3, "b/c": 1 << 40}
+
+	def test_rejects_other_payloads(self):
+		with pytest.raises(ValueError):
+			columnar.decode(b'{"commits": []}')
+
+
+# Decodes a payload with index.html's decoder and prints the commits as JSON
+DECODE = """
+import { readFileSync } from "node:fs";
+import { loadDecoder } from %(bench)s;
+
+const { decodeColumnar, columnarCommits } = loadDecoder();
+const bytes = readFileSync(%(payload)s);
+const buffer = bytes.buffer.slice(bytes.byteOffset, bytes.byteOffset + bytes.byteLength);
+console.log(JSON.stringify(columnarCommits(decodeColumnar(buffer))));
+"""
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_browser_decoder_matches_json(tmp_path):
+	payload = tmp_path / "commits.bin"
+	payload.write_bytes(columnar.encode_commits(CommitStore(RECORDS)))
+	script = tmp_path / "decode.mjs"
+	script.write_text(DECODE % {"bench": repr(BENCH.as_uri()), "payload": repr(str(payload))})
+	result = subprocess.run(["node", str(script)], capture_output=True, text=True)
+	assert result.returncode == 0, result.stderr
+	assert json.loads(result.stdout) == [_commit_dict(r) for r in RECORDS]
@@ -0,0 +1,41 @@
+from git_viz.commit_store import CommitStore
+
+
+def _record(i, author="Alice", files=(("a.py", 1, 0),), message="msg"):
+	return {
+		"hash": f"{i:040x}",
+		"parents": [],
+		"author": author,
+		"email": f"{author.lower()}@example.com",
+		"timestamp": 1_700_000_000 + i,
+		"message": message,
+		"files": [{"path": p, "insertions": ins, "deletions": dels} for p, ins, dels in files],
+	}
+
+
+class TestCommitStore:
+	def test_round_trips_records(self):
+		records = [
+			_record(0, files=(("a.py", 3, 1), ("b/c.md", 0, 7))),
+			_record(1, author="Bob", files=(), message="multi\nline ünïcode"),
+			_record(2, files=(("a.py", 2, 2),)),
+		]
+		store = CommitStore(records)
+		assert len(store) == 3
+		expected = [{k: v for k, v in r.items() if k != "parents"} for r in records]
+		assert list(store.records()) == expected
+
+	def test_interns_authors_and_paths(self):
+		store = CommitStore(
+			_record(i, author=("Alice", "Bob")[i % 2], files=(("a.py", 1, 0), ("b.py", 0, 1)))
+			for i in range(100)
+		)
+		assert store.author_names == ["Alice", "Bob"]
+		assert store.paths == ["a.py", "b.py"]
+		assert len(store.file_paths) == 200
+		assert store.timestamps.itemsize == 8
+
+	def test_empty(self):
+		store = CommitStore()
+		assert len(store) == 0
+		assert list(store.records()) == []
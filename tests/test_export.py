@@ -0,0 +1,79 @@
+import gzip
+import json
+
+import git
+import pytest
+
+from git_viz.cli import main
+from git_viz.export import DATA_DIR, MANIFEST, export
+from git_viz.git_ops import get_commits, get_hotspots, get_tree, get_tree_deltas
+
+
+def _read(out, name):
+	return json.loads(gzip.decompress((out / DATA_DIR / name).read_bytes()))
+
+
+def _manifest(out):
+	return json.loads((out / DATA_DIR / MANIFEST).read_text())
+
+
+def _add_commit(repo_dir, name):
+	repo = git.Repo(repo_dir)
+	(repo_dir / name).write_text(f"{name}\n")
+	repo.index.add([name])
+	return repo.index.commit(f"Add {name}").hexsha
+
+
+def test_exports_page_and_chunks(large_repo, tmp_path):
+	out = tmp_path / "site"
+	result = export(large_repo, out, processes=2, chunk_commits=40)
+	manifest = _manifest(out)
+	assert result["head"] == manifest["head"] == get_commits(large_repo, limit=1)[0]["hash"]
+	assert 'content="data/manifest.json"' in (out / "index.html").read_text()
+	assert manifest["repo"]["commit_count"] == 110
+	assert _read(out, manifest["tree"]) == get_tree(large_repo)
+	assert _read(out, manifest["hotspots"]["churn"]) == get_hotspots(large_repo, "churn", 5000)
+
+	# History chunks run oldest first and hold whole commits, newest first within each
+	assert [e["count"] for e in manifest["history"]] == [40, 40, 30]
+	commits = [c for e in reversed(manifest["history"]) for c in _read(out, e["commits"])]
+	assert commits == get_commits(large_repo, limit=1000)
+	deltas = [d for e in manifest["history"] for d in _read(out, e["deltas"])]
+	assert deltas == get_tree_deltas(large_repo, limit=1000)["deltas"]
+	assert manifest["history"][1]["before"] == manifest["history"][0]["last"]
+
+
+def test_reexport_is_incremental(large_repo, tmp_path):
+	out = tmp_path / "site"
+	export(large_repo, out, processes=2, chunk_commits=40)
+	before = _manifest(out)["history"]
+	again = export(large_repo, out, processes=2, chunk_commits=40)
+	assert again["written"] == again["removed"] == 0
+	assert again["history_reused"] == 3
+
+	_add_commit(large_repo, "later.txt")
+	result = export(large_repo, out, processes=2, chunk_commits=40)
+	after = _manifest(out)["history"]
+	assert result["history_reused"] == 2
+	assert after[:2] == before[:2]
+	assert after[2]["count"] == 31
+	# The newest chunk's old files are gone, and nothing unreferenced is left
+	files = {p.name for p in (out / DATA_DIR).iterdir()} - {MANIFEST}
+	assert before[2]["commits"] not in files
+	assert len(files) == result["chunks"]
+
+
+def test_empty_repo(empty_repo, tmp_path):
+	result = export(empty_repo, tmp_path / "site", processes=1)
+	assert result["head"] is None
+	assert _manifest(tmp_path / "site")["history"] == []
+
+
+def test_cli(multi_commit_repo, tmp_path, capsys):
+	assert main(["export", str(multi_commit_repo), str(tmp_path / "site"), "--processes", "1"]) == 0
+	assert capsys.readouterr().out.startswith("Exported ")
+	assert (tmp_path / "site" / "index.html").is_file()
+	with pytest.raises(SystemExit) as exc:
+		main(["export", str(tmp_path / "missing"), str(tmp_path / "other")])
+	assert exc.value.code == 1
+	assert not (tmp_path / "other").exists()
@@ -0,0 +1,64 @@
+import json
+import sqlite3
+
+import pytest
+
+from git_viz.filters import CommitFilter
+
+PATHS = ["src/app.py", "src/lib/util.py", "src.txt", "docs/guide.md", "README.md", "tests/a.py"]
+
+
+def _sql_matches(where):
+	conn = sqlite3.connect(":memory:")
+	sql, params = where.path_sql("path")
+	rows = conn.execute(
+		f"SELECT path FROM (SELECT value AS path FROM json_each(?)) WHERE {sql}",
+		(json.dumps(PATHS), *params),
+	)
+	return [path for (path,) in rows]
+
+
+@pytest.mark.parametrize(
+	"pathspec, expected",
+	[
+		("src", ["src/app.py", "src/lib/util.py"]),
+		("src/", ["src/app.py", "src/lib/util.py"]),
+		("src/app.py", ["src/app.py"]),
+		("*.py", ["src/app.py", "src/lib/util.py", "tests/a.py"]),
+		("src/*.py", ["src/app.py", "src/lib/util.py"]),
+		("[!s]*.md", ["docs/guide.md", "README.md"]),
+		("?????.md", []),
+	],
+)
+def test_python_and_sql_agree(pathspec, expected):
+	where = CommitFilter(pathspec=pathspec)
+	assert [p for p in PATHS if where.matches_path(p)] == expected
+	assert _sql_matches(where) == expected
+
+
+@pytest.mark.parametrize(
+	"pathspec, directory",
+	[(None, ""), ("src/lib", "src/lib"), ("src/*.py", "src"), ("*.md", ""), ("a/b?/c", "a")],
+)
+def test_directory(pathspec, directory):
+	assert CommitFilter(pathspec=pathspec).directory() == directory
+
+
+def test_log_args():
+	where = CommitFilter("Bob", "src", since=100, until=200)
+	assert where.log_args() == [
+		"--fixed-strings",
+		"--regexp-ignore-case",
+		"--author=Bob",
+		"--since=@100",
+		"--until=@199",
+		"--full-history",
+	]
+	assert where.pathspecs() == ["src"]
+	assert CommitFilter().log_args() == []
+	assert not CommitFilter(author="", pathspec="/")
+
+
+def test_pathspec_magic_rejected():
+	with pytest.raises(ValueError, match="Unsupported pathspec"):
+		CommitFilter(pathspec=":(exclude)src")
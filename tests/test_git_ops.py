@@ -1,7 +1,27 @@
 import git
 import pytest
-
-from git_viz.git_ops import get_activity, get_commits, get_repo_metadata, get_tree
+from fastapi.responses import JSONResponse
+
+from git_viz import git_ops
+from git_viz.git_ops import (
+	get_activity,
+	get_bootstrap,
+	get_clusters,
+	get_cochange,
+	get_commits,
+	get_commits_json,
+	get_history_chunk,
+	get_history_shas,
+	get_hotspots,
+	get_layout,
+	get_repo_metadata,
+	get_snapshot,
+	get_tree,
+	get_tree_deltas,
+	get_update,
+	iter_commits,
+)
+from git_viz.history_index import HistoryIndex
 
 
 # --- get_repo_metadata ---
@@ -123,6 +143,11 @@ class TestGetCommits:
 		assert "Feature commit 1" not in messages
 		assert "Feature commit 2" not in messages
 
+	def test_json_matches_dicts(self, multi_commit_repo):
+		expected = JSONResponse(get_commits(multi_commit_repo)).body
+		assert get_commits_json(multi_commit_repo) == expected
+		assert get_commits_json(multi_commit_repo, limit=0) == b"[]"
+
 	def test_large_repo_default_limit(self, large_repo):
 		result = get_commits(large_repo)
 		assert len(result) == 110
@@ -136,6 +161,122 @@ class TestGetCommits:
 		authors = {c["author"] for c in result}
 		assert authors == {"Alice Dev", "Bob Engineer", "Carol Tester"}
 
+	def test_stats_match_gitpython(self, history_repo):
+		repo = git.Repo(history_repo)
+		expected = [
+			(c.hexsha, {f: (s["insertions"], s["deletions"]) for f, s in c.stats.files.items()})
+			for c in repo.iter_commits()
+		]
+		result = get_commits(history_repo)
+		actual = [
+			(c["hash"], {f["path"]: (f["insertions"], f["deletions"]) for f in c["files"]})
+			for c in result
+		]
+		assert actual == expected
+
+	def test_merge_diffed_against_first_parent(self, history_repo):
+		merge = get_commits(history_repo)[0]
+		assert merge["message"].startswith("Merge branch")
+		assert [f["path"] for f in merge["files"]] == ["feature.txt"]
+
+	def test_rename_reported_as_delete_and_add(self, history_repo):
+		rename = next(c for c in get_commits(history_repo) if c["message"] == "Rename and extend")
+		stats = {f["path"]: (f["insertions"], f["deletions"]) for f in rename["files"]}
+		assert stats == {"old_name.txt": (0, 2), "new_name.txt": (3, 0)}
+
+	def test_binary_file_counts_zero(self, history_repo):
+		first = get_commits(history_repo)[-1]
+		stats = {f["path"]: (f["insertions"], f["deletions"]) for f in first["files"]}
+		assert stats["image.bin"] == (0, 0)
+
+
+class TestIterCommits:
+	def test_cold_index_streams_from_git_log(self, large_repo, monkeypatch):
+		def no_sync(self):
+			raise AssertionError("cold streaming should not wait for the index")
+
+		monkeypatch.setattr(HistoryIndex, "sync", no_sync)
+		streamed = list(iter_commits(large_repo, limit=15))
+		monkeypatch.undo()
+		assert streamed == get_commits(large_repo, limit=15)
+
+	def test_warm_index_with_cursor(self, multi_commit_repo):
+		listed = get_commits(multi_commit_repo)
+		streamed = list(iter_commits(multi_commit_repo, after=listed[0]["hash"]))
+		assert streamed == listed[1:]
+
+	def test_warm_stream_returns_handle(self, multi_commit_repo):
+		get_commits(multi_commit_repo)
+		stream = iter_commits(multi_commit_repo, limit=5)
+		first = next(stream)
+		# A slow reader of an indexed stream holds no pooled repository handle
+		assert git_ops.repos.stats()["in_use"] == 0
+		assert [first, *stream] == get_commits(multi_commit_repo, limit=5)
+
+	def test_empty_repo(self, empty_repo):
+		assert list(iter_commits(empty_repo)) == []
+
+	@pytest.mark.parametrize(
+		"filters",
+		[
+			{"author": "bob"},
+			{"pathspec": "src"},
+			{"pathspec": "*.md"},
+			{"pathspec": "[!d]*/*.py"},
+			{
+				"author": "ALICE@",
+				"pathspec": "src/app.py",
+				"since": "2024-01-10",
+				"until": "2024-02-01",
+			},
+		],
+	)
+	def test_cold_filters_match_index(self, dated_repo, monkeypatch, filters):
+		def no_sync(self):
+			raise AssertionError("cold streaming should not wait for the index")
+
+		monkeypatch.setattr(HistoryIndex, "sync", no_sync)
+		streamed = list(iter_commits(dated_repo, 10, **filters))
+		monkeypatch.undo()
+		assert streamed
+		assert streamed == get_commits(dated_repo, 10, **filters)
+
+
+class TestCommitFilters:
+	def test_author(self, dated_repo):
+		commits = get_commits(dated_repo, 10, author="bob@EXAMPLE")
+		assert [c["author"] for c in commits] == ["Bob Engineer", "Bob Engineer"]
+
+	def test_pathspec_lists_matching_files_only(self, single_commit_repo):
+		commits = get_commits(single_commit_repo, 10, pathspec="*.py")
+		assert [f["path"] for f in commits[0]["files"]] == ["main.py"]
+		assert get_commits(single_commit_repo, 10, pathspec="missing") == []
+
+	def test_date_range(self, dated_repo):
+		commits = get_commits(dated_repo, 10, since="2024-01-01T23:30:00", until="2024-01-17")
+		assert [c["date"] for c in commits] == ["2024-01-01T23:30:00+00:00"]
+
+	def test_until_is_exclusive_everywhere(self, dated_repo):
+		# Alice's second commit is at exactly the until timestamp
+		window = {"since": "2024-01-01T23:30:00", "until": "2024-01-17T15:00:00"}
+		# Read straight off git log while the index is still cold
+		cold = [c["hash"] for c in iter_commits(dated_repo, 10, **window)]
+		commits = get_commits(dated_repo, 10, **window)
+		assert [c["date"] for c in commits] == ["2024-01-01T23:30:00+00:00"]
+		assert cold == [c["hash"] for c in commits]
+		assert get_cochange(dated_repo, limit=None, **window)["commits"] == 1
+		assert get_tree(dated_repo, until=window["until"])["commit"] == commits[0]["hash"]
+
+	def test_paginates_within_filter(self, dated_repo):
+		first, second = get_commits(dated_repo, 10, pathspec="src")[:2]
+		assert get_commits(dated_repo, 1, first["hash"], pathspec="src") == [second]
+
+	def test_bad_inputs(self, dated_repo):
+		with pytest.raises(ValueError, match="Invalid since timestamp"):
+			get_commits(dated_repo, 10, since="last week")
+		with pytest.raises(ValueError, match="Unsupported pathspec"):
+			get_commits(dated_repo, 10, pathspec=":!docs")
+
 
 # --- get_tree ---
 
@@ -188,6 +329,26 @@ class TestGetTree:
 		assert has_subdir
 		assert len(result["files"]) == 110
 
+	def test_pathspec(self, dated_repo):
+		assert list(get_tree(dated_repo, pathspec="src")["files"]) == ["src/app.py", "src/util.py"]
+		assert list(get_tree(dated_repo, pathspec="*.md")["files"]) == ["docs/guide.md"]
+		assert list(get_tree(dated_repo, pathspec="src/util.py")["files"]) == ["src/util.py"]
+		assert get_tree(dated_repo, pathspec="lib")["files"] == {}
+
+	def test_subtree_cache_keeps_full_paths(self, dated_repo):
+		get_tree(dated_repo, pathspec="src")
+		assert set(get_tree(dated_repo)["files"]) == {"src/app.py", "src/util.py", "docs/guide.md"}
+		assert list(get_tree(dated_repo, pathspec="src/*")["files"]) == [
+			"src/app.py",
+			"src/util.py",
+		]
+
+	def test_until_picks_older_commit(self, dated_repo):
+		result = get_tree(dated_repo, until="2024-01-20")
+		assert result["commit"] == get_commits(dated_repo)[1]["hash"]
+		assert "src/util.py" not in result["files"]
+		assert get_tree(dated_repo, until="2023-12-31") == {"commit": None, "files": {}}
+
 	def test_multi_branch_tree_reflects_active_branch(self, multi_branch_repo):
 		result = get_tree(multi_branch_repo)
 		paths = set(result["files"].keys())
@@ -197,6 +358,128 @@ class TestGetTree:
 		assert "feature_file.txt" not in paths
 
 
+# --- get_tree_deltas ---
+
+
+def _replay(result):
+	files = dict(result["files"])
+	trees = [dict(files)]
+	for delta in result["deltas"]:
+		for path, size in delta["removed"].items():
+			assert files.pop(path) == size
+		for path, (old, new) in delta["resized"].items():
+			assert files[path] == old
+			files[path] = new
+		files.update(delta["added"])
+		trees.append(dict(files))
+	return trees
+
+
+class TestGetTreeDeltas:
+	def test_empty_repo(self, empty_repo):
+		assert get_tree_deltas(empty_repo) == {"base": None, "files": {}, "deltas": []}
+
+	def test_replay_matches_get_tree(self, history_repo):
+		result = get_tree_deltas(history_repo)
+		shas = [c["hash"] for c in get_commits(history_repo)][::-1]
+		assert result["base"] == shas[0]
+		assert [d["commit"] for d in result["deltas"]] == shas[1:]
+		expected = [
+			{p: info["size"] for p, info in get_tree(history_repo, commit=sha)["files"].items()}
+			for sha in shas
+		]
+		assert _replay(result) == expected
+
+	def test_rename_is_remove_plus_add(self, history_repo):
+		result = get_tree_deltas(history_repo)
+		rename = result["deltas"][0]
+		assert rename["removed"] == {"old_name.txt": 8}
+		assert rename["added"] == {"new_name.txt": 14}
+
+	def test_limit_sets_base(self, large_repo):
+		result = get_tree_deltas(large_repo, limit=10)
+		assert len(result["deltas"]) == 9
+		assert len(result["files"]) == 101
+		assert len(_replay(result)[-1]) == 110
+
+
+class TestGetHistoryChunk:
+	def test_empty_repo(self, empty_repo):
+		assert get_history_shas(empty_repo) == []
+		assert get_history_chunk(empty_repo, None, 10) == {"commits": [], "deltas": []}
+
+	def test_chunks_cover_history(self, large_repo):
+		shas = get_history_shas(large_repo)
+		assert shas == [c["hash"] for c in get_commits(large_repo, limit=1000)]
+		older = get_history_chunk(large_repo, shas[19], 10, shas[30])
+		assert [c["hash"] for c in older["commits"]] == shas[20:30]
+		assert [d["commit"] for d in older["deltas"]] == shas[20:30][::-1]
+		# The same deltas as the timeline's, chunk boundary included
+		timeline = get_tree_deltas(large_repo, limit=31)
+		assert older["deltas"] == timeline["deltas"][:10]
+
+	def test_oldest_chunk_has_no_base_delta(self, history_repo):
+		shas = get_history_shas(history_repo)
+		oldest = get_history_chunk(history_repo, shas[-3], 2)
+		assert [c["hash"] for c in oldest["commits"]] == shas[-2:]
+		assert [d["commit"] for d in oldest["deltas"]] == [shas[-2]]
+
+
+# --- get_clusters ---
+
+
+class TestGetClusters:
+	def test_empty_repo(self, empty_repo):
+		result = get_clusters(empty_repo)
+		assert result == {"commit": None, "nodes": [], "edges": [], "collapsed": []}
+
+	def test_rollup_matches_tree(self, large_repo):
+		files = get_tree(large_repo)["files"]
+		result = get_clusters(large_repo)
+		nodes = {n["id"]: n for n in result["nodes"]}
+		assert set(nodes) == {"src", "tests", "docs", "config"}
+		assert sum(n["files"] for n in nodes.values()) == len(files)
+		assert nodes["src"]["size"] == sum(
+			info["size"] for p, info in files.items() if p.startswith("src/")
+		)
+		assert sum(n["commits"] for n in nodes.values()) == len(get_commits(large_repo))
+
+	def test_expand_within_budget(self, large_repo):
+		result = get_clusters(large_repo, limit=20, expand=("src",), max_nodes=12)
+		nodes = {n["id"]: n for n in result["nodes"]}
+		assert len(nodes) == 12
+		assert nodes["src/*"]["type"] == "rest"
+		assert nodes["src/*"]["parent"] == "src"
+		assert {"tests", "docs", "config"} <= nodes.keys()
+
+
+class TestGetHotspots:
+	def test_empty_repo(self, empty_repo):
+		assert get_hotspots(empty_repo) == {"metric": "churn", "files": []}
+
+	def test_rename_followed(self, history_repo):
+		files = {f["path"]: f for f in get_hotspots(history_repo, "commits")["files"]}
+		assert set(files) == {"new_name.txt", "image.bin", "feature.txt", "main.txt"}
+		renamed = files["new_name.txt"]
+		assert renamed["commits"] == 2
+		assert renamed["previous_paths"] == ["old_name.txt"]
+		assert renamed["top_authors"] == [{"name": "Test Author", "commits": 2, "churn": 7}]
+
+	def test_matches_commit_stats(self, large_repo):
+		result = get_hotspots(large_repo, "commits", limit=5, pathspec="src")
+		counts = {}
+		for c in get_commits(large_repo, limit=1000):
+			for f in c["files"]:
+				counts[f["path"]] = counts.get(f["path"], 0) + 1
+		assert [(f["path"], f["commits"]) for f in result["files"]] == sorted(
+			((p, n) for p, n in counts.items() if p.startswith("src/")), key=lambda x: (-x[1], x[0])
+		)[:5]
+
+	def test_unknown_metric(self, single_commit_repo):
+		with pytest.raises(ValueError, match="Invalid metric"):
+			get_hotspots(single_commit_repo, "size")
+
+
 # --- get_activity ---
 
 
@@ -252,3 +535,260 @@ class TestGetActivity:
 		assert "week" in entry
 		assert "count" in entry
 		assert isinstance(entry["count"], int)
+
+	def test_day_and_month_buckets(self, dated_repo):
+		days = get_activity(dated_repo, bucket="day")["commits_over_time"]
+		assert days == [
+			{"day": "2024-01-01", "count": 2},
+			{"day": "2024-01-17", "count": 1},
+			{"day": "2024-02-03", "count": 1},
+		]
+		months = get_activity(dated_repo, bucket="month")["commits_over_time"]
+		assert months == [{"month": "2024-01", "count": 3}, {"month": "2024-02", "count": 1}]
+
+	def test_per_author_series(self, dated_repo):
+		series = get_activity(dated_repo, bucket="month")["series"]
+		assert series == {
+			"Alice Dev": {"2024-01": 2},
+			"Bob Engineer": {"2024-01": 1, "2024-02": 1},
+		}
+
+	def test_series_limited_to_top_authors(self, dated_repo):
+		result = get_activity(dated_repo, series_authors=1)
+		# Tied on commits; Bob committed most recently
+		assert list(result["series"]) == ["Bob Engineer"]
+		assert len(result["commits_per_author"]) == 2
+
+	def test_churn(self, dated_repo):
+		churn = get_activity(dated_repo, bucket="month")["churn"]
+		# The third commit grows src/app.py from 3 to 5 lines
+		assert churn == [
+			{"month": "2024-01", "insertions": 7, "deletions": 0},
+			{"month": "2024-02", "insertions": 1, "deletions": 0},
+		]
+
+	def test_hour_of_week_heatmap(self, dated_repo):
+		heatmap = get_activity(dated_repo)["hour_of_week"]
+		assert len(heatmap) == 7 and all(len(row) == 24 for row in heatmap)
+		assert (heatmap[0][10], heatmap[0][23], heatmap[2][15], heatmap[5][8]) == (1, 1, 1, 1)
+		assert sum(map(sum, heatmap)) == 4
+
+	def test_since_until_window(self, dated_repo):
+		result = get_activity(dated_repo, bucket="day", since="2024-01-02", until="2024-02-01")
+		assert result["commits_over_time"] == [{"day": "2024-01-17", "count": 1}]
+		assert result["commits_per_author"] == {"Alice Dev": 1}
+		assert sum(map(sum, result["hour_of_week"])) == 1
+
+	def test_window_widens_to_whole_days(self, dated_repo):
+		# Both ends fall mid-day, so Alice's 10:00 and 15:00 commits still count
+		result = get_activity(dated_repo, since="2024-01-01T12:00:00", until="2024-01-17T12:00:00")
+		assert result["commits_per_author"] == {"Alice Dev": 2, "Bob Engineer": 1}
+
+	def test_author_and_pathspec(self, dated_repo):
+		result = get_activity(dated_repo, bucket="month", pathspec="src")
+		assert result["commits_per_author"] == {"Alice Dev": 2, "Bob Engineer": 1}
+		# Lines in docs/guide.md no longer count
+		assert result["churn"] == [
+			{"month": "2024-01", "insertions": 5, "deletions": 0},
+			{"month": "2024-02", "insertions": 1, "deletions": 0},
+		]
+		result = get_activity(dated_repo, bucket="day", since="2024-01-02", author="bob")
+		assert result["commits_over_time"] == [{"day": "2024-02-03", "count": 1}]
+		assert result["series"] == {"Bob Engineer": {"2024-02-03": 1}}
+		assert sum(map(sum, result["hour_of_week"])) == 1
+
+	def test_invalid_bucket(self, dated_repo):
+		with pytest.raises(ValueError, match="Invalid bucket"):
+			get_activity(dated_repo, bucket="fortnight")
+
+	def test_rollup_updated_incrementally(self, dated_repo):
+		get_activity(dated_repo)
+		repo = git.Repo(dated_repo)
+		(dated_repo / "late.txt").write_text("late\n")
+		repo.index.add(["late.txt"])
+		# 2024-02-03T09:00:00Z
+		repo.index.commit("Late", author_date="1706950800 +0000", commit_date="1706950800 +0000")
+		result = get_activity(dated_repo, bucket="day")
+		assert result["commits_over_time"][-1] == {"day": "2024-02-03", "count": 2}
+
+
+# --- get_bootstrap ---
+
+
+class TestGetBootstrap:
+	def test_empty_repo(self, empty_repo):
+		result = get_bootstrap(empty_repo)
+		assert result["repo"]["commit_count"] == 0
+		assert result["commits"] == []
+		assert result["activity"]["commits_over_time"] == []
+		assert result["tree"]["files"] == {}
+
+	def test_matches_individual_views(self, large_repo):
+		result = get_bootstrap(large_repo, limit=20)
+		assert result["repo"] == get_repo_metadata(large_repo)
+		assert result["activity"] == get_activity(large_repo)
+		assert result["commits"] == get_commits(large_repo, limit=20)
+		assert result["tree"] == get_tree(large_repo)
+
+	def test_single_index_sync(self, large_repo, monkeypatch):
+		calls = []
+		original = HistoryIndex.sync
+
+		def counting(self):
+			calls.append(1)
+			return original(self)
+
+		monkeypatch.setattr(HistoryIndex, "sync", counting)
+		get_bootstrap(large_repo)
+		assert len(calls) == 1
+
+
+# --- get_snapshot / get_update ---
+
+
+def _add_commits(repo_dir, count, prefix="live"):
+	repo = git.Repo(repo_dir)
+	for i in range(count):
+		name = f"{prefix}_{i}.txt"
+		(repo_dir / name).write_text(f"{prefix} {i}\n" * (i + 1))
+		repo.index.add([name])
+		repo.index.commit(f"{prefix} {i}")
+	return repo.head.commit.hexsha
+
+
+class TestGetSnapshot:
+	def test_bootstrap_plus_head(self, large_repo):
+		snapshot = get_snapshot(large_repo, limit=20)
+		assert snapshot.pop("head") == snapshot["commits"][0]["hash"]
+		assert snapshot == get_bootstrap(large_repo, limit=20)
+
+	def test_empty_repo(self, empty_repo):
+		assert get_snapshot(empty_repo)["head"] is None
+
+
+class TestGetUpdate:
+	def test_new_commits_and_tree_deltas(self, multi_commit_repo):
+		since = get_snapshot(multi_commit_repo)["head"]
+		head = _add_commits(multi_commit_repo, 3)
+		update = get_update(multi_commit_repo, since, head)
+		assert (update["since"], update["head"], update["reset"]) == (since, head, False)
+		assert update["commits"] == get_commits(multi_commit_repo, limit=3)
+		assert update["tree"]["deltas"] == get_tree_deltas(multi_commit_repo, limit=4)["deltas"]
+
+	def test_activity_delta_adds_up(self, multi_commit_repo):
+		before = get_activity(multi_commit_repo)
+		since = get_snapshot(multi_commit_repo)["head"]
+		delta = get_update(multi_commit_repo, since, _add_commits(multi_commit_repo, 2))["activity"]
+		after = get_activity(multi_commit_repo)
+
+		per_author = dict(before["commits_per_author"])
+		for author, n in delta["commits_per_author"].items():
+			per_author[author] = per_author.get(author, 0) + n
+		assert per_author == after["commits_per_author"]
+		weeks = {w["week"]: w["count"] for w in before["commits_over_time"]}
+		for w in delta["commits_over_time"]:
+			weeks[w["week"]] = weeks.get(w["week"], 0) + w["count"]
+		assert weeks == {w["week"]: w["count"] for w in after["commits_over_time"]}
+		assert [
+			[a + b for a, b in zip(x, y)]
+			for x, y in zip(before["hour_of_week"], delta["hour_of_week"])
+		] == after["hour_of_week"]
+
+	def test_stops_at_requested_head(self, multi_commit_repo):
+		since = get_snapshot(multi_commit_repo)["head"]
+		head = _add_commits(multi_commit_repo, 2)
+		_add_commits(multi_commit_repo, 1, prefix="later")
+		update = get_update(multi_commit_repo, since, head)
+		assert update["commits"] == get_commits(multi_commit_repo, limit=3)[1:]
+		assert update["tree"]["deltas"][-1]["commit"] == head
+
+	def test_rewritten_history_resets(self, multi_commit_repo):
+		since = _add_commits(multi_commit_repo, 1)
+		git.Repo(multi_commit_repo).git.reset("--hard", "HEAD~1")
+		head = _add_commits(multi_commit_repo, 1, prefix="other")
+		assert get_update(multi_commit_repo, since, head) == {
+			"since": since,
+			"head": head,
+			"reset": True,
+		}
+
+	def test_too_many_new_commits_resets(self, multi_commit_repo):
+		since = get_snapshot(multi_commit_repo)["head"]
+		head = _add_commits(multi_commit_repo, 3)
+		assert get_update(multi_commit_repo, since, head, limit=2)["reset"] is True
+
+
+class TestGetCochange:
+	def test_empty_repo(self, empty_repo):
+		assert get_cochange(empty_repo)["edges"] == []
+
+	def test_edges_from_history(self, history_repo):
+		result = get_cochange(history_repo, min_support=1)
+		assert result["commits"] == 5
+		edges = {(e["source"], e["target"]) for e in result["edges"]}
+		assert edges == {("image.bin", "old_name.txt"), ("new_name.txt", "old_name.txt")}
+
+	def test_max_files_skips_wide_commits(self, history_repo):
+		result = get_cochange(history_repo, min_support=1, max_files=1)
+		assert result["skipped_commits"] == 2
+		assert result["edges"] == []
+
+	def test_time_window(self, large_repo):
+		dates = [c["date"] for c in get_commits(large_repo, limit=200)]
+		result = get_cochange(large_repo, limit=None, since=dates[-1], until=dates[-1])
+		assert result["commits"] == 0
+
+	def test_invalid_since(self, multi_commit_repo):
+		with pytest.raises(ValueError, match="Invalid since"):
+			get_cochange(multi_commit_repo, since="last tuesday")
+
+
+def _cochange_repo(repo_dir):
+	"""Files changed in pairs, each pair twice, plus a file that is always changed alone."""
+	repo = git.Repo.init(repo_dir)
+	for d in ("src", "docs"):
+		(repo_dir / d).mkdir()
+	for i in range(8):
+		pair = [f"src/a_{i}.py", f"docs/b_{i}.md"] if i % 2 else [f"src/a_{i}.py", f"src/b_{i}.py"]
+		for round_ in range(2):
+			for name in [*pair, "alone.txt"]:
+				(repo_dir / name).write_text(f"{i} {round_}\n")
+			repo.index.add(pair)
+			repo.index.commit(f"Pair {i} round {round_}")
+			repo.index.add(["alone.txt"])
+			repo.index.commit(f"Alone {i} round {round_}")
+	return repo_dir
+
+
+class TestGetLayout:
+	def test_empty_repo(self, empty_repo):
+		assert get_layout(empty_repo) == {"keyframes": []}
+
+	def test_keyframes_cover_timeline(self, tmp_path):
+		repo = _cochange_repo(tmp_path / "cochange")
+		result = get_layout(repo, limit=32, keyframes=4)
+		frames = result["keyframes"]
+		assert [f["index"] for f in frames] == [7, 15, 23, 31]
+		assert frames[-1]["commit"] == get_commits(repo, limit=1)[0]["hash"]
+		# Each keyframe lays out the linked files so far; files never changed with
+		# another one are left to the browser
+		assert [len(f["positions"]) for f in frames] == [4, 8, 12, 16]
+		assert "alone.txt" not in frames[-1]["positions"]
+		assert all(len(xy) == 2 for xy in frames[-1]["positions"].values())
+
+	def test_max_nodes(self, tmp_path):
+		repo = _cochange_repo(tmp_path / "cochange")
+		frames = get_layout(repo, keyframes=1, max_nodes=6)["keyframes"]
+		assert len(frames[0]["positions"]) == 6
+
+	def test_more_keyframes_than_commits(self, multi_commit_repo):
+		frames = get_layout(multi_commit_repo, keyframes=50)["keyframes"]
+		assert [f["index"] for f in frames] == [0, 1, 2, 3, 4]
+
+	def test_path_filter(self, tmp_path):
+		repo = _cochange_repo(tmp_path / "cochange")
+		frames = get_layout(repo, keyframes=1, path_filter="SRC/")["keyframes"]
+		# Only the pairs with both files under src/ are linked within the filter
+		assert sorted(frames[0]["positions"]) == sorted(
+			f"src/{name}_{i}.py" for i in (0, 2, 4, 6) for name in ("a", "b")
+		)
@@ -0,0 +1,67 @@
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+BENCH = Path(__file__).resolve().parent.parent / "benchmarks" / "bench_graph_engine.mjs"
+
+# Drives the engine through playback, checkpointed seeks, streamed batches,
+# author/path masks, appended commits and the per-commit edge cap, checking each state against a
+# full recompute.
+CHECK = """
+import { loadEngine, recompute, synthCommits } from %(bench)s;
+
+const commits = synthCommits({ commits: 600, files: 40, authors: 4 });
+const engine = loadEngine()({ checkpointEvery: 32, maxFilesPerCommit: 4 });
+const authors = new Set(commits.map(c => c.author));
+let filter = null;
+
+function check(label) {
+	const want = recompute(commits.slice(-engine.length), engine.position, authors, filter, 4);
+	const files = new Map(engine.files());
+	const pairs = new Map(engine.pairs().map(([a, b, n]) => [[a, b].sort().join("|"), n]));
+	const same = (a, b) => a.size === b.size && [...a].every(([k, v]) => b.get(k) === v);
+	if (!same(want.fileCount, files) || !same(want.pairCount, pairs)) {
+		console.error(`mismatch after ${label}`);
+		process.exit(1);
+	}
+}
+
+engine.prepend(commits.slice(400));
+check("first batch");
+engine.prepend(commits.slice(0, 400));
+check("older batch");
+for (const p of [0, 1, 599, 37, 300, 301, 64, 600, 5]) {
+	engine.seek(p);
+	check(`seek ${p}`);
+}
+engine.seek(450);
+engine.setAuthorActive("author-1", false);
+authors.delete("author-1");
+check("author off");
+engine.seek(100);
+check("seek with author off");
+engine.setAuthorActive("author-1", true);
+authors.add("author-1");
+check("author on");
+filter = p => p.includes("dir1");
+engine.setPathFilter(filter);
+check("path filter");
+engine.seek(599);
+check("seek with path filter");
+const newer = synthCommits({ commits: 50, files: 40, authors: 4, seed: 9 });
+engine.append(newer);
+commits.push(...newer);
+check("append keeps the position");
+engine.seek(engine.length);
+check("seek into appended commits");
+"""
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_engine_matches_full_recompute(tmp_path):
+	script = tmp_path / "check.mjs"
+	script.write_text(CHECK % {"bench": repr(BENCH.as_uri())})
+	result = subprocess.run(["node", str(script)], capture_output=True, text=True)
+	assert result.returncode == 0, result.stderr
@@ -0,0 +1,131 @@
+import time
+from contextlib import closing
+
+import git
+
+from git_viz import history_index
+from git_viz.git_ops import get_commits, get_repo_metadata, get_tree
+from git_viz.history_index import HistoryIndex
+
+
+def _commit_file(repo_dir, name, message):
+	repo = git.Repo(repo_dir)
+	(repo_dir / name).write_text(f"{message}\n")
+	repo.index.add([name])
+	return repo.index.commit(message)
+
+
+def _record_log_revs(monkeypatch):
+	revs = []
+	original = history_index.iter_log
+
+	def recording(repo, rev="HEAD", *args, **kwargs):
+		revs.append(rev)
+		return original(repo, rev, *args, **kwargs)
+
+	monkeypatch.setattr(history_index, "iter_log", recording)
+	return revs
+
+
+class TestHistoryIndex:
+	def test_index_written_to_cache_dir(self, multi_commit_repo, isolated_cache_dir):
+		index = HistoryIndex(git.Repo(multi_commit_repo))
+		index.sync()
+		assert index.db_path.parent == isolated_cache_dir
+		assert index.db_path.exists()
+		assert index.commit_count() == 5
+
+	def test_sync_is_noop_when_tip_unchanged(self, multi_commit_repo, monkeypatch):
+		HistoryIndex(git.Repo(multi_commit_repo)).sync()
+		revs = _record_log_revs(monkeypatch)
+		HistoryIndex(git.Repo(multi_commit_repo)).sync()
+		assert revs == []
+
+	def test_incremental_ingest_only_reads_new_commits(self, multi_commit_repo, monkeypatch):
+		old_tip = HistoryIndex(git.Repo(multi_commit_repo)).sync()
+		revs = _record_log_revs(monkeypatch)
+		_commit_file(multi_commit_repo, "new_a.txt", "New A")
+		new_tip = _commit_file(multi_commit_repo, "new_b.txt", "New B").hexsha
+
+		index = HistoryIndex(git.Repo(multi_commit_repo))
+		assert index.sync() == new_tip
+		assert revs == [f"{old_tip}..{new_tip}"]
+		messages = [c["message"] for c in index.iter_commits()]
+		assert messages[:3] == ["New B", "New A", "Commit 4"]
+		assert messages[-1] == "Commit 0"
+
+	def test_rewritten_history_triggers_rebuild(self, multi_commit_repo, monkeypatch):
+		HistoryIndex(git.Repo(multi_commit_repo)).sync()
+		repo = git.Repo(multi_commit_repo)
+		repo.git.reset("--hard", "HEAD~2")
+		new_tip = _commit_file(multi_commit_repo, "rewritten.txt", "Rewritten").hexsha
+		revs = _record_log_revs(monkeypatch)
+
+		index = HistoryIndex(git.Repo(multi_commit_repo))
+		index.sync()
+		assert revs == [new_tip]
+		messages = [c["message"] for c in index.iter_commits()]
+		assert messages == ["Rewritten", "Commit 2", "Commit 1", "Commit 0"]
+
+	def test_refs_indexed_separately(self, multi_branch_repo):
+		main_index = HistoryIndex(git.Repo(multi_branch_repo))
+		main_index.sync()
+		repo = git.Repo(multi_branch_repo)
+		repo.heads.feature.checkout()
+		feature_index = HistoryIndex(repo)
+		feature_index.sync()
+		assert main_index.db_path != feature_index.db_path
+		assert main_index.commit_count() == 2
+		assert feature_index.commit_count() == 3
+
+	def test_records_keep_parents_and_stats(self, history_repo):
+		index = HistoryIndex(git.Repo(history_repo))
+		index.sync()
+		merge = next(index.iter_commits(limit=1))
+		assert len(merge["parents"]) == 2
+		assert merge["files"] == [{"path": "feature.txt", "insertions": 1, "deletions": 0}]
+
+	def test_api_results_match_after_update(self, multi_commit_repo):
+		assert get_repo_metadata(multi_commit_repo)["commit_count"] == 5
+		_commit_file(multi_commit_repo, "later.txt", "Later")
+		assert get_repo_metadata(multi_commit_repo)["commit_count"] == 6
+		assert get_commits(multi_commit_repo, limit=1)[0]["message"] == "Later"
+
+	def test_tree_served_from_cache(self, single_commit_repo, monkeypatch):
+		first = get_tree(single_commit_repo)
+		monkeypatch.setattr("git_viz.git_ops._build_tree", lambda tree: {})
+		assert get_tree(single_commit_repo) == first
+
+	def test_hotspots_incremental_matches_rebuild(self, history_repo):
+		index = HistoryIndex(git.Repo(history_repo))
+		index.sync()
+		repo = git.Repo(history_repo)
+		repo.git.mv("new_name.txt", "renamed.txt")
+		repo.git.rm("main.txt")
+		repo.git.commit("-m", "Rename again and delete")
+		index.sync()
+		incremental = index.hotspots("commits")
+		assert [f["path"] for f in incremental] == ["renamed.txt", "feature.txt", "image.bin"]
+		assert incremental[0]["previous_paths"] == ["new_name.txt", "old_name.txt"]
+
+		index.db_path.unlink()
+		index.sync()
+		assert index.hotspots("commits") == incremental
+
+	def test_non_utf8_path_is_escaped(self, latin1_repo):
+		index = HistoryIndex(git.Repo(latin1_repo))
+		index.sync()
+		oldest = list(index.iter_commits())[-1]
+		assert oldest["files"] == [{"path": "caf\\xe9.txt", "insertions": 1, "deletions": 0}]
+		assert get_tree(latin1_repo)["files"].keys() == {"caf\\xe9.txt", "plain.txt"}
+
+	def test_tree_reads_do_not_wait_for_sync(self, single_commit_repo):
+		first = get_tree(single_commit_repo)
+		index = HistoryIndex(git.Repo(single_commit_repo))
+		# Hold the write lock the way a long ingest does
+		with closing(index._connect()) as writer:
+			writer.execute("BEGIN IMMEDIATE")
+			start = time.monotonic()
+			assert get_tree(single_commit_repo) == first
+			assert time.monotonic() - start < 5
+			writer.rollback()
@@ -0,0 +1,108 @@
+import sqlite3
+
+import pytest
+
+from git_viz import hotspots
+from git_viz.filters import CommitFilter
+
+
+@pytest.fixture
+def conn():
+	conn = sqlite3.connect(":memory:")
+	conn.executescript(hotspots.SCHEMA)
+	yield conn
+	conn.close()
+
+
+def _apply(conn, commits):
+	batch = hotspots.HotspotUpdate(conn)
+	for commit in commits:
+		batch.apply(*commit)
+	batch.flush()
+
+
+def _ranked(conn, metric="churn", limit=50, pathspec=None):
+	return {
+		f["path"]: f for f in hotspots.ranked(conn, metric, limit, CommitFilter(pathspec=pathspec))
+	}
+
+
+COMMITS = [
+	("alice", 100, [("src/a.py", 10, 0), ("src/b.py", 5, 0)]),
+	("bob", 200, [("src/a.py", 2, 3)]),
+	("alice", 300, [("src/a.py", 1, 1), ("README.md", 4, 0)]),
+]
+
+
+def test_totals_and_ownership(conn):
+	_apply(conn, COMMITS)
+	files = _ranked(conn)
+	assert list(files) == ["src/a.py", "src/b.py", "README.md"]
+	assert files["src/a.py"] == {
+		"path": "src/a.py",
+		"churn": 17,
+		"commits": 3,
+		"insertions": 13,
+		"deletions": 4,
+		"authors": 2,
+		"ownership": pytest.approx(2 / 3),
+		"last_modified": 300,
+		"previous_paths": [],
+		"top_authors": [
+			{"name": "alice", "commits": 2, "churn": 12},
+			{"name": "bob", "commits": 1, "churn": 5},
+		],
+	}
+
+
+def test_ranked_by_metric(conn):
+	_apply(conn, COMMITS)
+	assert [f["path"] for f in hotspots.ranked(conn, "last_modified", 2)] == [
+		"README.md",
+		"src/a.py",
+	]
+	assert list(_ranked(conn, pathspec="src")) == ["src/a.py", "src/b.py"]
+	with pytest.raises(ValueError, match="Invalid metric"):
+		list(hotspots.ranked(conn, "size", 10))
+
+
+def test_top_authors_capped(conn):
+	_apply(conn, [(f"dev{i}", i, [("hot.py", 1, 0)]) for i in range(hotspots.TOP_AUTHORS + 2)])
+	(hot,) = hotspots.ranked(conn, "authors", 10)
+	assert hot["authors"] == hotspots.TOP_AUTHORS + 2
+	assert len(hot["top_authors"]) == hotspots.TOP_AUTHORS
+
+
+def test_rename_keeps_history(conn):
+	_apply(conn, COMMITS)
+	# git reports a rename as the old path deleted and the new one added
+	_apply(
+		conn,
+		[("carol", 400, [("src/a.py", 0, 14), ("lib/a.py", 14, 0)], [("src/a.py", "lib/a.py")])],
+	)
+	_apply(conn, [("carol", 500, [("lib/a.py", 0, 14), ("a.py", 14, 0)], [("lib/a.py", "a.py")])])
+	files = _ranked(conn)
+	assert "src/a.py" not in files and "lib/a.py" not in files
+	assert files["a.py"]["commits"] == 5
+	assert files["a.py"]["churn"] == 17 + 28 + 28
+	assert files["a.py"]["previous_paths"] == ["lib/a.py", "src/a.py"]
+
+
+def test_deleted_files_dropped(conn):
+	_apply(conn, COMMITS)
+	_apply(conn, [("bob", 400, [("src/b.py", 0, 5)], (), ["src/b.py"])])
+	assert list(_ranked(conn)) == ["src/a.py", "README.md"]
+	assert conn.execute(
+		"SELECT COUNT(*) FROM hotspot_authors WHERE path = 'src/b.py'"
+	).fetchone() == (0,)
+
+
+def test_batches_match_one_pass(conn, monkeypatch):
+	_apply(conn, COMMITS)
+	expected = _ranked(conn)
+	for table in hotspots.TABLES:
+		conn.execute(f"DELETE FROM {table}")
+	# Flushing after every commit reads the rows back for the next one
+	monkeypatch.setattr(hotspots, "FLUSH_ROWS", 1)
+	_apply(conn, COMMITS)
+	assert _ranked(conn) == expected
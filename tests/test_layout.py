@@ -0,0 +1,45 @@
+import math
+
+from git_viz.layout import EDGE_LENGTH, layout_sequence, strongest_nodes
+
+
+def _dist(layout, a, b):
+	return math.dist(layout[a], layout[b])
+
+
+class TestLayoutSequence:
+	def test_linked_nodes_end_up_closer(self):
+		nodes = [f"n{i}" for i in range(40)]
+		edges = [(f"n{i}", f"n{i + 1}", 3) for i in range(0, 40, 2)]
+		(layout,) = layout_sequence([(nodes, edges)])
+		linked = sum(_dist(layout, a, b) for a, b, _ in edges) / len(edges)
+		unlinked = sum(_dist(layout, f"n{i}", f"n{i + 2}") for i in range(0, 38, 2)) / 19
+		assert linked < unlinked
+		assert linked < 2 * EDGE_LENGTH
+
+	def test_deterministic(self):
+		graph = ([f"n{i}" for i in range(20)], [("n0", "n1", 1), ("n1", "n2", 2)])
+		assert layout_sequence([graph], seed=3) == layout_sequence([graph], seed=3)
+
+	def test_warm_start_keeps_existing_nodes_near(self):
+		nodes = [f"n{i}" for i in range(30)]
+		edges = [(f"n{i}", f"n{i + 1}", 2) for i in range(29)]
+		first, second = layout_sequence(
+			[(nodes, edges), (nodes + ["new"], edges + [("n0", "new", 1)])]
+		)
+		drift = max(math.dist(first[n], second[n]) for n in nodes)
+		assert drift < EDGE_LENGTH / 2
+		# A new node starts next to the neighbour it is linked to
+		assert _dist(second, "new", "n0") < 3 * EDGE_LENGTH
+
+	def test_single_and_empty_graphs(self):
+		empty, single = layout_sequence([([], []), (["only"], [])])
+		assert empty == {}
+		assert set(single) == {"only"}
+
+
+class TestStrongestNodes:
+	def test_ranks_by_total_edge_weight(self):
+		edges = [("a", "b", 5), ("b", "c", 1), ("c", "d", 2), ("e", "f", 1)]
+		assert strongest_nodes(edges, 3) == ["a", "b", "c"]
+		assert strongest_nodes(edges) == ["a", "b", "c", "d", "e", "f"]
@@ -0,0 +1,88 @@
+import time
+
+from git_viz import metrics
+
+
+def _in_request(fn, profile=False):
+	record = metrics.RequestMetrics(profile=profile)
+	token = metrics._current.set(record)
+	try:
+		fn()
+	finally:
+		metrics._current.reset(token)
+	return record
+
+
+def test_phases_exclude_nested_time():
+	def work():
+		with metrics.phase("outer"):
+			time.sleep(0.02)
+			with metrics.phase("inner"):
+				time.sleep(0.05)
+		with metrics.phase("inner"):
+			pass
+
+	record = _in_request(work)
+	assert 0.015 < record.phases["outer"] < 0.045
+	assert record.phases["inner"] >= 0.05
+
+
+def test_outside_a_request_is_a_noop():
+	with metrics.phase("sync"):
+		metrics.count("git_processes")
+	assert metrics.current() is None
+	fn = len
+	assert metrics.profiled(fn) is fn
+
+
+def test_server_timing_header():
+	def work():
+		metrics.count("git_processes", 2)
+		metrics.count("objects_read")
+		with metrics.phase("tree"):
+			pass
+
+	header = _in_request(work).server_timing()
+	entries = header.split(", ")
+	assert entries[0].startswith("tree;dur=")
+	assert 'git_processes;desc="2"' in entries
+	assert 'objects_read;desc="1"' in entries
+	assert entries[-1].startswith("total;dur=")
+
+
+def test_registry_render():
+	registry = metrics.Registry()
+	record = _in_request(lambda: metrics.count("objects_read", 7))
+	record.add_phase("sync", 0.25)
+	registry.record("/api/tree", 200, 0.3, record)
+	registry.record("/api/tree", 404, 0.001, metrics.RequestMetrics())
+	registry.add_bytes("/api/tree", 120)
+	text = registry.render()
+	assert 'git_viz_requests_total{endpoint="/api/tree",status="200"} 1' in text
+	assert 'git_viz_requests_total{endpoint="/api/tree",status="404"} 1' in text
+	assert 'git_viz_request_duration_seconds_bucket{endpoint="/api/tree",le="0.005"} 1' in text
+	assert 'git_viz_request_duration_seconds_bucket{endpoint="/api/tree",le="0.5"} 2' in text
+	assert 'git_viz_phase_seconds_sum{endpoint="/api/tree",phase="sync"} 0.250000' in text
+	assert 'git_viz_objects_read_total{endpoint="/api/tree"} 7' in text
+	assert 'git_viz_response_bytes_total{endpoint="/api/tree"} 120' in text
+
+
+def test_render_stats_skips_non_numeric():
+	text = metrics.render_stats("pool", {"active": 2, "saturation": 0.5, "by_repo": {}, "ok": True})
+	assert text == (
+		"# TYPE git_viz_pool_active untyped\ngit_viz_pool_active 2\n"
+		"# TYPE git_viz_pool_saturation untyped\ngit_viz_pool_saturation 0.5\n"
+	)
+
+
+def test_profiled_writes_reports(tmp_path, monkeypatch):
+	monkeypatch.setenv(metrics.PROFILE_DIR_ENV, str(tmp_path))
+	results = []
+
+	def job(n):
+		return sum(range(n))
+
+	record = _in_request(lambda: results.append(metrics.profiled(job)(10)), profile=True)
+	assert results == [45]
+	assert (tmp_path / f"{record.profile_report}.prof").exists()
+	assert "job" in (tmp_path / f"{record.profile_report}.txt").read_text()
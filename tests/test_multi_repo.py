@@ -0,0 +1,134 @@
+import asyncio
+
+import git
+import pytest
+
+from git_viz.git_ops import get_activity, get_repo_summary
+from git_viz.multi_repo import aggregate, find_repositories, merge_summaries
+from git_viz.workers import ProcessWorkerPool
+
+
+@pytest.fixture
+def processes():
+	pool = ProcessWorkerPool(processes=2)
+	yield pool
+	pool.close()
+
+
+def _summary(path, identities, weekly, dates):
+	return {
+		"path": path,
+		"name": path.rsplit("/", 1)[-1],
+		"branch": "main",
+		"head": "0" * 40,
+		"commit_count": sum(n for _, _, n in identities),
+		"identities": [{"email": e, "name": name, "commits": n} for e, name, n in identities],
+		"weekly": [{"week": w, "count": n} for w, n in weekly],
+		"commits": [{"hash": f"{path}-{d}", "date": d} for d in dates],
+	}
+
+
+class TestFindRepositories:
+	def test_finds_nested_working_trees(self, tmp_path):
+		for name in ("a", "group/b", "group/b/vendor/c", "too/deep/down/d", ".hidden/e"):
+			git.Repo.init(tmp_path / name, mkdir=True)
+		assert find_repositories(tmp_path) == [tmp_path / "a", tmp_path / "group" / "b"]
+		assert find_repositories(tmp_path, max_depth=4)[-1] == tmp_path / "too/deep/down/d"
+
+	def test_root_is_a_repository(self, multi_commit_repo):
+		assert find_repositories(multi_commit_repo) == [multi_commit_repo.resolve()]
+
+
+class TestMergeSummaries:
+	def test_contributors_unified_by_email(self):
+		merged = merge_summaries(
+			[
+				_summary(
+					"/r/api", [("Ann@Example.com", "Ann", 3), ("bo@example.com", "Bo", 1)], [], []
+				),
+				_summary("/r/web", [("ann@example.com", "ann b", 2), ("", "Anon", 1)], [], []),
+			]
+		)
+		assert merged["contributors"] == [
+			{
+				"name": "Ann",
+				"email": "Ann@Example.com",
+				"aliases": ["ann b"],
+				"commits": 5,
+				"repos": {"/r/api": 3, "/r/web": 2},
+			},
+			{"name": "Anon", "email": "", "aliases": [], "commits": 1, "repos": {"/r/web": 1}},
+			{
+				"name": "Bo",
+				"email": "bo@example.com",
+				"aliases": [],
+				"commits": 1,
+				"repos": {"/r/api": 1},
+			},
+		]
+		assert merged["commit_count"] == 7
+
+	def test_weekly_activity_and_timeline(self):
+		merged = merge_summaries(
+			[
+				_summary(
+					"/r/api", [], [("2024-W01", 2), ("2024-W03", 1)], ["2024-01-20", "2024-01-02"]
+				),
+				_summary("/r/web", [], [("2024-W01", 1)], ["2024-01-10", "2024-01-01"]),
+			],
+			limit=3,
+		)
+		assert merged["activity"]["commits_over_time"] == [
+			{"week": "2024-W01", "count": 3},
+			{"week": "2024-W03", "count": 1},
+		]
+		assert [(c["repo"], c["date"]) for c in merged["timeline"]] == [
+			("/r/api", "2024-01-20"),
+			("/r/web", "2024-01-10"),
+			("/r/api", "2024-01-02"),
+		]
+
+
+class TestAggregate:
+	def test_matches_single_repo_views(self, temp_git_repo, processes):
+		first = temp_git_repo(commits=3, authors=["Alice Dev", "Bob Engineer"])
+		second = temp_git_repo(commits=2, authors=["alice dev"])
+		merged = asyncio.run(aggregate([first, second], processes, limit=4))
+
+		assert merged["partial"] is False
+		assert [r["commit_count"] for r in merged["repos"]] == [3, 2]
+		alice = merged["contributors"][0]
+		assert (alice["email"], alice["commits"]) == ("alice.dev@example.com", 2)
+		assert alice["repos"] == {str(first): 1, str(second): 1}
+		weeks = {}
+		for repo in (first, second):
+			for w in get_activity(repo)["commits_over_time"]:
+				weeks[w["week"]] = weeks.get(w["week"], 0) + w["count"]
+		assert {w["week"]: w["count"] for w in merged["activity"]["commits_over_time"]} == weeks
+		assert len(merged["timeline"]) == 4
+		assert merged["timeline"][0]["hash"] in {
+			get_repo_summary(repo, 1)["head"] for repo in (first, second)
+		}
+
+	def test_failures_give_partial_results(self, multi_commit_repo, tmp_path, processes):
+		merged = asyncio.run(aggregate([multi_commit_repo, tmp_path], processes))
+		assert merged["partial"] is True
+		assert [r["path"] for r in merged["repos"]] == [str(multi_commit_repo)]
+		assert merged["errors"][0]["path"] == str(tmp_path)
+		assert "Not a git repository" in merged["errors"][0]["error"]
+
+	def test_timeout_gives_partial_results(self, multi_commit_repo, processes):
+		merged = asyncio.run(aggregate([multi_commit_repo], processes, timeout=1e-6))
+		assert merged["errors"] == [{"path": str(multi_commit_repo), "error": "Timed out"}]
+		assert merged["repos"] == []
+
+
+def test_multi_endpoint(client, temp_git_repo, tmp_path):
+	repo = temp_git_repo(commits=2)
+	resp = client.get("/api/multi", params={"root": str(tmp_path), "limit": 1})
+	assert resp.status_code == 200
+	data = resp.json()
+	assert [r["path"] for r in data["repos"]] == [str(repo)]
+	assert len(data["timeline"]) == 1
+	assert client.get("/api/multi").status_code == 400
+	assert client.get("/api/multi", params={"root": str(tmp_path / "missing")}).status_code == 404
@@ -0,0 +1,93 @@
+import pytest
+
+from git_viz.repo_pool import RepoPool
+
+
+def _read_object(repo):
+	"""Start the handle's persistent ``cat-file --batch-check`` helper."""
+	repo.odb.info(repo.head.commit.binsha)
+
+
+class TestRepoPool:
+	def test_reuses_handles(self, multi_commit_repo):
+		pool = RepoPool()
+		with pool.checkout(multi_commit_repo) as first:
+			_read_object(first)
+		spawned = pool.stats()["persistent_processes_spawned"]
+		with pool.checkout(multi_commit_repo) as second:
+			_read_object(second)
+		assert second is first
+		stats = pool.stats()
+		assert (stats["opened"], stats["reused"], stats["reuse_rate"]) == (1, 1, 0.5)
+		# The warm cat-file helper served the second read
+		assert stats["persistent_processes_spawned"] == spawned
+		assert (stats["open"], stats["idle"], stats["in_use"]) == (1, 1, 0)
+		pool.close()
+
+	def test_concurrent_checkouts_get_their_own_handle(self, multi_commit_repo):
+		pool = RepoPool()
+		with pool.checkout(multi_commit_repo) as a, pool.checkout(multi_commit_repo) as b:
+			assert a is not b
+			assert pool.stats()["open_by_repo"] == {str(multi_commit_repo.resolve()): 2}
+		assert pool.stats()["idle"] == 2
+		pool.close()
+
+	def test_max_open_closes_least_recently_used(self, multi_commit_repo, single_commit_repo):
+		pool = RepoPool(max_open=1, checkout_timeout=0.05)
+		with (
+			pool.checkout(multi_commit_repo),
+			pytest.raises(TimeoutError),
+			pool.checkout(single_commit_repo),
+		):
+			pass
+		with pool.checkout(single_commit_repo):
+			pass
+		stats = pool.stats()
+		assert stats["closed_for_capacity"] == 1
+		assert stats["open_by_repo"] == {str(single_commit_repo.resolve()): 1}
+		pool.close()
+
+	def test_idle_handles_expire(self, multi_commit_repo):
+		now = [0.0]
+		pool = RepoPool(idle_timeout=10, clock=lambda: now[0])
+		with pool.checkout(multi_commit_repo) as first:
+			pass
+		now[0] = 11
+		with pool.checkout(multi_commit_repo) as second:
+			assert second is not first
+		assert pool.stats()["closed_idle"] == 1
+		pool.close()
+
+	def test_dead_helper_is_replaced(self, multi_commit_repo):
+		pool = RepoPool()
+		with pool.checkout(multi_commit_repo) as first:
+			_read_object(first)
+		first.git.cat_file_header.proc.kill()
+		first.git.cat_file_header.proc.wait()
+		with pool.checkout(multi_commit_repo) as second:
+			_read_object(second)
+		assert second is not first
+		assert pool.stats()["closed_unhealthy"] == 1
+		pool.close()
+
+	def test_failed_job_returns_healthy_handle(self, multi_commit_repo):
+		pool = RepoPool()
+		with pytest.raises(RuntimeError), pool.checkout(multi_commit_repo):
+			raise RuntimeError("boom")
+		assert (pool.stats()["idle"], pool.stats()["in_use"]) == (1, 0)
+		pool.close()
+
+	def test_bad_paths(self, tmp_path):
+		pool = RepoPool()
+		with pytest.raises(ValueError, match="does not exist"), pool.checkout(tmp_path / "missing"):
+			pass
+		with pytest.raises(ValueError, match="Not a git repository"), pool.checkout(tmp_path):
+			pass
+		assert pool.stats()["open"] == 0
+
+
+def test_handle_stats_endpoint(client, multi_commit_repo):
+	client.get("/api/tree", params={"path": str(multi_commit_repo)})
+	stats = client.get("/api/handles").json()
+	assert stats["checkouts"] >= 1
+	assert {"reuse_rate", "processes_spawned", "persistent_processes_spawned"} <= stats.keys()
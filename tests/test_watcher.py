@@ -0,0 +1,220 @@
+import asyncio
+import importlib
+import json
+import threading
+import time
+
+import git
+import pytest
+
+from git_viz.watcher import ChangeFeed, RefWatcher
+from git_viz.workers import GitWorkerPool
+
+
+def _commit(repo_dir, name):
+	repo = git.Repo(repo_dir)
+	(repo_dir / name).write_text(f"{name}\n")
+	repo.index.add([name])
+	return repo.index.commit(f"Add {name}").hexsha
+
+
+class TestRefWatcher:
+	@pytest.mark.parametrize("use_inotify", [True, False], ids=["inotify", "polling"])
+	def test_reports_new_commit(self, multi_commit_repo, use_inotify):
+		seen, moved = [], threading.Event()
+
+		def on_change(repo_path, previous, head):
+			seen.append((repo_path, previous, head))
+			moved.set()
+
+		watcher = RefWatcher(on_change, poll_interval=0.05, use_inotify=use_inotify)
+		before = git.Repo(multi_commit_repo).head.commit.hexsha
+		watcher.watch(multi_commit_repo)
+		after = _commit(multi_commit_repo, "new.txt")
+		assert moved.wait(5)
+		watcher.stop()
+		assert seen == [(multi_commit_repo, before, after)]
+		assert watcher.stats()["changes"] == 1
+
+	def test_other_refs_do_not_count(self, multi_commit_repo):
+		seen = []
+		watcher = RefWatcher(lambda *args: seen.append(args), use_inotify=False)
+		watcher.watch(multi_commit_repo)
+		git.Repo(multi_commit_repo).create_head("feature")
+		watcher.check([multi_commit_repo])
+		assert seen == []
+
+	def test_failing_callback_is_counted(self, multi_commit_repo):
+		def on_change(*args):
+			raise RuntimeError("boom")
+
+		watcher = RefWatcher(on_change, use_inotify=False)
+		watcher.watch(multi_commit_repo)
+		_commit(multi_commit_repo, "new.txt")
+		watcher.check([multi_commit_repo])
+		assert watcher.stats()["failed_callbacks"] == 1
+
+	def test_deleted_repo_is_dropped(self, multi_commit_repo):
+		watcher = RefWatcher(lambda *args: None, use_inotify=False)
+		watcher.watch(multi_commit_repo)
+		(multi_commit_repo / ".git").rename(multi_commit_repo / "moved.git")
+		watcher.check([multi_commit_repo])
+		assert watcher.watched() == []
+
+
+class TestChangeFeed:
+	def test_delivers_across_threads(self):
+		feed = ChangeFeed()
+
+		async def main():
+			events = feed.subscribe()
+			pending = asyncio.ensure_future(anext(events))
+			while feed.subscribers() == 0:
+				await asyncio.sleep(0.01)
+			threading.Thread(target=feed.publish, args=({"head": "abc"},)).start()
+			event = await pending
+			await events.aclose()
+			return event
+
+		assert asyncio.run(main()) == {"head": "abc"}
+		assert feed.subscribers() == 0
+
+	def test_heartbeat_and_overflow(self):
+		feed = ChangeFeed(max_pending=2)
+
+		async def main():
+			events = feed.subscribe(heartbeat=0.01)
+			assert await anext(events) is None
+			for i in range(3):
+				feed.publish({"n": i})
+			await asyncio.sleep(0.01)
+			received = [await anext(events), await anext(events)]
+			await events.aclose()
+			return received
+
+		assert asyncio.run(main()) == [{"n": 1}, {"n": 2}]
+
+
+def test_refresh_warms_served_results(client, multi_commit_repo):
+	app_module = importlib.import_module("git_viz.app")
+	params = {"path": str(multi_commit_repo), "limit": 10}
+	assert len(client.get("/api/commits", params=params).json()) == 5
+	before = app_module.heads.resolve(multi_commit_repo)
+	after = _commit(multi_commit_repo, "new.txt")
+
+	app_module._refresh(multi_commit_repo, before, after)
+	hits = app_module.cache.stats()["hits"]
+	commits = client.get("/api/commits", params=params).json()
+	assert commits[0]["hash"] == after
+	assert app_module.cache.stats()["hits"] == hits + 1
+
+
+def test_refresh_runs_on_pool_with_timeout(client, multi_commit_repo, monkeypatch):
+	app_module = importlib.import_module("git_viz.app")
+	monkeypatch.setattr(app_module, "pool", GitWorkerPool(timeout=0.5))
+	monkeypatch.setattr(app_module, "_recent", {})
+	params = {"path": str(multi_commit_repo), "limit": 10}
+	client.get("/api/commits", params=params)
+	release = threading.Event()
+	app_module._remember(multi_commit_repo, "slow", lambda path: release.wait(10), ())
+	before = app_module.heads.resolve(multi_commit_repo)
+	after = _commit(multi_commit_repo, "new.txt")
+
+	start = time.monotonic()
+	app_module._refresh(multi_commit_repo, before, after)
+	release.set()
+	assert time.monotonic() - start < 5
+	stats = app_module.pool.stats()
+	assert (stats["completed"], stats["timed_out"]) == (2, 1)
+	assert client.get("/api/commits", params=params).json()[0]["hash"] == after
+
+
+def test_refresh_shares_request_slots(multi_commit_repo, monkeypatch):
+	app_module = importlib.import_module("git_viz.app")
+	monkeypatch.setattr(app_module, "pool", GitWorkerPool(per_repo_limit=1, timeout=0.5))
+	monkeypatch.setattr(app_module, "_recent", {})
+	app_module._remember(multi_commit_repo, "quick", lambda path: "ok", ())
+	loop = asyncio.new_event_loop()
+	threading.Thread(target=loop.run_forever, daemon=True).start()
+	monkeypatch.setattr(app_module, "_loop", loop)
+	release = threading.Event()
+	# A request on the serving loop holds the repo's only slot
+	request = asyncio.run_coroutine_threadsafe(
+		app_module.pool.run(str(multi_commit_repo), release.wait, 10), loop
+	)
+	while app_module.pool.stats()["active"] == 0:
+		time.sleep(0.01)
+	events = []
+	monkeypatch.setattr(app_module.changes, "publish", events.append)
+	before = app_module.heads.resolve(multi_commit_repo)
+	try:
+		app_module._refresh(multi_commit_repo, before, _commit(multi_commit_repo, "new.txt"))
+	finally:
+		release.set()
+	# Both time out: the request on its job, the re-warm waiting behind it
+	with pytest.raises(TimeoutError):
+		request.result(timeout=5)
+	loop.call_soon_threadsafe(loop.stop)
+	assert events[0]["warmed"] == 0
+	assert app_module.pool.stats()["timed_out"] == 2
+
+
+def test_sse_stream_filters_by_repo(multi_commit_repo, tmp_path):
+	app_module = importlib.import_module("git_viz.app")
+
+	async def main():
+		stream = app_module._sse(str(multi_commit_repo))
+		assert await anext(stream) == b"retry: 5000\n\n"
+		pending = asyncio.ensure_future(anext(stream))
+		while app_module.changes.subscribers() == 0:
+			await asyncio.sleep(0.01)
+		app_module.changes.publish({"repo": str(tmp_path), "head": "other"})
+		app_module.changes.publish({"repo": str(multi_commit_repo), "head": "abc"})
+		chunk = await pending
+		await stream.aclose()
+		return chunk
+
+	chunk = asyncio.run(main())
+	assert chunk.startswith(b"event: ref\ndata: ")
+	assert b'"head": "abc"' in chunk
+
+
+def test_events_need_watcher(client, multi_commit_repo):
+	assert client.get("/api/events", params={"path": str(multi_commit_repo)}).status_code == 404
+	assert client.get("/api/watcher").json() == {"enabled": False}
+
+
+def test_live_stream_sends_updates(client, multi_commit_repo):
+	app_module = importlib.import_module("git_viz.app")
+	since = app_module.heads.resolve(multi_commit_repo)
+	missed = _commit(multi_commit_repo, "missed.txt")
+
+	def data(chunk):
+		event, payload = chunk.split(b"\n", 1)
+		assert event == b"event: update"
+		return json.loads(payload.removeprefix(b"data: "))
+
+	async def main():
+		stream = app_module._live(None, multi_commit_repo, since, 500, None)
+		assert await anext(stream) == b"retry: 5000\n\n"
+		# HEAD moved before the stream started, so it catches up straight away
+		caught_up = data(await anext(stream))
+		pending = asyncio.ensure_future(anext(stream))
+		while app_module.changes.subscribers() == 0:
+			await asyncio.sleep(0.01)
+		head = _commit(multi_commit_repo, "new.txt")
+		app_module.changes.publish({"repo": str(multi_commit_repo), "head": head})
+		moved = data(await pending)
+		await stream.aclose()
+		return caught_up, moved, head
+
+	caught_up, moved, head = asyncio.run(main())
+	assert (caught_up["since"], caught_up["head"]) == (since, missed)
+	assert [c["hash"] for c in caught_up["commits"]] == [missed]
+	assert (moved["since"], moved["head"]) == (missed, head)
+	assert moved["tree"]["deltas"][0]["added"] == {"new.txt": 8}
+
+
+def test_stream_rejects_bad_cursor(client, multi_commit_repo):
+	resp = client.get("/api/stream", params={"path": str(multi_commit_repo), "since": "HEAD"})
+	assert resp.status_code == 422
@@ -0,0 +1,164 @@
+import asyncio
+import importlib
+import os
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from git_viz import git_ops
+from git_viz.workers import GitWorkerPool, ProcessWorkerPool
+
+# ``git_viz.app`` the attribute is the FastAPI instance; we want the module
+app_module = importlib.import_module("git_viz.app")
+
+
+class TestGitWorkerPool:
+	def test_runs_job_and_counts_it(self):
+		pool = GitWorkerPool(max_workers=2)
+		assert asyncio.run(pool.run("repo", lambda a, b: a + b, 1, 2)) == 3
+		stats = pool.stats()
+		assert stats["submitted"] == 1
+		assert stats["completed"] == 1
+		assert stats["active"] == 0
+		assert stats["in_flight_by_repo"] == {}
+
+	def test_per_repo_limit(self):
+		pool = GitWorkerPool(max_workers=8, per_repo_limit=2)
+		lock = threading.Lock()
+		running = peak = 0
+
+		def job():
+			nonlocal running, peak
+			with lock:
+				running += 1
+				peak = max(peak, running)
+			time.sleep(0.05)
+			with lock:
+				running -= 1
+
+		async def main():
+			await asyncio.gather(*(pool.run("same-repo", job) for _ in range(6)))
+
+		asyncio.run(main())
+		assert peak == 2
+
+	def test_other_repos_not_limited(self):
+		pool = GitWorkerPool(max_workers=8, per_repo_limit=1)
+		barrier = threading.Barrier(3, timeout=2)
+
+		async def main():
+			await asyncio.gather(*(pool.run(f"repo-{i}", barrier.wait) for i in range(3)))
+
+		asyncio.run(main())
+		assert pool.stats()["completed"] == 3
+
+	def test_timeout(self):
+		pool = GitWorkerPool(max_workers=1, timeout=0.05)
+		with pytest.raises(TimeoutError):
+			asyncio.run(pool.run("repo", time.sleep, 0.5))
+		assert pool.stats()["timed_out"] == 1
+
+	def test_errors_propagate(self):
+		pool = GitWorkerPool(max_workers=1)
+
+		def boom():
+			raise ValueError("bad ref")
+
+		with pytest.raises(ValueError, match="bad ref"):
+			asyncio.run(pool.run("repo", boom))
+		assert pool.stats()["failed"] == 1
+
+	def test_timed_out_job_keeps_its_slot(self):
+		pool = GitWorkerPool(max_workers=4, per_repo_limit=1, timeout=0.1)
+		release = threading.Event()
+		running = []
+
+		def job():
+			running.append(1)
+
+		async def main():
+			with pytest.raises(TimeoutError):
+				await pool.run("repo", release.wait, 5)
+			# The runaway thread still holds the repository's only slot
+			with pytest.raises(TimeoutError):
+				await pool.run("repo", job)
+			release.set()
+			await pool.run("repo", job)
+
+		asyncio.run(main())
+		assert running == [1]
+
+
+class TestProcessWorkerPool:
+	def test_runs_in_other_processes(self):
+		pool = ProcessWorkerPool(processes=2)
+
+		async def main():
+			return await asyncio.gather(*(pool.run(os.getpid) for _ in range(4)))
+
+		try:
+			pids = asyncio.run(main())
+		finally:
+			pool.close()
+		assert os.getpid() not in pids
+		assert pool.stats()["completed"] == 4
+
+	def test_timeout_and_dead_worker(self):
+		pool = ProcessWorkerPool(processes=1)
+		try:
+			with pytest.raises(TimeoutError):
+				asyncio.run(pool.run(time.sleep, 1, timeout=0.05))
+			with pytest.raises(BrokenProcessPool):
+				asyncio.run(pool.run(os._exit, 1))
+			# The broken pool is replaced for the next job
+			assert asyncio.run(pool.run(abs, -3)) == 3
+		finally:
+			pool.close()
+		stats = pool.stats()
+		assert (stats["timed_out"], stats["failed"], stats["restarts"]) == (1, 1, 1)
+
+	def test_timed_out_job_holds_its_process(self):
+		pool = ProcessWorkerPool(processes=1, timeout=0.5)
+
+		async def main():
+			with pytest.raises(TimeoutError):
+				await pool.run(time.sleep, 1.5)
+			# Their timeout starts once the runaway job gives the process back
+			return await asyncio.gather(pool.run(time.sleep, 0.1), pool.run(time.sleep, 0.1))
+
+		try:
+			assert asyncio.run(main()) == [None, None]
+		finally:
+			pool.close()
+		assert pool.stats()["timed_out"] == 1
+
+
+class TestPoolEndpoints:
+	def test_pool_stats_endpoint(self, client):
+		resp = client.get("/api/pool")
+		assert resp.status_code == 200
+		data = resp.json()
+		for key in ("max_workers", "active", "queued", "saturation", "timed_out"):
+			assert key in data
+
+	def test_cheap_endpoint_not_blocked_by_git_work(self, client, monkeypatch):
+		release = threading.Event()
+		monkeypatch.setattr(git_ops, "get_activity", lambda path, *args: release.wait(5))
+		# Entering the client shares one event loop between both requests
+		with client:
+			heavy = threading.Thread(target=client.get, args=("/api/activity",))
+			heavy.start()
+			try:
+				start = time.perf_counter()
+				assert client.get("/").status_code == 200
+				assert time.perf_counter() - start < 1
+			finally:
+				release.set()
+				heavy.join()
+
+	def test_timeout_returns_504(self, client, monkeypatch):
+		monkeypatch.setattr(app_module, "pool", GitWorkerPool(max_workers=1, timeout=0.05))
+		monkeypatch.setattr(git_ops, "get_activity", lambda path, *args: time.sleep(0.5))
+		assert client.get("/api/activity").status_code == 504